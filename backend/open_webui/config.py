@@ -3,6 +3,7 @@ import logging
 import os
 import shutil
 import base64
+import time
 import redis
 
 from datetime import datetime
@@ -21,6 +22,7 @@ from open_webui.env import (
     REDIS_URL,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
+    REDIS_CONFIG_CACHE_TTL,
     FRONTEND_BUILD_DIR,
     OFFLINE_MODE,
     OPEN_WEBUI_DIR,
@@ -209,13 +211,36 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Holds the `PersistentConfig` values of the app.
+
+    With Redis, writes are published under `open-webui:config:<key>` and bump
+    the `open-webui:config:version` counter. Reads are served from memory and
+    only re-fetch keys from Redis after another replica has bumped the
+    version, which is checked at most once per `cache_ttl` seconds.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    _redis_version_key = "open-webui:config:version"
 
     def __init__(
-        self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
+        self,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+        cache_ttl: float = REDIS_CONFIG_CACHE_TTL,
     ):
         super().__setattr__("_state", {})
+        super().__setattr__("_cache_ttl", cache_ttl)
+        super().__setattr__(
+            "_cache",
+            {
+                "version": None,
+                "checked_at": None,
+                # Keys whose in-memory value is current for `version`
+                "keys": set(),
+            },
+        )
         if redis_url:
             super().__setattr__(
                 "_redis",
@@ -231,7 +256,28 @@ class AppConfig:
 
             if self._redis:
                 redis_key = f"open-webui:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                pipe = self._redis.pipeline()
+                pipe.set(redis_key, json.dumps(self._state[key].value))
+                pipe.incr(self._redis_version_key)
+                _, version = pipe.execute()
+
+                if str(version - 1) != (self._cache["version"] or "0"):
+                    # Another replica changed the config in the meantime
+                    self._cache["keys"].clear()
+                self._cache["version"] = str(version)
+                self._cache["keys"].add(key)
+
+    def _check_redis_version(self):
+        now = time.monotonic()
+        checked_at = self._cache["checked_at"]
+        if checked_at is not None and now - checked_at < self._cache_ttl:
+            return
+
+        self._cache["checked_at"] = now
+        version = self._redis.get(self._redis_version_key)
+        if version != self._cache["version"]:
+            self._cache["version"] = version
+            self._cache["keys"].clear()
 
     def __getattr__(self, key):
         if key not in self._state:
@@ -239,6 +285,10 @@ class AppConfig:
 
         # If Redis is available, check for an updated value
         if self._redis:
+            self._check_redis_version()
+            if key in self._cache["keys"]:
+                return self._state[key].value
+
             redis_key = f"open-webui:config:{key}"
             redis_value = self._redis.get(redis_key)
 
@@ -254,6 +304,8 @@ class AppConfig:
                 except json.JSONDecodeError:
                     log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
 
+            self._cache["keys"].add(key)
+
         return self._state[key].value
 
 
@@ -1753,6 +1805,12 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Persist a BM25 index of the collections used while hybrid search is enabled,
+# so its queries don't load whole collections. Set to false to always load them
+ENABLE_RAG_LEXICAL_INDEX = (
+    os.environ.get("ENABLE_RAG_LEXICAL_INDEX", "true").lower() == "true"
+)
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -1837,6 +1895,21 @@ if PGVECTOR_PGCRYPTO and not PGVECTOR_PGCRYPTO_KEY:
         "PGVECTOR_PGCRYPTO is enabled but PGVECTOR_PGCRYPTO_KEY is not set. Please provide a valid key."
     )
 
+# Rows written per INSERT statement (and transaction) by insert and upsert
+PGVECTOR_INSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", "500"))
+
+# ANN index on the vector column: "ivfflat" or "hnsw"
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+if PGVECTOR_INDEX_METHOD not in ("ivfflat", "hnsw"):
+    raise ValueError(
+        f"Unsupported PGVECTOR_INDEX_METHOD {PGVECTOR_INDEX_METHOD}, expected ivfflat or hnsw."
+    )
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2175,6 +2248,26 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Embedding batches sent to remote engines at the same time when ingesting
+RAG_EMBEDDING_CONCURRENCY = int(os.environ.get("RAG_EMBEDDING_CONCURRENCY", "4"))
+
+# Slots kept for query embeddings, so searches don't wait behind ingestion
+RAG_EMBEDDING_QUERY_CONCURRENCY = int(
+    os.environ.get("RAG_EMBEDDING_QUERY_CONCURRENCY", "4")
+)
+
+# Retries of embedding requests rejected with 429 or 503
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5"))
+
+# Chunks embedded and inserted together when ingesting a file
+RAG_INGEST_BATCH_SIZE = int(os.environ.get("RAG_INGEST_BATCH_SIZE", "256"))
+
+# Embedded batches waiting to be inserted before ingestion blocks
+RAG_INGEST_QUEUE_SIZE = int(os.environ.get("RAG_INGEST_QUEUE_SIZE", "2"))
+
+# Files re-embedded at the same time when reindexing knowledge bases
+RAG_REINDEX_CONCURRENCY = int(os.environ.get("RAG_REINDEX_CONCURRENCY", "4"))
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2183,6 +2276,33 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Embeddings are cached by (engine, url, model, prefix, sha256(text)) in memory,
+# on disk and, optionally, in Redis so identical chunks and queries are
+# only embedded once
+ENABLE_RAG_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE", "True").lower() == "true"
+)
+
+RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "10000"))
+
+# Set to an empty string to disable the on-disk tier
+RAG_EMBEDDING_CACHE_DIR = os.environ.get(
+    "RAG_EMBEDDING_CACHE_DIR", f"{CACHE_DIR}/embeddings"
+)
+
+# Least recently used embeddings are evicted from disk past this size
+RAG_EMBEDDING_CACHE_DISK_SIZE_MB = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_DISK_SIZE_MB", "1024")
+)
+
+ENABLE_RAG_EMBEDDING_CACHE_REDIS = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE_REDIS", "False").lower() == "true"
+)
+
+RAG_EMBEDDING_CACHE_REDIS_TTL = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_REDIS_TTL", str(60 * 60 * 24 * 7))
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -103,6 +103,9 @@ class ERROR_MESSAGES(str, Enum):
         "Duplicate content detected. Please provide unique content to proceed."
     )
     FILE_NOT_PROCESSED = "Extracted content is not available for this file. Please ensure that the file is processed before proceeding."
+    KNOWLEDGE_REINDEXING = (
+        "This knowledge base is being reindexed. Please try again once it is done."
+    )
 
 
 class TASKS(str, Enum):
@@ -320,6 +320,33 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message content is buffered and written at most once per interval
+# (seconds) or once this many bytes of new content have accumulated
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except Exception:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_BYTES = os.environ.get("REALTIME_CHAT_SAVE_BYTES", "4096")
+
+try:
+    REALTIME_CHAT_SAVE_BYTES = int(REALTIME_CHAT_SAVE_BYTES)
+except Exception:
+    REALTIME_CHAT_SAVE_BYTES = 4096
+
+# Clients opting into delta `chat:completion` events receive a full-content
+# checkpoint every this many events
+CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL = os.environ.get(
+    "CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL", "50"
+)
+
+try:
+    CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL = int(CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL)
+except Exception:
+    CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL = 50
+
 ####################################
 # REDIS
 ####################################
@@ -328,6 +355,15 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+# Seconds a replica serves config values from memory before checking Redis
+# for changes made by other replicas
+REDIS_CONFIG_CACHE_TTL = os.environ.get("REDIS_CONFIG_CACHE_TTL", "1")
+
+try:
+    REDIS_CONFIG_CACHE_TTL = float(REDIS_CONFIG_CACHE_TTL)
+except Exception:
+    REDIS_CONFIG_CACHE_TTL = 1.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -364,6 +400,49 @@ WEBUI_AUTH_SIGNOUT_REDIRECT_URL = os.environ.get(
     "WEBUI_AUTH_SIGNOUT_REDIRECT_URL", None
 )
 
+# Seconds an authenticated user is served from the in-process cache, changes
+# made on other replicas are picked up after at most this delay
+WEBUI_AUTH_USER_CACHE_TTL = os.environ.get("WEBUI_AUTH_USER_CACHE_TTL", "5")
+
+try:
+    WEBUI_AUTH_USER_CACHE_TTL = float(WEBUI_AUTH_USER_CACHE_TTL)
+except Exception:
+    WEBUI_AUTH_USER_CACHE_TTL = 5.0
+
+# Most users kept in the in-process cache, the least recently used are evicted
+WEBUI_AUTH_USER_CACHE_SIZE = os.environ.get("WEBUI_AUTH_USER_CACHE_SIZE", "10000")
+
+try:
+    WEBUI_AUTH_USER_CACHE_SIZE = int(WEBUI_AUTH_USER_CACHE_SIZE)
+except Exception:
+    WEBUI_AUTH_USER_CACHE_SIZE = 10000
+
+# Seconds the models each user may read are cached for, see ModelAccessIndex
+MODEL_ACCESS_CACHE_TTL = os.environ.get("MODEL_ACCESS_CACHE_TTL", "5")
+
+try:
+    MODEL_ACCESS_CACHE_TTL = float(MODEL_ACCESS_CACHE_TTL)
+except Exception:
+    MODEL_ACCESS_CACHE_TTL = 5.0
+
+# Seconds the function snapshot is kept, see FunctionSnapshots
+FUNCTION_SNAPSHOT_TTL = os.environ.get("FUNCTION_SNAPSHOT_TTL", "60")
+
+try:
+    FUNCTION_SNAPSHOT_TTL = float(FUNCTION_SNAPSHOT_TTL)
+except Exception:
+    FUNCTION_SNAPSHOT_TTL = 60.0
+
+# Minimum seconds between two `last_active_at` writes for the same user
+USER_LAST_ACTIVE_UPDATE_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_UPDATE_INTERVAL", "60"
+)
+
+try:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = float(USER_LAST_ACTIVE_UPDATE_INTERVAL)
+except Exception:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = 60.0
+
 ####################################
 # WEBUI_SECRET_KEY
 ####################################
@@ -403,12 +482,42 @@ ENABLE_WEBSOCKET_SUPPORT = (
 WEBSOCKET_MANAGER = os.environ.get("WEBSOCKET_MANAGER", "")
 
 WEBSOCKET_REDIS_URL = os.environ.get("WEBSOCKET_REDIS_URL", REDIS_URL)
-WEBSOCKET_REDIS_LOCK_TIMEOUT = os.environ.get("WEBSOCKET_REDIS_LOCK_TIMEOUT", 60)
 
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Frame window (seconds) within which streamed `chat:completion` content events
+# are coalesced into a single emit, 0 disables coalescing
+WEBSOCKET_EVENT_COALESCE_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_COALESCE_INTERVAL", "0.03"
+)
+
+try:
+    WEBSOCKET_EVENT_COALESCE_INTERVAL = float(WEBSOCKET_EVENT_COALESCE_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_COALESCE_INTERVAL = 0.03
+
+# Background jobs (file and knowledge processing), "redis" shares the queue
+# between instances through REDIS_URL, anything else keeps it in-process
+JOB_QUEUE_MANAGER = os.environ.get("JOB_QUEUE_MANAGER", "")
+
+JOB_WORKERS = os.environ.get("JOB_WORKERS", "2")
+
+try:
+    JOB_WORKERS = int(JOB_WORKERS)
+except Exception:
+    JOB_WORKERS = 2
+
+# Seconds a running job may go without a heartbeat before it is handed back to
+# the queue, its worker is assumed to have died
+JOB_LEASE_TIMEOUT = os.environ.get("JOB_LEASE_TIMEOUT", "60")
+
+try:
+    JOB_LEASE_TIMEOUT = int(JOB_LEASE_TIMEOUT)
+except Exception:
+    JOB_LEASE_TIMEOUT = 60
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -438,6 +547,33 @@ else:
         AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = 10
 
 
+# Connections kept per upstream host by the shared client sessions, 0 for no limit
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "256"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 256
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+except Exception:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+
 AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA", "10"
 )
@@ -458,6 +594,63 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
 )
 
 
+####################################
+# MODEL REGISTRY
+####################################
+
+# Seconds after which the Ollama and OpenAI model lists are refreshed in the
+# background, requests keep being served the previous lists meanwhile
+MODELS_REFRESH_INTERVAL = os.environ.get("MODELS_REFRESH_INTERVAL", "10")
+
+try:
+    MODELS_REFRESH_INTERVAL = float(MODELS_REFRESH_INTERVAL)
+except Exception:
+    MODELS_REFRESH_INTERVAL = 10.0
+
+
+####################################
+# OLLAMA BALANCING
+####################################
+
+# least_in_flight, ewma_latency, weighted_round_robin or model_affinity
+OLLAMA_BALANCER_STRATEGY = os.environ.get("OLLAMA_BALANCER_STRATEGY", "model_affinity")
+
+# Requests a node may already be serving to be preferred for a model it has loaded
+OLLAMA_AFFINITY_MAX_IN_FLIGHT = os.environ.get("OLLAMA_AFFINITY_MAX_IN_FLIGHT", "4")
+
+try:
+    OLLAMA_AFFINITY_MAX_IN_FLIGHT = int(OLLAMA_AFFINITY_MAX_IN_FLIGHT)
+except Exception:
+    OLLAMA_AFFINITY_MAX_IN_FLIGHT = 4
+
+# Seconds between health checks of each Ollama node, 0 to disable
+OLLAMA_HEALTH_CHECK_INTERVAL = os.environ.get("OLLAMA_HEALTH_CHECK_INTERVAL", "15")
+
+try:
+    OLLAMA_HEALTH_CHECK_INTERVAL = float(OLLAMA_HEALTH_CHECK_INTERVAL)
+except Exception:
+    OLLAMA_HEALTH_CHECK_INTERVAL = 15.0
+
+# Consecutive failures after which a node is left out for the cooldown, in seconds
+OLLAMA_CIRCUIT_BREAKER_THRESHOLD = os.environ.get(
+    "OLLAMA_CIRCUIT_BREAKER_THRESHOLD", "3"
+)
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = int(OLLAMA_CIRCUIT_BREAKER_THRESHOLD)
+except Exception:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = 3
+
+OLLAMA_CIRCUIT_BREAKER_COOLDOWN = os.environ.get(
+    "OLLAMA_CIRCUIT_BREAKER_COOLDOWN", "30"
+)
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = float(OLLAMA_CIRCUIT_BREAKER_COOLDOWN)
+except Exception:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = 30.0
+
+
 ####################################
 # SENTENCE TRANSFORMERS
 ####################################
@@ -33,6 +33,7 @@ from open_webui.utils.plugin import (
     load_function_module_by_id,
     get_function_module_from_cache,
 )
+from open_webui.utils.function_snapshot import FUNCTION_SNAPSHOTS
 from open_webui.utils.tools import get_tools
 from open_webui.utils.access_control import has_access
 
@@ -66,11 +67,12 @@ def get_function_module_by_id(request: Request, pipe_id: str):
 
 
 async def get_function_models(request):
-    pipes = Functions.get_functions_by_type("pipe", active_only=True)
+    functions = FUNCTION_SNAPSHOTS.get(request)
+    pipes = functions.get_functions_by_type("pipe")
     pipe_models = []
 
     for pipe in pipes:
-        function_module = get_function_module_by_id(request, pipe.id)
+        function_module = functions.modules[pipe.id]
 
         # Check if function is a manifold
         if hasattr(function_module, "pipes"):
@@ -56,7 +56,6 @@ from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
-    periodic_usage_pool_cleanup,
     get_models_in_use,
     get_active_user_ids,
 )
@@ -77,6 +76,7 @@ from open_webui.routers import (
     groups,
     files,
     functions,
+    jobs,
     memories,
     models,
     knowledge,
@@ -418,6 +418,7 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    OLLAMA_HEALTH_CHECK_INTERVAL,
 )
 
 
@@ -433,7 +434,7 @@ from open_webui.utils.chat import (
 )
 from open_webui.utils.embeddings import generate_embeddings
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import has_access, user_group_ids_cache
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -441,8 +442,14 @@ from open_webui.utils.auth import (
     decode_token,
     get_admin_user,
     get_verified_user,
+    last_active_updater,
 )
 from open_webui.utils.plugin import install_tool_and_function_dependencies
+from open_webui.utils.jobs import JOB_MANAGER
+from open_webui.utils.http_sessions import HTTP_SESSIONS
+from open_webui.utils.balancer import OLLAMA_BALANCER
+from open_webui.utils.model_access import MODEL_ACCESS
+from open_webui.utils.model_registry import MODEL_REGISTRY
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
@@ -531,13 +538,33 @@ async def lifespan(app: FastAPI):
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
-    asyncio.create_task(periodic_usage_pool_cleanup())
+    app.state.last_active_updater_task = asyncio.create_task(last_active_updater.run())
+
+    JOB_MANAGER.start(app)
+
+    app.state.model_registry_task = asyncio.create_task(MODEL_REGISTRY.run(app))
+
+    if OLLAMA_HEALTH_CHECK_INTERVAL > 0:
+        app.state.ollama_health_check_task = asyncio.create_task(
+            OLLAMA_BALANCER.run(lambda: ollama.get_health_check_targets(app))
+        )
 
     yield
 
+    JOB_MANAGER.stop()
+
+    await HTTP_SESSIONS.close()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    app.state.last_active_updater_task.cancel()
+
+    app.state.model_registry_task.cancel()
+
+    if hasattr(app.state, "ollama_health_check_task"):
+        app.state.ollama_health_check_task.cancel()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1099,6 +1126,15 @@ async def check_url(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def cache_user_group_ids(request: Request, call_next):
+    token = user_group_ids_cache.set({})
+    try:
+        return await call_next(request)
+    finally:
+        user_group_ids_cache.reset(token)
+
+
 @app.middleware("http")
 async def inspect_websocket(request: Request, call_next):
     if (
@@ -1160,6 +1196,7 @@ app.include_router(memories.router, prefix="/api/v1/memories", tags=["memories"]
 app.include_router(folders.router, prefix="/api/v1/folders", tags=["folders"])
 app.include_router(groups.router, prefix="/api/v1/groups", tags=["groups"])
 app.include_router(files.router, prefix="/api/v1/files", tags=["files"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
 app.include_router(functions.router, prefix="/api/v1/functions", tags=["functions"])
 app.include_router(
     evaluations.router, prefix="/api/v1/evaluations", tags=["evaluations"]
@@ -1190,6 +1227,8 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
+        visible_model_ids = MODEL_ACCESS.get_visible_model_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -1203,12 +1242,8 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
+            if model["id"] in visible_model_ids:
+                filtered_models.append(model)
 
         return filtered_models
 
@@ -1331,6 +1366,7 @@ async def chat_completion(
             "chat_id": form_data.pop("chat_id", None),
             "message_id": form_data.pop("id", None),
             "session_id": form_data.pop("session_id", None),
+            "stream_delta": form_data.pop("stream_delta", False),
             "filter_ids": form_data.pop("filter_ids", []),
             "tool_ids": form_data.get("tool_ids", None),
             "tool_servers": form_data.pop("tool_servers", None),
@@ -1660,7 +1696,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,62 @@
+"""Add group_member table
+
+Revision ID: 1fa7d2c5efc1
+Revises: d31026856c01
+Create Date: 2025-06-04 03:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "1fa7d2c5efc1"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id", name="pk_group_id_user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Backfill one row per member from the `group.user_ids` JSON column
+    group_table = table(
+        "group",
+        sa.Column("id", sa.Text()),
+        sa.Column("user_ids", sa.JSON()),
+    )
+    group_member_table = table(
+        "group_member",
+        sa.Column("group_id", sa.Text()),
+        sa.Column("user_id", sa.Text()),
+        sa.Column("created_at", sa.BigInteger()),
+    )
+
+    connection = op.get_bind()
+    now = int(time.time())
+
+    rows = []
+    for group in connection.execute(select(group_table.c.id, group_table.c.user_ids)):
+        user_ids = group.user_ids if isinstance(group.user_ids, list) else []
+        for user_id in dict.fromkeys(user_ids):
+            if isinstance(user_id, str):
+                rows.append(
+                    {"group_id": group.id, "user_id": user_id, "created_at": now}
+                )
+
+    if rows:
+        connection.execute(group_member_table.insert(), rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
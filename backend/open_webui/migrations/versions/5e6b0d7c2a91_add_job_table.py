@@ -0,0 +1,43 @@
+"""Add job table
+
+Revision ID: 5e6b0d7c2a91
+Revises: 8b3f2a1c9d4e
+Create Date: 2025-06-06 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "5e6b0d7c2a91"
+down_revision = "8b3f2a1c9d4e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job",
+        sa.Column("id", sa.String(), nullable=False, primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("progress", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.Column("started_at", sa.BigInteger(), nullable=True),
+        sa.Column("finished_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index("job_user_id_idx", "job", ["user_id"])
+    op.create_index("job_status_idx", "job", ["status"])
+
+
+def downgrade():
+    op.drop_index("job_status_idx", table_name="job")
+    op.drop_index("job_user_id_idx", table_name="job")
+    op.drop_table("job")
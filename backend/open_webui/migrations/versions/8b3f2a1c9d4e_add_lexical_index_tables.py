@@ -0,0 +1,77 @@
+"""Add lexical index tables
+
+Revision ID: 8b3f2a1c9d4e
+Revises: 1fa7d2c5efc1
+Create Date: 2025-06-05 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "8b3f2a1c9d4e"
+down_revision = "1fa7d2c5efc1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Collections are indexed on their first hybrid search, nothing to backfill
+    op.create_table(
+        "lexical_collection",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("document_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_length", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+    )
+
+    op.create_table(
+        "lexical_document",
+        sa.Column("collection_name", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("file_id", sa.Text(), nullable=True),
+        sa.Column("hash", sa.Text(), nullable=True),
+        sa.Column("length", sa.BigInteger(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("collection_name", "id", name="pk_collection_name_id"),
+    )
+    op.create_index(
+        "lexical_document_file_id_idx",
+        "lexical_document",
+        ["collection_name", "file_id"],
+    )
+    op.create_index(
+        "lexical_document_hash_idx", "lexical_document", ["collection_name", "hash"]
+    )
+
+    op.create_table(
+        "lexical_posting",
+        sa.Column("collection_name", sa.Text(), nullable=False),
+        sa.Column("term", sa.Text(), nullable=False),
+        sa.Column("document_id", sa.Text(), nullable=False),
+        sa.Column("frequency", sa.Integer(), nullable=False),
+        sa.Column("length", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "collection_name",
+            "term",
+            "document_id",
+            name="pk_collection_name_term_document_id",
+        ),
+    )
+    op.create_index(
+        "lexical_posting_document_id_idx",
+        "lexical_posting",
+        ["collection_name", "document_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("lexical_posting_document_id_idx", table_name="lexical_posting")
+    op.drop_table("lexical_posting")
+
+    op.drop_index("lexical_document_hash_idx", table_name="lexical_document")
+    op.drop_index("lexical_document_file_id_idx", table_name="lexical_document")
+    op.drop_table("lexical_document")
+
+    op.drop_table("lexical_collection")
@@ -0,0 +1,28 @@
+"""Add vector collection alias table
+
+Revision ID: b7d41c0e93f2
+Revises: 5e6b0d7c2a91
+Create Date: 2025-06-07 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b7d41c0e93f2"
+down_revision = "5e6b0d7c2a91"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "vector_collection_alias",
+        sa.Column("name", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("target", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("vector_collection_alias")
@@ -0,0 +1,147 @@
+"""Add chat_message table
+
+Revision ID: d31026856c01
+Revises: 9f0c9cd09105
+Create Date: 2025-06-02 03:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, select
+
+revision = "d31026856c01"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id", name="pk_chat_id_id"),
+    )
+
+    op.add_column(
+        "chat",
+        sa.Column("current_message_id", sa.Text(), nullable=True),
+    )
+
+    # Backfill one row per message from the `chat.chat` JSON blob
+    chat_table = table(
+        "chat",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("chat", sa.JSON()),
+    )
+    chat_message_table = table(
+        "chat_message",
+        sa.Column("id", sa.Text()),
+        sa.Column("chat_id", sa.Text()),
+        sa.Column("data", sa.JSON()),
+        sa.Column("created_at", sa.BigInteger()),
+        sa.Column("updated_at", sa.BigInteger()),
+    )
+
+    connection = op.get_bind()
+    chat_ids = [
+        row.id for row in connection.execute(select(chat_table.c.id)).fetchall()
+    ]
+
+    for i in range(0, len(chat_ids), BATCH_SIZE):
+        results = connection.execute(
+            select(chat_table.c.id, chat_table.c.chat).where(
+                chat_table.c.id.in_(chat_ids[i : i + BATCH_SIZE])
+            )
+        )
+
+        now = time.time_ns()
+        rows = []
+        for row in results:
+            chat = row.chat if isinstance(row.chat, dict) else {}
+            messages = (chat.get("history") or {}).get("messages") or {}
+
+            for message_id, message in messages.items():
+                if not isinstance(message, dict):
+                    continue
+
+                rows.append(
+                    {
+                        "id": message_id,
+                        "chat_id": row.id,
+                        "data": message,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+
+        if rows:
+            connection.execute(chat_message_table.insert(), rows)
+
+
+def downgrade():
+    # Fold the per-message rows back into the `chat.chat` JSON blob
+    chat_table = table(
+        "chat",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("chat", sa.JSON()),
+        sa.Column("current_message_id", sa.Text()),
+    )
+    chat_message_table = table(
+        "chat_message",
+        sa.Column("id", sa.Text()),
+        sa.Column("chat_id", sa.Text()),
+        sa.Column("data", sa.JSON()),
+    )
+
+    connection = op.get_bind()
+    chat_ids = [
+        row.chat_id
+        for row in connection.execute(
+            select(chat_message_table.c.chat_id).distinct()
+        ).fetchall()
+    ]
+
+    for chat_id in chat_ids:
+        chat_row = connection.execute(
+            select(chat_table.c.chat, chat_table.c.current_message_id).where(
+                chat_table.c.id == chat_id
+            )
+        ).first()
+        if chat_row is None:
+            continue
+
+        messages = {
+            row.id: row.data
+            for row in connection.execute(
+                select(chat_message_table.c.id, chat_message_table.c.data).where(
+                    chat_message_table.c.chat_id == chat_id
+                )
+            )
+        }
+
+        chat = chat_row.chat if isinstance(chat_row.chat, dict) else {}
+        history = chat.get("history") or {}
+        history = {
+            **history,
+            "messages": {**(history.get("messages") or {}), **messages},
+        }
+        if chat_row.current_message_id:
+            history["currentId"] = chat_row.current_message_id
+
+        connection.execute(
+            sa.update(chat_table)
+            .where(chat_table.c.id == chat_id)
+            .values(chat={**chat, "history": history})
+        )
+
+    op.drop_column("chat", "current_message_id")
+    op.drop_table("chat_message")
@@ -0,0 +1,23 @@
+"""Add job heartbeat_at
+
+Revision ID: e4a7c19b2d5f
+Revises: b7d41c0e93f2
+Create Date: 2025-06-08 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e4a7c19b2d5f"
+down_revision = "b7d41c0e93f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("job", sa.Column("heartbeat_at", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("job", "heartbeat_at")
@@ -0,0 +1,27 @@
+"""Add vector collection retired table
+
+Revision ID: f2c8d61a4b07
+Revises: e4a7c19b2d5f
+Create Date: 2025-06-09 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f2c8d61a4b07"
+down_revision = "e4a7c19b2d5f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "vector_collection_retired",
+        sa.Column("name", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("retired_at", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("vector_collection_retired")
@@ -9,7 +9,15 @@ from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    String,
+    Text,
+    JSON,
+    PrimaryKeyConstraint,
+)
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -39,6 +47,23 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    # Set by single-message upserts, which no longer rewrite `chat.history`
+    current_message_id = Column(Text, nullable=True)
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    # Message ids are only unique within a chat (shared chats copy them)
+    id = Column(String)
+    chat_id = Column(String)
+    data = Column(JSON)
+
+    created_at = Column(BigInteger)  # timestamp in epoch (ns)
+    updated_at = Column(BigInteger)  # timestamp in epoch (ns)
+
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id", name="pk_chat_id_id"),)
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -105,6 +130,102 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    def _get_message_rows_by_chat_ids(
+        self, db, chat_ids: list[str]
+    ) -> dict[str, dict[str, dict]]:
+        message_rows = {}
+
+        # Chunked to stay below the bound parameter limits of the database
+        for i in range(0, len(chat_ids), 500):
+            for row in db.query(
+                ChatMessage.chat_id, ChatMessage.id, ChatMessage.data
+            ).filter(ChatMessage.chat_id.in_(chat_ids[i : i + 500])):
+                message_rows.setdefault(row.chat_id, {})[row.id] = row.data
+        return message_rows
+
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        """
+        Validates chat rows, overlaying the messages stored in `chat_message`
+        on top of the (possibly stale) `chat.history.messages` blob.
+        """
+        message_rows = self._get_message_rows_by_chat_ids(
+            db, [chat.id for chat in chats]
+        )
+
+        chat_models = []
+        for chat in chats:
+            chat_model = ChatModel.model_validate(chat)
+            messages = message_rows.get(chat.id)
+
+            if messages or chat.current_message_id:
+                history = chat_model.chat.get("history") or {}
+                history = {
+                    **history,
+                    "messages": {**(history.get("messages") or {}), **(messages or {})},
+                }
+                if chat.current_message_id:
+                    history["currentId"] = chat.current_message_id
+
+                chat_model.chat = {**chat_model.chat, "history": history}
+            chat_models.append(chat_model)
+        return chat_models
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        if chat is None:
+            raise ValueError("Chat not found")
+        return self._to_chat_models(db, [chat])[0]
+
+    def _sync_message_rows(self, db, chat_id: str, chat: dict) -> None:
+        """
+        Makes the `chat_message` rows of `chat_id` match the messages of
+        `chat`, only writing the rows that changed.
+        """
+        messages = ((chat or {}).get("history") or {}).get("messages") or {}
+        if not isinstance(messages, dict):
+            messages = {}
+
+        message_rows = self._get_message_rows_by_chat_ids(db, [chat_id]).get(
+            chat_id, {}
+        )
+
+        removed_ids = [id for id in message_rows if id not in messages]
+        if removed_ids:
+            db.query(ChatMessage).filter(
+                ChatMessage.chat_id == chat_id, ChatMessage.id.in_(removed_ids)
+            ).delete(synchronize_session=False)
+
+        now = time.time_ns()
+        for message_id, message in messages.items():
+            if message_id not in message_rows:
+                db.add(
+                    ChatMessage(
+                        id=message_id,
+                        chat_id=chat_id,
+                        data=message,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            elif message_rows[message_id] != message:
+                db.query(ChatMessage).filter_by(chat_id=chat_id, id=message_id).update(
+                    {"data": message, "updated_at": now}, synchronize_session=False
+                )
+
+    def _get_legacy_message(self, db, id: str, message_id: str) -> Optional[dict]:
+        # Fallback for messages that only exist in the `chat.chat` JSON blob
+        chat = db.query(Chat.chat).filter_by(id=id).first()
+        if chat is None:
+            return None
+
+        return (((chat.chat or {}).get("history") or {}).get("messages") or {}).get(
+            message_id, {}
+        )
+
+    def _delete_message_rows_by_chat_filter(self, db, *criteria) -> None:
+        db.query(ChatMessage).filter(
+            ChatMessage.chat_id.in_(select(Chat.id).filter(*criteria))
+        ).delete(synchronize_session=False)
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -125,6 +246,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._sync_message_rows(db, id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -154,6 +276,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._sync_message_rows(db, id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -164,7 +287,9 @@ class ChatTable:
                 chat_item = db.get(Chat, id)
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
+                chat_item.current_message_id = None
                 chat_item.updated_at = int(time.time())
+                self._sync_message_rows(db, id, chat)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -210,6 +335,11 @@ class ChatTable:
         return chat.chat.get("title", "New Chat")
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
+        with get_db() as db:
+            messages = self._get_message_rows_by_chat_ids(db, [id]).get(id)
+            if messages:
+                return messages
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -219,52 +349,93 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            message_item = db.get(ChatMessage, {"chat_id": id, "id": message_id})
+            if message_item:
+                return message_item.data
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+            return self._get_legacy_message(db, id, message_id)
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+    ) -> Optional[dict]:
+        """
+        Merges `message` into a single `chat_message` row and returns the
+        resulting message, without reading or rewriting the chat history.
+        """
+        try:
+            with get_db() as db:
+                result = (
+                    db.query(Chat)
+                    .filter_by(id=id)
+                    .update(
+                        {
+                            "current_message_id": message_id,
+                            "updated_at": int(time.time()),
+                        }
+                    )
+                )
+                if not result:
+                    return None
 
-        history["currentId"] = message_id
+                now = time.time_ns()
+                message_item = db.get(ChatMessage, {"chat_id": id, "id": message_id})
+                if message_item is None:
+                    message_item = ChatMessage(
+                        id=message_id,
+                        chat_id=id,
+                        data={
+                            **(self._get_legacy_message(db, id, message_id) or {}),
+                            **message,
+                        },
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    db.add(message_item)
+                else:
+                    message_item.data = {**message_item.data, **message}
+                    message_item.updated_at = now
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+                db.commit()
+                return message_item.data
+        except Exception as e:
+            log.exception(f"Error upserting message {message_id} of chat {id}: {e}")
+            return None
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+    ) -> Optional[dict]:
+        try:
+            with get_db() as db:
+                now = time.time_ns()
+                message_item = db.get(ChatMessage, {"chat_id": id, "id": message_id})
+                if message_item is None:
+                    message = self._get_legacy_message(db, id, message_id)
+                    if not message:
+                        return None
+
+                    message_item = ChatMessage(
+                        id=message_id,
+                        chat_id=id,
+                        data=message,
+                        created_at=now,
+                    )
+                    db.add(message_item)
+
+                message_item.data = {
+                    **message_item.data,
+                    "statusHistory": [
+                        *message_item.data.get("statusHistory", []),
+                        status,
+                    ],
+                }
+                message_item.updated_at = now
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+                db.commit()
+                return message_item.data
+        except Exception as e:
+            log.exception(f"Error adding status to message {message_id}: {e}")
+            return None
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -279,13 +450,14 @@ class ChatTable:
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(db, chat).chat,
                     "created_at": chat.created_at,
                     "updated_at": int(time.time()),
                 }
             )
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
+            self._sync_message_rows(db, shared_chat.id, shared_chat.chat)
             db.commit()
             db.refresh(shared_result)
 
@@ -310,7 +482,8 @@ class ChatTable:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
                 shared_chat.title = chat.title
-                shared_chat.chat = chat.chat
+                shared_chat.chat = self._to_chat_model(db, chat).chat
+                self._sync_message_rows(db, shared_chat.id, shared_chat.chat)
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
@@ -323,6 +496,9 @@ class ChatTable:
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_message_rows_by_chat_filter(
+                    db, Chat.user_id == f"shared-{chat_id}"
+                )
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -339,7 +515,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -351,7 +527,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -363,7 +539,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -411,6 +587,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
+            # Listed by title, the messages are not needed
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chat_list_by_user_id(
@@ -450,6 +627,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
+            # Listed by title, the messages are not needed
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chat_title_id_list_by_user_id(
@@ -501,13 +679,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -529,7 +707,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -540,7 +718,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -549,7 +727,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -558,7 +736,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -567,7 +745,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats.all())
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -628,6 +806,16 @@ class ChatTable:
                             )
                             """
                         )
+                        | text(
+                            """
+                            EXISTS (
+                                SELECT 1
+                                FROM chat_message
+                                WHERE chat_message.chat_id = chat.id
+                                AND LOWER(json_extract(chat_message.data, '$.content')) LIKE '%' || :search_text || '%'
+                            )
+                            """
+                        )
                     ).params(search_text=search_text)
                 )
 
@@ -677,6 +865,16 @@ class ChatTable:
                             )
                             """
                         )
+                        | text(
+                            """
+                            EXISTS (
+                                SELECT 1
+                                FROM chat_message
+                                WHERE chat_message.chat_id = chat.id
+                                AND LOWER(chat_message.data->>'content') LIKE '%' || :search_text || '%'
+                            )
+                            """
+                        )
                     ).params(search_text=search_text)
                 )
 
@@ -720,7 +918,7 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -733,6 +931,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
+            # Listed by title, the messages are not needed
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_folder_ids_and_user_id(
@@ -748,7 +947,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -761,7 +960,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -800,6 +999,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
+            # Listed by title, the messages are not needed
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
@@ -821,7 +1021,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -897,6 +1097,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -907,6 +1108,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
+                self._delete_message_rows_by_chat_filter(
+                    db, Chat.id == id, Chat.user_id == user_id
+                )
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
                 db.commit()
 
@@ -919,6 +1123,7 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                self._delete_message_rows_by_chat_filter(db, Chat.user_id == user_id)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -931,6 +1136,9 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                self._delete_message_rows_by_chat_filter(
+                    db, Chat.user_id == user_id, Chat.folder_id == folder_id
+                )
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -944,6 +1152,9 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                self._delete_message_rows_by_chat_filter(
+                    db, Chat.user_id.in_(shared_chat_ids)
+                )
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
@@ -5,6 +5,7 @@ from typing import Optional
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.versioned_cache import VersionCounter
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text
 
@@ -81,6 +82,9 @@ class FunctionValves(BaseModel):
 
 
 class FunctionsTable:
+    def __init__(self):
+        self.version = VersionCounter()
+
     def insert_new_function(
         self, user_id: str, type: str, form_data: FunctionForm
     ) -> Optional[FunctionModel]:
@@ -100,6 +104,7 @@ class FunctionsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.version.bump()
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -147,6 +152,7 @@ class FunctionsTable:
                         db.delete(func)
 
                 db.commit()
+                self.version.bump()
 
                 return [
                     FunctionModel.model_validate(func)
@@ -221,6 +227,16 @@ class FunctionsTable:
                 log.exception(f"Error getting function valves by id {id}: {e}")
                 return None
 
+    def get_active_function_valves(self) -> dict[str, dict]:
+        """The valves of every active function, by id."""
+        with get_db() as db:
+            return {
+                id: valves or {}
+                for id, valves in db.query(Function.id, Function.valves)
+                .filter_by(is_active=True)
+                .all()
+            }
+
     def update_function_valves_by_id(
         self, id: str, valves: dict
     ) -> Optional[FunctionValves]:
@@ -230,6 +246,7 @@ class FunctionsTable:
                 function.valves = valves
                 function.updated_at = int(time.time())
                 db.commit()
+                self.version.bump()
                 db.refresh(function)
                 return self.get_function_by_id(id)
             except Exception:
@@ -290,6 +307,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.version.bump()
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -304,6 +322,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.version.bump()
                 return True
             except Exception:
                 return None
@@ -313,6 +332,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                self.version.bump()
 
                 return True
             except Exception:
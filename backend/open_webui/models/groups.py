@@ -8,10 +8,18 @@ from open_webui.internal.db import Base, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.versioned_cache import VersionCounter
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    PrimaryKeyConstraint,
+    Text,
+    JSON,
+)
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +49,20 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    __tablename__ = "group_member"
+
+    group_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id", name="pk_group_id_user_id"),
+        Index("group_member_user_id_idx", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -88,6 +110,21 @@ class GroupUpdateForm(GroupForm):
 
 
 class GroupTable:
+    def __init__(self):
+        self.version = VersionCounter()
+
+    def _set_group_members(self, db, group_id: str, user_ids: list[str]):
+        # Keeps `group_member` in sync with the `group.user_ids` column
+        db.query(GroupMember).filter_by(group_id=group_id).delete()
+        db.add_all(
+            [
+                GroupMember(
+                    group_id=group_id, user_id=user_id, created_at=int(time.time())
+                )
+                for user_id in dict.fromkeys(user_ids or [])
+            ]
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -105,8 +142,10 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._set_group_members(db, group.id, group.user_ids)
                 db.commit()
                 db.refresh(result)
+                self.version.bump()
                 if result:
                     return GroupModel.model_validate(result)
                 else:
@@ -127,16 +166,21 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> list[str]:
+        with get_db() as db:
+            return [
+                group_id
+                for (group_id,) in db.query(GroupMember.group_id)
+                .filter(GroupMember.user_id == user_id)
+                .all()
+            ]
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -163,7 +207,10 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
                 db.commit()
+                self.version.bump()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -173,7 +220,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                self.version.bump()
                 return True
         except Exception:
             return False
@@ -182,7 +231,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                self.version.bump()
 
                 return True
             except Exception:
@@ -203,6 +254,10 @@ class GroupTable:
                     )
                     db.commit()
 
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                self.version.bump()
+
                 return True
             except Exception:
                 return False
@@ -257,6 +312,9 @@ class GroupTable:
                                 "updated_at": int(time.time()),
                             }
                         )
+                        db.query(GroupMember).filter_by(
+                            group_id=group.id, user_id=user_id
+                        ).delete()
 
                 # Add user to new groups
                 for group in groups:
@@ -268,8 +326,16 @@ class GroupTable:
                                 "updated_at": int(time.time()),
                             }
                         )
+                        db.add(
+                            GroupMember(
+                                group_id=group.id,
+                                user_id=user_id,
+                                created_at=int(time.time()),
+                            )
+                        )
 
                 db.commit()
+                self.version.bump()
                 return True
             except Exception as e:
                 log.exception(e)
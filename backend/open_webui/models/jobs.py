@@ -0,0 +1,277 @@
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Integer, JSON, String, Text, or_
+
+####################
+# Job DB Schema
+####################
+
+
+class Job(Base):
+    __tablename__ = "job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+
+    type = Column(String)
+    # pending, running, completed, failed or cancelled
+    status = Column(String)
+    priority = Column(Integer, default=0)
+
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    progress = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+    started_at = Column(BigInteger, nullable=True)
+    finished_at = Column(BigInteger, nullable=True)
+    # Refreshed by the worker running the job, see `requeue_stale_jobs`
+    heartbeat_at = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index("job_user_id_idx", "user_id"),
+        Index("job_status_idx", "status"),
+    )
+
+
+class JobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+    priority: int = 0
+
+    payload: Optional[dict] = None
+    result: Optional[dict] = None
+    progress: Optional[dict] = None
+    error: Optional[str] = None
+
+    attempts: int = 0
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
+    heartbeat_at: Optional[int] = None
+
+
+####################
+# Forms
+####################
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    progress: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: int
+    updated_at: int
+
+
+class JobTable:
+    def insert_new_job(
+        self,
+        user_id: str,
+        type: str,
+        payload: Optional[dict] = None,
+        priority: int = 0,
+    ) -> Optional[JobModel]:
+        with get_db() as db:
+            job = JobModel(
+                **{
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "type": type,
+                    "status": "pending",
+                    "priority": priority,
+                    "payload": payload,
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            result = Job(**job.model_dump())
+            db.add(result)
+            db.commit()
+            db.refresh(result)
+            return job if result else None
+
+    def get_job_by_id(self, id: str) -> Optional[JobModel]:
+        with get_db() as db:
+            job = db.get(Job, id)
+            return JobModel.model_validate(job) if job else None
+
+    def get_job_status_by_id(self, id: str) -> Optional[str]:
+        with get_db() as db:
+            return db.query(Job.status).filter_by(id=id).scalar()
+
+    def get_jobs_by_user_id(self, user_id: str, limit: int = 50) -> list[JobModel]:
+        with get_db() as db:
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job)
+                .filter_by(user_id=user_id)
+                .order_by(Job.created_at.desc())
+                .limit(limit)
+                .all()
+            ]
+
+    def get_jobs_by_status(self, status: str) -> list[JobModel]:
+        with get_db() as db:
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job).filter_by(status=status).all()
+            ]
+
+    def get_jobs_by_type(self, type: str, statuses: list[str]) -> list[JobModel]:
+        with get_db() as db:
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job)
+                .filter(Job.type == type, Job.status.in_(statuses))
+                .all()
+            ]
+
+    def _update_job_if_status(
+        self,
+        id: str,
+        statuses: list[str],
+        updates: dict,
+        attempt: Optional[int] = None,
+    ) -> Optional[JobModel]:
+        # A single conditional UPDATE, so two workers can't both claim a job
+        with get_db() as db:
+            query = db.query(Job).filter(Job.id == id, Job.status.in_(statuses))
+            if attempt is not None:
+                # Only the run that claimed `attempt`, not one cancelled since
+                query = query.filter(Job.attempts == attempt)
+
+            count = query.update(
+                {**updates, "updated_at": int(time.time())},
+                synchronize_session=False,
+            )
+            db.commit()
+            if not count:
+                return None
+            return JobModel.model_validate(db.get(Job, id))
+
+    def claim_job_by_id(self, id: str) -> Optional[JobModel]:
+        return self._update_job_if_status(
+            id,
+            ["pending"],
+            {
+                "status": "running",
+                "started_at": int(time.time()),
+                "heartbeat_at": int(time.time()),
+                "attempts": Job.attempts + 1,
+            },
+        )
+
+    def heartbeat_job_by_id(self, id: str, attempt: Optional[int] = None) -> bool:
+        return (
+            self._update_job_if_status(
+                id, ["running"], {"heartbeat_at": int(time.time())}, attempt=attempt
+            )
+            is not None
+        )
+
+    def update_job_progress_by_id(
+        self, id: str, progress: dict, attempt: Optional[int] = None
+    ) -> bool:
+        return (
+            self._update_job_if_status(
+                id,
+                ["running"],
+                {"progress": progress, "heartbeat_at": int(time.time())},
+                attempt=attempt,
+            )
+            is not None
+        )
+
+    def finish_job_by_id(
+        self,
+        id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        attempt: Optional[int] = None,
+    ) -> Optional[JobModel]:
+        return self._update_job_if_status(
+            id,
+            ["running"],
+            {
+                "status": status,
+                "result": result,
+                "error": error,
+                "finished_at": int(time.time()),
+            },
+            attempt=attempt,
+        )
+
+    def cancel_job_by_id(self, id: str) -> Optional[JobModel]:
+        return self._update_job_if_status(
+            id,
+            ["pending", "running"],
+            {"status": "cancelled", "finished_at": int(time.time())},
+        )
+
+    def retry_job_by_id(self, id: str) -> Optional[JobModel]:
+        return self._update_job_if_status(
+            id,
+            ["failed", "cancelled"],
+            {
+                "status": "pending",
+                "result": None,
+                "error": None,
+                "progress": None,
+                "started_at": None,
+                "finished_at": None,
+            },
+        )
+
+    def requeue_stale_jobs(self, heartbeat_before: int) -> list[JobModel]:
+        """
+        Hands running jobs without a heartbeat since `heartbeat_before` back
+        to the queue, their worker died. Their progress is kept, so resumable
+        jobs continue from their last checkpoint.
+        """
+        stale = (
+            Job.status == "running",
+            or_(Job.heartbeat_at < heartbeat_before, Job.heartbeat_at.is_(None)),
+        )
+        with get_db() as db:
+            ids = [id for (id,) in db.query(Job.id).filter(*stale).all()]
+            if not ids:
+                return []
+
+            # Conditional, so a job that heartbeated in the meantime is left alone
+            db.query(Job).filter(Job.id.in_(ids), *stale).update(
+                {"status": "pending", "updated_at": int(time.time())},
+                synchronize_session=False,
+            )
+            db.commit()
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job)
+                .filter(Job.id.in_(ids), Job.status == "pending")
+                .all()
+            ]
+
+
+Jobs = JobTable()
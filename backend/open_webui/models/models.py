@@ -16,6 +16,7 @@ from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
 
 
 from open_webui.utils.access_control import has_access
+from open_webui.utils.versioned_cache import VersionCounter
 
 
 log = logging.getLogger(__name__)
@@ -143,6 +144,9 @@ class ModelForm(BaseModel):
 
 
 class ModelsTable:
+    def __init__(self):
+        self.version = VersionCounter()
+
     def insert_new_model(
         self, form_data: ModelForm, user_id: str
     ) -> Optional[ModelModel]:
@@ -160,6 +164,7 @@ class ModelsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.version.bump()
 
                 if result:
                     return ModelModel.model_validate(result)
@@ -169,6 +174,16 @@ class ModelsTable:
             log.exception(f"Failed to insert a new model: {e}")
             return None
 
+    def get_model_access_controls(self) -> dict[str, tuple[str, Optional[dict]]]:
+        """The owner and access control of every model, by id."""
+        with get_db() as db:
+            return {
+                id: (user_id, access_control)
+                for id, user_id, access_control in db.query(
+                    Model.id, Model.user_id, Model.access_control
+                ).all()
+            }
+
     def get_all_models(self) -> list[ModelModel]:
         with get_db() as db:
             return [ModelModel.model_validate(model) for model in db.query(Model).all()]
@@ -226,6 +241,7 @@ class ModelsTable:
                     }
                 )
                 db.commit()
+                self.version.bump()
 
                 return self.get_model_by_id(id)
             except Exception:
@@ -241,6 +257,7 @@ class ModelsTable:
                     .update(model.model_dump(exclude={"id"}))
                 )
                 db.commit()
+                self.version.bump()
 
                 model = db.get(Model, id)
                 db.refresh(model)
@@ -254,6 +271,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).filter_by(id=id).delete()
                 db.commit()
+                self.version.bump()
 
                 return True
         except Exception:
@@ -264,6 +282,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).delete()
                 db.commit()
+                self.version.bump()
 
                 return True
         except Exception:
@@ -1,11 +1,15 @@
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import WEBUI_AUTH_USER_CACHE_SIZE, WEBUI_AUTH_USER_CACHE_TTL
 
 
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
+from open_webui.utils.versioned_cache import VersionCounter
 
 
 from pydantic import BaseModel, ConfigDict
@@ -102,7 +106,99 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+class UserCache:
+    """
+    Short-lived, process-local cache of users by id and API key, holding
+    at most `size` users; the least recently used are evicted first.
+
+    `UsersTable` invalidates entries on every write it makes to a user.
+    Writes from other replicas are picked up once `ttl` expires.
+    """
+
+    def __init__(
+        self,
+        ttl: float = WEBUI_AUTH_USER_CACHE_TTL,
+        size: int = WEBUI_AUTH_USER_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.size = size
+        self.lock = threading.Lock()
+        # id -> (expires at, user, the user's cached API keys)
+        self._users: OrderedDict[str, tuple[float, UserModel, set[str]]] = OrderedDict()
+        self._api_keys: dict[str, str] = {}
+        # Bumped on every invalidation, see `set`
+        self.generation = VersionCounter()
+
+    def _pop(self, id: str):
+        entry = self._users.pop(id, None)
+        if entry is not None:
+            for api_key in entry[2]:
+                self._api_keys.pop(api_key, None)
+
+    def get(self, id: str) -> Optional[UserModel]:
+        with self.lock:
+            entry = self._users.get(id)
+            if entry is None:
+                return None
+
+            expires_at, user, _ = entry
+            if expires_at < time.monotonic():
+                # Nothing was written, loads in flight are still current
+                self._pop(id)
+                return None
+            self._users.move_to_end(id)
+        # Callers may modify the model they get back
+        return user.model_copy()
+
+    def get_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        id = self._api_keys.get(api_key)
+        return self.get(id) if id else None
+
+    def set(
+        self,
+        user: UserModel,
+        api_key: Optional[str] = None,
+        generation: Optional[int] = None,
+    ):
+        """
+        Caches `user`, unless a user was invalidated since `generation` was
+        read: the row may have been loaded before that write committed.
+        """
+        with self.lock:
+            if self.ttl <= 0 or (
+                generation is not None and generation != self.generation.value
+            ):
+                return
+
+            entry = self._users.pop(user.id, None)
+            api_keys = entry[2] if entry is not None else set()
+            if api_key:
+                api_keys.add(api_key)
+                self._api_keys[api_key] = user.id
+
+            self._users[user.id] = (
+                time.monotonic() + self.ttl,
+                user.model_copy(),
+                api_keys,
+            )
+            while len(self._users) > max(self.size, 1):
+                self._pop(next(iter(self._users)))
+
+    def invalidate(self, id: str):
+        with self.lock:
+            self.generation.bump()
+            self._pop(id)
+
+    def clear(self):
+        with self.lock:
+            self._users.clear()
+            self._api_keys.clear()
+
+
 class UsersTable:
+    def __init__(self):
+        self.cache = UserCache()
+
     def insert_new_user(
         self,
         id: str,
@@ -143,6 +239,24 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        user = self.cache.get(id)
+        if user is None:
+            generation = self.cache.generation.value
+            user = self.get_user_by_id(id)
+            if user:
+                self.cache.set(user, generation=generation)
+        return user
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        user = self.cache.get_by_api_key(api_key)
+        if user is None:
+            generation = self.cache.generation.value
+            user = self.get_user_by_api_key(api_key)
+            if user:
+                self.cache.set(user, api_key=api_key, generation=generation)
+        return user
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -275,6 +389,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.cache.invalidate(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -289,6 +404,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -308,6 +424,24 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active_by_ids(
+        self, ids: list[str], last_active_at: Optional[int] = None
+    ) -> int:
+        if not ids:
+            return 0
+
+        with get_db() as db:
+            result = (
+                db.query(User)
+                .filter(User.id.in_(ids))
+                .update(
+                    {"last_active_at": last_active_at or int(time.time())},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return result
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -315,6 +449,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -326,6 +461,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -345,6 +481,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self.cache.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -363,6 +500,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    self.cache.invalidate(id)
 
                 return True
             else:
@@ -375,6 +513,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                self.cache.invalidate(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -0,0 +1,370 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from opentelemetry import metrics
+
+from open_webui.config import (
+    ENABLE_RAG_EMBEDDING_CACHE,
+    ENABLE_RAG_EMBEDDING_CACHE_REDIS,
+    RAG_EMBEDDING_CACHE_DIR,
+    RAG_EMBEDDING_CACHE_DISK_SIZE_MB,
+    RAG_EMBEDDING_CACHE_REDIS_TTL,
+    RAG_EMBEDDING_CACHE_SIZE,
+)
+from open_webui.env import (
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+meter = metrics.get_meter(__name__)
+
+hit_counter = meter.create_counter(
+    name="rag.embedding_cache.hits",
+    description="Embeddings served from the cache, by tier",
+    unit="1",
+)
+miss_counter = meter.create_counter(
+    name="rag.embedding_cache.misses",
+    description="Embeddings that had to be computed",
+    unit="1",
+)
+
+
+# Part of the Redis keys and the disk table, bumped when the encoding changes
+EMBEDDING_CACHE_VERSION = 2
+
+
+def get_embedding_cache_key(
+    engine: str,
+    model: str,
+    prefix: Optional[str],
+    text: str,
+    url: Optional[str] = None,
+) -> str:
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(
+        "\0".join(
+            [engine or "", url or "", model or "", prefix or "", text_hash]
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def encode_embedding(embedding: list[float]) -> bytes:
+    # float32 is what the vector DBs store anyway, at half the size
+    return array("f", embedding).tobytes()
+
+
+def decode_embedding(data: bytes) -> list[float]:
+    embedding = array("f")
+    embedding.frombytes(data)
+    return embedding.tolist()
+
+
+def get_redis_key(key: str) -> str:
+    return f"open-webui:embedding:v{EMBEDDING_CACHE_VERSION}:{key}"
+
+
+class DiskEmbeddingStore:
+    """
+    SQLite key/value store shared by every worker on the host. Once its
+    vectors take more than `max_size` bytes, the least recently used ones
+    are evicted down to 90% of it.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        os.makedirs(directory, exist_ok=True)
+        self.max_size = max_size
+        self.table = f"embedding_v{EMBEDDING_CACHE_VERSION}"
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "embeddings.db"),
+            timeout=30,
+            check_same_thread=False,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Written by previous versions
+        self.conn.execute("DROP TABLE IF EXISTS embedding")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, vector BLOB, accessed_at INTEGER)"
+        )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at_idx "
+            f"ON {self.table} (accessed_at)"
+        )
+        self.conn.commit()
+
+        # Other workers write too, so this is only an estimate between evictions
+        self.size = self.get_size()
+
+    def get_size(self) -> int:
+        return self.conn.execute(
+            f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM {self.table}"
+        ).fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        result = {}
+        with self.lock:
+            for idx in range(0, len(keys), 500):
+                batch = keys[idx : idx + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM {self.table} WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                result.update(rows)
+
+                if rows:
+                    self.conn.execute(
+                        f"UPDATE {self.table} SET accessed_at = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [int(time.time()), *[key for key, _ in rows]],
+                    )
+            self.conn.commit()
+        return result
+
+    def set_many(self, items: dict[str, bytes]):
+        now = int(time.time())
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, vector, accessed_at) VALUES (?, ?, ?)",
+                [(key, vector, now) for key, vector in items.items()],
+            )
+            self.conn.commit()
+
+            self.size += sum(len(vector) for vector in items.values())
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        self.size = self.get_size()
+        if self.size <= self.max_size:
+            return
+
+        count, total = self.conn.execute(
+            f"SELECT COUNT(*), SUM(LENGTH(vector)) FROM {self.table}"
+        ).fetchone()
+        excess = self.size - int(self.max_size * 0.9)
+        limit = -(-excess * count // total)
+
+        self.conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+            (limit,),
+        )
+        self.conn.commit()
+        self.size = self.get_size()
+        log.info(f"Evicted {limit} embeddings from the disk cache")
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings, checked in order: an in-memory
+    LRU, an optional SQLite store on disk and an optional Redis tier shared
+    across hosts. Hits from a slower tier are copied into the faster ones.
+    """
+
+    def __init__(
+        self,
+        size: int = RAG_EMBEDDING_CACHE_SIZE,
+        directory: Optional[str] = RAG_EMBEDDING_CACHE_DIR,
+        disk_size: int = RAG_EMBEDDING_CACHE_DISK_SIZE_MB * 1024 * 1024,
+        redis=None,
+        redis_ttl: int = RAG_EMBEDDING_CACHE_REDIS_TTL,
+    ):
+        self.size = size
+        self.lock = threading.Lock()
+        self.memory: OrderedDict[str, list[float]] = OrderedDict()
+
+        self.disk = None
+        if directory:
+            try:
+                self.disk = DiskEmbeddingStore(directory, disk_size)
+            except Exception as e:
+                log.warning(f"Embedding cache disk tier disabled: {e}")
+
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+
+        self.stats = {"memory": 0, "disk": 0, "redis": 0, "miss": 0}
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        hits = stats["memory"] + stats["disk"] + stats["redis"]
+        total = hits + stats["miss"]
+        return {
+            "hits": {tier: stats[tier] for tier in ("memory", "disk", "redis")},
+            "misses": stats["miss"],
+            "hit_rate": hits / total if total else 0.0,
+            "size": len(self.memory),
+        }
+
+    def record(self, tier: str, count: int):
+        if count:
+            with self.lock:
+                self.stats[tier] += count
+            if tier == "miss":
+                miss_counter.add(count)
+            else:
+                hit_counter.add(count, {"tier": tier})
+
+    def _set_memory(self, items: dict[str, list[float]]):
+        with self.lock:
+            for key, embedding in items.items():
+                self.memory[key] = embedding
+                self.memory.move_to_end(key)
+            while len(self.memory) > self.size:
+                self.memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        result = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    result[key] = self.memory[key]
+        self.record("memory", len(result))
+
+        for tier in ("disk", "redis"):
+            missing = [key for key in dict.fromkeys(keys) if key not in result]
+            if not missing:
+                break
+
+            try:
+                if tier == "disk" and self.disk is not None:
+                    found = self.disk.get_many(missing)
+                elif tier == "redis" and self.redis is not None:
+                    found = {
+                        key: value
+                        for key, value in zip(
+                            missing,
+                            self.redis.mget([get_redis_key(key) for key in missing]),
+                        )
+                        if value is not None
+                    }
+                else:
+                    continue
+            except Exception as e:
+                log.warning(f"Embedding cache {tier} tier lookup failed: {e}")
+                continue
+
+            found = {key: decode_embedding(value) for key, value in found.items()}
+            self.record(tier, len(found))
+            if found:
+                self._set_memory(found)
+                if tier == "redis" and self.disk is not None:
+                    self._set_disk(found)
+            result.update(found)
+
+        return result
+
+    def _set_disk(self, items: dict[str, list[float]]):
+        try:
+            self.disk.set_many(
+                {key: encode_embedding(value) for key, value in items.items()}
+            )
+        except Exception as e:
+            log.warning(f"Embedding cache disk tier write failed: {e}")
+
+    def set_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+
+        self._set_memory(items)
+        if self.disk is not None:
+            self._set_disk(items)
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                for key, embedding in items.items():
+                    pipe.set(
+                        get_redis_key(key),
+                        encode_embedding(embedding),
+                        ex=self.redis_ttl,
+                    )
+                pipe.execute()
+            except Exception as e:
+                log.warning(f"Embedding cache redis tier write failed: {e}")
+
+
+def get_cached_embedding_function(
+    cache: EmbeddingCache,
+    engine: str,
+    model: str,
+    embedding_function,
+    url: Optional[str] = None,
+):
+    """
+    Wraps an embedding function taking `(query, prefix=None, user=None)`,
+    where `query` is a string or a list of strings, so that only texts
+    missing from `cache` are passed on to it. `url` tells apart servers
+    serving models under the same name.
+    """
+
+    def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        keys = [
+            get_embedding_cache_key(engine, model, prefix, text, url=url)
+            for text in texts
+        ]
+
+        cached = cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+
+        if missing:
+            cache.record("miss", len(missing))
+
+            if isinstance(query, list):
+                embeddings = embedding_function(
+                    list(missing.values()), prefix=prefix, user=user
+                )
+            else:
+                embeddings = [embedding_function(query, prefix=prefix, user=user)]
+
+            if embeddings is None or any(embedding is None for embedding in embeddings):
+                # Failed requests are not cached
+                return None
+
+            if len(embeddings) != len(missing):
+                raise ValueError(
+                    f"Embedding engine returned {len(embeddings)} embeddings for {len(missing)} texts"
+                )
+
+            computed = dict(zip(missing.keys(), embeddings))
+            cache.set_many(computed)
+            cached = {**cached, **computed}
+
+        embeddings = [cached[key] for key in keys]
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
+EMBEDDING_CACHE = None
+if ENABLE_RAG_EMBEDDING_CACHE:
+    EMBEDDING_CACHE = EmbeddingCache(
+        redis=(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                decode_responses=False,
+            )
+            if ENABLE_RAG_EMBEDDING_CACHE_REDIS and REDIS_URL
+            else None
+        )
+    )
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import aiohttp
+
+from open_webui.config import (
+    RAG_EMBEDDING_CONCURRENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
+    RAG_EMBEDDING_QUERY_CONCURRENCY,
+)
+from open_webui.env import (
+    AIOHTTP_CLIENT_SESSION_SSL,
+    AIOHTTP_CLIENT_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Error messages providers return when a batch exceeds their input limits
+BATCH_TOO_LARGE_MESSAGES = [
+    "too large",
+    "too long",
+    "too many",
+    "maximum context",
+    "context length",
+    "max_tokens",
+]
+
+
+# Successful batches at a reduced size before trying one text more
+BATCH_SIZE_GROWTH_INTERVAL = 10
+
+
+class EmbeddingRequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class EmbeddingBatchTooLargeError(EmbeddingRequestError):
+    pass
+
+
+def get_retry_after(value: Optional[str], attempt: int) -> float:
+    """Seconds to wait before retrying, from a `Retry-After` header if any."""
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            pass
+    return float(min(2**attempt, 30))
+
+
+class EmbeddingClient:
+    """
+    Sends embedding requests over a pooled `aiohttp` session owned by a
+    background event loop, so that both the synchronous ingestion path and
+    async callers share connections. Background requests (ingestion) are
+    limited to `concurrency` in flight, others (queries) have their own
+    `query_concurrency` slots so they never queue behind a large upload.
+
+    Texts are split into batches that are sent concurrently and reassembled
+    in input order. 429 and 503 responses are retried after `Retry-After`
+    (or an exponential backoff), and batches a provider rejects as too large
+    are split in half; the smaller size is remembered per endpoint and grown
+    back by one text after every `BATCH_SIZE_GROWTH_INTERVAL` successful
+    requests at that size.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = RAG_EMBEDDING_CONCURRENCY,
+        query_concurrency: int = RAG_EMBEDDING_QUERY_CONCURRENCY,
+        max_retries: int = RAG_EMBEDDING_MAX_RETRIES,
+        timeout: Optional[int] = AIOHTTP_CLIENT_TIMEOUT,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.query_concurrency = max(query_concurrency, 1)
+        self.max_retries = max(max_retries, 0)
+        self.timeout = timeout
+
+        self.batch_sizes: dict[str, int] = {}
+        self._batch_successes: dict[str, int] = {}
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._query_semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="embedding-client", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Only called from the client's own loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.concurrency + self.query_concurrency
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True,
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._query_semaphore = asyncio.Semaphore(self.query_concurrency)
+        return self._session
+
+    def close(self):
+        if self._loop is None:
+            return
+
+        async def close_session():
+            if self._session is not None:
+                await self._session.close()
+
+        asyncio.run_coroutine_threadsafe(close_session(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._session = None
+
+    async def _post(
+        self, url: str, headers: dict, payload: dict, background: bool
+    ) -> dict:
+        session = self._get_session()
+        semaphore = self._semaphore if background else self._query_semaphore
+
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                async with session.post(
+                    url, headers=headers, json=payload, ssl=AIOHTTP_CLIENT_SESSION_SSL
+                ) as r:
+                    if r.status < 400:
+                        return await r.json(content_type=None)
+
+                    message = await r.text()
+                    if r.status in (429, 503) and attempt < self.max_retries:
+                        delay = get_retry_after(r.headers.get("Retry-After"), attempt)
+                        log.warning(
+                            f"Embedding request to {url} got {r.status}, retrying in {delay}s"
+                        )
+                    elif r.status == 413 or (
+                        r.status in (400, 500)
+                        and any(
+                            text in message.lower() for text in BATCH_TOO_LARGE_MESSAGES
+                        )
+                    ):
+                        raise EmbeddingBatchTooLargeError(r.status, message)
+                    else:
+                        raise EmbeddingRequestError(r.status, message)
+
+            # Wait outside the semaphore so other batches keep flowing
+            await asyncio.sleep(delay)
+
+    async def _embed_batch(
+        self,
+        url: str,
+        headers: dict,
+        texts: list[str],
+        payload: Callable[[list[str]], dict],
+        parse: Callable[[dict], list],
+        batch_size: int,
+        background: bool,
+    ) -> list:
+        try:
+            embeddings = parse(
+                await self._post(url, headers, payload(texts), background)
+            )
+        except EmbeddingBatchTooLargeError:
+            if len(texts) == 1:
+                raise
+
+            half = len(texts) // 2
+            self.batch_sizes[url] = min(self.batch_sizes.get(url, half), half)
+            self._batch_successes[url] = 0
+            log.info(f"Embedding batch too large for {url}, retrying in halves")
+
+            left, right = await asyncio.gather(
+                self._embed_batch(
+                    url, headers, texts[:half], payload, parse, batch_size, background
+                ),
+                self._embed_batch(
+                    url, headers, texts[half:], payload, parse, batch_size, background
+                ),
+            )
+            return left + right
+
+        if len(embeddings) != len(texts):
+            raise EmbeddingRequestError(
+                200, f"expected {len(texts)} embeddings, got {len(embeddings)}"
+            )
+
+        if url in self.batch_sizes and len(texts) >= self.batch_sizes[url]:
+            self._batch_successes[url] = self._batch_successes.get(url, 0) + 1
+            if self._batch_successes[url] >= BATCH_SIZE_GROWTH_INTERVAL:
+                self.batch_sizes[url] = min(self.batch_sizes[url] + 1, batch_size)
+                self._batch_successes[url] = 0
+        return embeddings
+
+    async def aembed(
+        self,
+        url: str,
+        headers: dict,
+        texts: list[str],
+        payload: Callable[[list[str]], dict],
+        parse: Callable[[dict], list],
+        batch_size: Optional[int] = None,
+        background: bool = False,
+    ) -> list:
+        """
+        Embeds `texts` with requests built by `payload(batch)`, returning the
+        embeddings `parse(response)` extracts, in the order of `texts`. Pass
+        `background` for ingestion, so it leaves the query slots free.
+
+        Must run on the client's loop, use `embed()` from anywhere else.
+        """
+        batch_size = max(batch_size or len(texts), 1)
+        size = min(batch_size, self.batch_sizes.get(url, batch_size))
+
+        results = await asyncio.gather(
+            *[
+                self._embed_batch(
+                    url,
+                    headers,
+                    texts[idx : idx + size],
+                    payload,
+                    parse,
+                    batch_size,
+                    background,
+                )
+                for idx in range(0, len(texts), size)
+            ]
+        )
+        return [embedding for result in results for embedding in result]
+
+    def embed(
+        self,
+        url: str,
+        headers: dict,
+        texts: list[str],
+        payload: Callable[[list[str]], dict],
+        parse: Callable[[dict], list],
+        batch_size: Optional[int] = None,
+        background: bool = False,
+    ) -> list:
+        """Blocking version of `aembed()`, safe to call from any thread."""
+        if not texts:
+            return []
+
+        return asyncio.run_coroutine_threadsafe(
+            self.aembed(url, headers, texts, payload, parse, batch_size, background),
+            self._get_loop(),
+        ).result()
+
+
+EMBEDDING_CLIENT = EmbeddingClient()
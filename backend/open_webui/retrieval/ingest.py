@@ -0,0 +1,93 @@
+import logging
+import queue
+import threading
+from typing import Callable, Iterable, Optional
+
+from open_webui.config import RAG_INGEST_BATCH_SIZE, RAG_INGEST_QUEUE_SIZE
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def ingest_chunks(
+    chunks: Iterable,
+    embed: Callable[[list], list],
+    write: Callable[[int, list, list], None],
+    batch_size: int = RAG_INGEST_BATCH_SIZE,
+    queue_size: int = RAG_INGEST_QUEUE_SIZE,
+    skip: int = 0,
+    progress: Optional[Callable[[str, dict], None]] = None,
+) -> int:
+    """
+    Embeds and writes `chunks` in batches of `batch_size` while they are
+    still being produced, so only a few batches are held in memory at once.
+
+    `embed(batch)` returns the vectors of a batch and runs on the calling
+    thread. `write(start, batch, vectors)` runs on a writer thread, in order,
+    with `start` the index of the batch's first chunk. At most `queue_size`
+    embedded batches wait for the writer; beyond that, reading `chunks`
+    blocks until the writer catches up. The first `skip` chunks (already
+    written by an earlier, interrupted run) are read but not embedded.
+
+    `progress(stage, counts)` is called on the calling thread after each
+    stage ("embed", then "done") with the `chunks` read and the chunks
+    `embedded` and `written` so far. Returns the number of chunks read.
+    """
+    counts = {"chunks": 0, "embedded": skip, "written": skip}
+    pending = queue.Queue(maxsize=max(queue_size, 1))
+    errors = []
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if errors:
+                # Keep draining so the producer never blocks on a dead writer
+                continue
+
+            start, batch, vectors = item
+            try:
+                write(start, batch, vectors)
+                counts["written"] = start + len(batch)
+            except Exception as e:
+                errors.append(e)
+
+    def flush(start, batch):
+        if errors:
+            raise errors[0]
+
+        vectors = embed(batch)
+        counts["embedded"] = start + len(batch)
+        if progress:
+            progress("embed", dict(counts))
+        pending.put((start, batch, vectors))
+
+    thread = threading.Thread(target=writer, name="ingest-writer", daemon=True)
+    thread.start()
+
+    try:
+        batch = []
+        for idx, chunk in enumerate(chunks):
+            counts["chunks"] = idx + 1
+            if idx < skip:
+                continue
+
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                flush(idx + 1 - len(batch), batch)
+                batch = []
+
+        if batch:
+            flush(counts["chunks"] - len(batch), batch)
+    finally:
+        pending.put(None)
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    if progress:
+        progress("done", dict(counts))
+    return counts["chunks"]
@@ -0,0 +1,593 @@
+import heapq
+import logging
+import math
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorItem,
+)
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    Text,
+    JSON,
+    insert,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Okapi BM25 parameters, the `rank_bm25` defaults used by `BM25Retriever`
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Longer tokens (base64, URLs, ...) are truncated so they fit in an index key
+MAX_TERM_LENGTH = 128
+
+# Keeps `IN (...)` clauses and multi-row inserts within database limits
+BATCH_SIZE = 500
+
+
+####################
+# Lexical Index DB Schema
+####################
+
+
+class LexicalCollection(Base):
+    __tablename__ = "lexical_collection"
+
+    name = Column(Text, primary_key=True)
+
+    document_count = Column(BigInteger, nullable=False)
+    total_length = Column(BigInteger, nullable=False)
+
+    created_at = Column(BigInteger)
+
+
+class LexicalDocument(Base):
+    __tablename__ = "lexical_document"
+
+    collection_name = Column(Text, nullable=False)
+    id = Column(Text, nullable=False)
+
+    file_id = Column(Text, nullable=True)
+    hash = Column(Text, nullable=True)
+
+    length = Column(BigInteger, nullable=False)
+    text = Column(Text)
+    meta = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("collection_name", "id", name="pk_collection_name_id"),
+        Index("lexical_document_file_id_idx", "collection_name", "file_id"),
+        Index("lexical_document_hash_idx", "collection_name", "hash"),
+    )
+
+
+class LexicalPosting(Base):
+    __tablename__ = "lexical_posting"
+
+    collection_name = Column(Text, nullable=False)
+    term = Column(Text, nullable=False)
+    document_id = Column(Text, nullable=False)
+
+    frequency = Column(Integer, nullable=False)
+    # Copy of the document length so scoring never needs a join
+    length = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "collection_name",
+            "term",
+            "document_id",
+            name="pk_collection_name_term_document_id",
+        ),
+        Index("lexical_posting_document_id_idx", "collection_name", "document_id"),
+    )
+
+
+def tokenize(text: str) -> list[str]:
+    # Same whitespace tokenization as `BM25Retriever`'s default preprocessing
+    return [term[:MAX_TERM_LENGTH] for term in (text or "").split()]
+
+
+def batched(items: list, size: int = BATCH_SIZE):
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+class LexicalIndex:
+    """
+    Inverted BM25 index over vector DB collections, persisted in the main
+    database so hybrid search no longer rebuilds `BM25Retriever` from the
+    full collection on every query.
+
+    Scores follow Okapi BM25 with a non-negative IDF,
+    `log(1 + (N - n + 0.5) / (n + 0.5))`, so terms present in most chunks
+    still rank documents the same way instead of being floored.
+    """
+
+    def has_collection(self, collection_name: str) -> bool:
+        with get_db() as db:
+            return db.get(LexicalCollection, collection_name) is not None
+
+    def index_collection(self, collection_name: str, result: GetResult):
+        """
+        Brings the index of an existing collection in line with its full
+        contents, `result`, indexing it if it isn't yet.
+        """
+        ids = (result.ids or [[]])[0]
+        items = [
+            {"id": id, "text": text, "metadata": metadata}
+            for id, text, metadata in zip(
+                ids,
+                (result.documents or [[]])[0],
+                (result.metadatas or [[]])[0],
+            )
+        ]
+
+        with get_db() as db:
+            indexed = {
+                id
+                for (id,) in db.query(LexicalDocument.id).filter_by(
+                    collection_name=collection_name
+                )
+            }
+            self._add_collection(db, collection_name)
+            self._add_documents(
+                db,
+                collection_name,
+                [item for item in items if item["id"] not in indexed],
+            )
+            db.commit()
+
+        self.delete(collection_name, ids=list(indexed - set(ids)))
+
+    def insert(self, collection_name: str, items: List[Union[VectorItem, dict]]):
+        with get_db() as db:
+            self._add_collection(db, collection_name)
+
+            # Already there if a backfill read the collection after the write
+            indexed = set()
+            for batch in batched([self._get_id(item) for item in items]):
+                indexed.update(
+                    id
+                    for (id,) in db.query(LexicalDocument.id).filter(
+                        LexicalDocument.collection_name == collection_name,
+                        LexicalDocument.id.in_(batch),
+                    )
+                )
+            self._add_documents(
+                db,
+                collection_name,
+                [item for item in items if self._get_id(item) not in indexed],
+            )
+            db.commit()
+
+    def upsert(self, collection_name: str, items: List[Union[VectorItem, dict]]):
+        items = [
+            item.model_dump() if isinstance(item, VectorItem) else item
+            for item in items
+        ]
+        self.delete(collection_name, ids=[item["id"] for item in items])
+        self.insert(collection_name, items)
+
+    @staticmethod
+    def _get_id(item: Union[VectorItem, dict]) -> str:
+        return item.id if isinstance(item, VectorItem) else item["id"]
+
+    def _add_collection(self, db, collection_name: str):
+        if db.get(LexicalCollection, collection_name) is None:
+            db.add(
+                LexicalCollection(
+                    name=collection_name,
+                    document_count=0,
+                    total_length=0,
+                    created_at=int(time.time()),
+                )
+            )
+            db.flush()
+
+    def _add_documents(
+        self, db, collection_name: str, items: List[Union[VectorItem, dict]]
+    ):
+        documents = []
+        postings = []
+        for item in items:
+            if isinstance(item, VectorItem):
+                item = item.model_dump()
+
+            terms = tokenize(item["text"])
+            metadata = item.get("metadata") or {}
+
+            documents.append(
+                {
+                    "collection_name": collection_name,
+                    "id": item["id"],
+                    "file_id": metadata.get("file_id"),
+                    "hash": metadata.get("hash"),
+                    "length": len(terms),
+                    "text": item["text"],
+                    "meta": metadata,
+                }
+            )
+            postings.extend(
+                {
+                    "collection_name": collection_name,
+                    "term": term,
+                    "document_id": item["id"],
+                    "frequency": frequency,
+                    "length": len(terms),
+                }
+                for term, frequency in Counter(terms).items()
+            )
+
+        for batch in batched(documents):
+            db.execute(insert(LexicalDocument), batch)
+        for batch in batched(postings):
+            db.execute(insert(LexicalPosting), batch)
+
+        db.query(LexicalCollection).filter_by(name=collection_name).update(
+            {
+                "document_count": LexicalCollection.document_count + len(documents),
+                "total_length": LexicalCollection.total_length
+                + sum(document["length"] for document in documents),
+            }
+        )
+
+    def _get_documents(
+        self,
+        db,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> list[tuple[str, int, Optional[dict]]]:
+        """(id, length, metadata) of the documents matching `ids` and `filter`."""
+        query = db.query(
+            LexicalDocument.id, LexicalDocument.length, LexicalDocument.meta
+        ).filter_by(collection_name=collection_name)
+
+        # `file_id` and `hash` are indexed columns, anything else is
+        # matched against the stored metadata
+        meta_filter = {}
+        for key, value in (filter or {}).items():
+            if key in ("file_id", "hash"):
+                query = query.filter(getattr(LexicalDocument, key) == value)
+            else:
+                meta_filter[key] = value
+
+        rows = []
+        if ids:
+            for batch in batched(ids):
+                rows.extend(query.filter(LexicalDocument.id.in_(batch)).all())
+        else:
+            rows = query.all()
+
+        return [
+            (id, length, meta)
+            for id, length, meta in rows
+            if all((meta or {}).get(k) == v for k, v in meta_filter.items())
+        ]
+
+    def update_metadata(self, collection_name: str, filter: Dict, metadata: Dict):
+        """Merges `metadata` into the metadata of the documents matching `filter`."""
+        with get_db() as db:
+            for id, _, meta in self._get_documents(db, collection_name, filter=filter):
+                meta = {**(meta or {}), **metadata}
+                db.query(LexicalDocument).filter_by(
+                    collection_name=collection_name, id=id
+                ).update(
+                    {
+                        "meta": meta,
+                        "file_id": meta.get("file_id"),
+                        "hash": meta.get("hash"),
+                    },
+                    synchronize_session=False,
+                )
+            db.commit()
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ):
+        if not ids and not filter:
+            return
+
+        with get_db() as db:
+            documents = [
+                (id, length)
+                for id, length, _ in self._get_documents(
+                    db, collection_name, ids, filter
+                )
+            ]
+            if not documents:
+                return
+
+            for batch in batched([id for id, _ in documents]):
+                db.query(LexicalPosting).filter(
+                    LexicalPosting.collection_name == collection_name,
+                    LexicalPosting.document_id.in_(batch),
+                ).delete(synchronize_session=False)
+                db.query(LexicalDocument).filter(
+                    LexicalDocument.collection_name == collection_name,
+                    LexicalDocument.id.in_(batch),
+                ).delete(synchronize_session=False)
+
+            db.query(LexicalCollection).filter_by(name=collection_name).update(
+                {
+                    "document_count": LexicalCollection.document_count - len(documents),
+                    "total_length": LexicalCollection.total_length
+                    - sum(length for _, length in documents),
+                }
+            )
+            db.commit()
+
+    def delete_collection(self, collection_name: str):
+        with get_db() as db:
+            db.query(LexicalPosting).filter_by(collection_name=collection_name).delete()
+            db.query(LexicalDocument).filter_by(
+                collection_name=collection_name
+            ).delete()
+            db.query(LexicalCollection).filter_by(name=collection_name).delete()
+            db.commit()
+
+    def replace_collection(self, collection_name: str, source: str):
+        """Replaces the index of `collection_name` with the index of `source`."""
+        with get_db() as db:
+            db.query(LexicalPosting).filter_by(collection_name=collection_name).delete()
+            db.query(LexicalDocument).filter_by(
+                collection_name=collection_name
+            ).delete()
+            db.query(LexicalCollection).filter_by(name=collection_name).delete()
+
+            for model in (LexicalPosting, LexicalDocument):
+                db.query(model).filter_by(collection_name=source).update(
+                    {"collection_name": collection_name}, synchronize_session=False
+                )
+            db.query(LexicalCollection).filter_by(name=source).update(
+                {"name": collection_name}, synchronize_session=False
+            )
+            db.commit()
+
+    def reset(self):
+        with get_db() as db:
+            db.query(LexicalPosting).delete()
+            db.query(LexicalDocument).delete()
+            db.query(LexicalCollection).delete()
+            db.commit()
+
+    def search(
+        self, collection_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        query_terms = Counter(tokenize(query))
+
+        with get_db() as db:
+            collection = db.get(LexicalCollection, collection_name)
+            if collection is None:
+                return None
+
+            scores: dict[str, float] = {}
+            if collection.document_count > 0 and query_terms:
+                document_count = collection.document_count
+                average_length = collection.total_length / document_count
+
+                postings: dict[str, list[tuple[str, int, int]]] = {}
+                for batch in batched(list(query_terms)):
+                    for term, document_id, frequency, length in db.query(
+                        LexicalPosting.term,
+                        LexicalPosting.document_id,
+                        LexicalPosting.frequency,
+                        LexicalPosting.length,
+                    ).filter(
+                        LexicalPosting.collection_name == collection_name,
+                        LexicalPosting.term.in_(batch),
+                    ):
+                        postings.setdefault(term, []).append(
+                            (document_id, frequency, length)
+                        )
+
+                for term, term_postings in postings.items():
+                    idf = math.log(
+                        1
+                        + (document_count - len(term_postings) + 0.5)
+                        / (len(term_postings) + 0.5)
+                    )
+                    weight = idf * query_terms[term]
+                    for document_id, frequency, length in term_postings:
+                        norm = BM25_K1 * (
+                            1 - BM25_B + BM25_B * length / max(average_length, 1)
+                        )
+                        scores[document_id] = scores.get(document_id, 0.0) + weight * (
+                            frequency * (BM25_K1 + 1) / (frequency + norm)
+                        )
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
+
+            documents = {
+                document.id: document
+                for document in db.query(LexicalDocument).filter(
+                    LexicalDocument.collection_name == collection_name,
+                    LexicalDocument.id.in_([id for id, _ in top]),
+                )
+            }
+
+            top = [(id, score) for id, score in top if id in documents]
+            return SearchResult(
+                ids=[[id for id, _ in top]],
+                documents=[[documents[id].text for id, _ in top]],
+                metadatas=[[documents[id].meta for id, _ in top]],
+                distances=[[score for _, score in top]],
+            )
+
+
+LEXICAL_INDEX = LexicalIndex()
+
+
+class LexicalIndexedVectorDB(VectorDBBase):
+    """
+    Wraps a vector DB client and keeps `LEXICAL_INDEX` in step with every
+    write, so collections stay searchable lexically without a full scan.
+
+    New collections are indexed when `index_new_collections()` is true, i.e.
+    while hybrid search is enabled. Collections that existed before the
+    index, or while it was off, are left alone on write and backfilled on
+    their first hybrid search instead, see `backfill`. Writes
+    check whether the collection is indexed after writing to the vector DB,
+    so a backfill running concurrently either reads their items or they
+    index them themselves. Failures to maintain the index never fail the
+    vector DB write; the collection's index is dropped so that it is rebuilt
+    from the vector DB on next use.
+    """
+
+    def __init__(
+        self,
+        client: VectorDBBase,
+        index: LexicalIndex = LEXICAL_INDEX,
+        index_new_collections: Callable[[], bool] = lambda: True,
+    ):
+        self.client = client
+        self.index = index
+        self.index_new_collections = index_new_collections
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _is_indexed(self, collection_name: str) -> bool:
+        try:
+            return self.index.has_collection(collection_name)
+        except Exception as e:
+            log.exception(f"Error checking lexical index {collection_name}: {e}")
+            return False
+
+    def _update_index(self, collection_name: str, func, *args, **kwargs):
+        try:
+            func(collection_name, *args, **kwargs)
+        except Exception as e:
+            log.exception(f"Error updating lexical index {collection_name}: {e}")
+            try:
+                self.index.delete_collection(collection_name)
+            except Exception as e:
+                log.exception(f"Error dropping lexical index {collection_name}: {e}")
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name)
+
+    def backfill(self, collection_name: str) -> bool:
+        """
+        Indexes a collection that predates the index, returning whether it is
+        indexed.
+        """
+        if self.index.has_collection(collection_name):
+            return True
+        if not self.client.has_collection(collection_name):
+            return False
+
+        log.info(f"Indexing collection {collection_name}")
+        # The second pass picks up writes that checked the index before the
+        # first one committed, writes after it see the index
+        for _ in range(2):
+            result = self.client.get(collection_name)
+            if result is None:
+                return False
+            self.index.index_collection(collection_name, result)
+        return True
+
+    def swap_collection(self, collection_name: str, source: str) -> None:
+        result = self.client.swap_collection(collection_name, source)
+        self._update_index(collection_name, self.index.replace_collection, source)
+        return result
+
+    def delete_collection(self, collection_name: str) -> None:
+        result = self.client.delete_collection(collection_name)
+        self._update_index(collection_name, self.index.delete_collection)
+        return result
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        created = not self.client.has_collection(collection_name)
+        result = self.client.insert(collection_name, items)
+        if (created and self.index_new_collections()) or self._is_indexed(
+            collection_name
+        ):
+            self._update_index(collection_name, self.index.insert, items)
+        return result
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        created = not self.client.has_collection(collection_name)
+        result = self.client.upsert(collection_name, items)
+        if (created and self.index_new_collections()) or self._is_indexed(
+            collection_name
+        ):
+            self._update_index(collection_name, self.index.upsert, items)
+        return result
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> Optional[SearchResult]:
+        return self.client.search(
+            collection_name, vectors, limit, include_vectors=include_vectors
+        )
+
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> Dict[str, Optional[SearchResult]]:
+        return self.client.search_many(
+            collection_names, vectors, limit, include_vectors=include_vectors
+        )
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(collection_name, filter, limit)
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name)
+
+    def update_metadata(
+        self, collection_name: str, filter: Dict, metadata: Dict
+    ) -> None:
+        result = self.client.update_metadata(collection_name, filter, metadata)
+        if self._is_indexed(collection_name):
+            self._update_index(
+                collection_name, self.index.update_metadata, filter, metadata
+            )
+        return result
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        result = self.client.delete(collection_name, ids=ids, filter=filter)
+        if self._is_indexed(collection_name):
+            self._update_index(collection_name, self.index.delete, ids, filter)
+        return result
+
+    def reset(self) -> None:
+        result = self.client.reset()
+        try:
+            self.index.reset()
+        except Exception as e:
+            log.exception(f"Error resetting lexical index: {e}")
+        return result
@@ -2,7 +2,6 @@ import logging
 import os
 from typing import Optional, Union
 
-import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
 import time
@@ -12,13 +11,20 @@ from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriev
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
-from open_webui.config import VECTOR_DB
+from open_webui.config import VECTOR_DB, ENABLE_RAG_LEXICAL_INDEX
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.lexical import LEXICAL_INDEX
+from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT
+from open_webui.retrieval.embedding_cache import (
+    EMBEDDING_CACHE,
+    get_cached_embedding_function,
+)
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.utils import cosine_similarity
 
 
 from open_webui.env import (
@@ -46,6 +52,8 @@ class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
     top_k: int
+    # Filled with the stored vector of each match, keyed by chunk id
+    stored_vectors: Any = None
 
     def _get_relevant_documents(
         self,
@@ -57,16 +65,23 @@ class VectorSearchRetriever(BaseRetriever):
             collection_name=self.collection_name,
             vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
             limit=self.top_k,
+            include_vectors=self.stored_vectors is not None,
         )
 
         ids = result.ids[0]
         metadatas = result.metadatas[0]
         documents = result.documents[0]
 
+        if self.stored_vectors is not None and result.vectors:
+            for id, vector in zip(ids, result.vectors[0]):
+                if vector:
+                    self.stored_vectors[id] = vector
+
         results = []
         for idx in range(len(ids)):
             results.append(
                 Document(
+                    id=ids[idx],
                     metadata=metadatas[idx],
                     page_content=documents[idx],
                 )
@@ -74,6 +89,47 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class LexicalSearchRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        result = LEXICAL_INDEX.search(
+            collection_name=self.collection_name, query=query, limit=self.top_k
+        )
+        if not result:
+            return []
+
+        return [
+            Document(id=id, metadata=metadata, page_content=document)
+            for id, document, metadata in zip(
+                result.ids[0], result.documents[0], result.metadatas[0]
+            )
+        ]
+
+
+def ensure_lexical_index(collection_name: str) -> bool:
+    """
+    Returns whether the BM25 side of hybrid search can be served by the
+    lexical index, indexing collections created before it on first use.
+    """
+    try:
+        # `VECTOR_DB_CLIENT` is a `LexicalIndexedVectorDB` when the index is on
+        return VECTOR_DB_CLIENT.backfill(collection_name)
+    except Exception as e:
+        log.exception(f"Error indexing collection {collection_name}: {e}")
+        # Another worker may have indexed it concurrently
+        try:
+            return LEXICAL_INDEX.has_collection(collection_name)
+        except Exception:
+            return False
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -110,7 +166,7 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    collection_result: Optional[GetResult],
     query: str,
     embedding_function,
     k: int,
@@ -121,16 +177,26 @@ def query_doc_with_hybrid_search(
 ) -> dict:
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        if collection_result is None:
+            # Served from the persisted index, see `ensure_lexical_index`
+            bm25_retriever = LexicalSearchRetriever(
+                collection_name=collection_name, top_k=k
+            )
+        else:
+            bm25_retriever = BM25Retriever.from_texts(
+                texts=collection_result.documents[0],
+                metadatas=collection_result.metadatas[0],
+                ids=collection_result.ids[0],
+            )
+            bm25_retriever.k = k
 
+        # Only the embedding-based rerank scores the stored vectors
+        stored_vectors = {} if reranking_function is None else None
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
             embedding_function=embedding_function,
             top_k=k,
+            stored_vectors=stored_vectors,
         )
 
         if hybrid_bm25_weight <= 0:
@@ -152,6 +218,7 @@ def query_doc_with_hybrid_search(
             top_n=k_reranker,
             reranking_function=reranking_function,
             r_score=r,
+            stored_vectors=stored_vectors,
         )
 
         compression_retriever = ContextualCompressionRetriever(
@@ -273,22 +340,6 @@ def query_collection(
     k: int,
 ) -> dict:
     results = []
-    error = False
-
-    def process_query_collection(collection_name, query_embedding):
-        try:
-            if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
-                )
-                if result is not None:
-                    return result.model_dump(), None
-            return None, None
-        except Exception as e:
-            log.exception(f"Error when querying the collection: {e}")
-            return None, e
 
     # Generate all query embeddings (in one call)
     query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
@@ -296,23 +347,34 @@ def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    # Every query embedding is searched in every collection in one batch
+    collection_names = [name for name in dict.fromkeys(collection_names) if name]
+    try:
+        search_results = VECTOR_DB_CLIENT.search_many(
+            collection_names=collection_names, vectors=query_embeddings, limit=k
+        )
+    except Exception as e:
+        log.exception(f"Error when querying the collections: {e}")
+        search_results = {}
 
-    for result, err in task_results:
-        if err is not None:
-            error = True
-        elif result is not None:
-            results.append(result)
+    for collection_name in collection_names:
+        result = search_results.get(collection_name)
+        if result is None:
+            continue
 
-    if error and not results:
+        for ids, distances, documents, metadatas in zip(
+            result.ids, result.distances, result.documents, result.metadatas
+        ):
+            results.append(
+                {
+                    "ids": [ids],
+                    "distances": [distances],
+                    "documents": [documents],
+                    "metadatas": [metadatas],
+                }
+            )
+
+    if collection_names and not results:
         log.warning("All collection queries failed. No results returned.")
 
     return merge_and_sort_query_results(results, k=k)
@@ -332,18 +394,22 @@ def query_collection_with_hybrid_search(
     error = False
     # Fetch collection data once per collection sequentially
     # Avoid fetching the same data multiple times later
+    # Collections served by the lexical index are mapped to None and skip the fetch
     collection_results = {}
     for collection_name in collection_names:
         try:
+            if ENABLE_RAG_LEXICAL_INDEX and ensure_lexical_index(collection_name):
+                collection_results[collection_name] = None
+                continue
+
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
-            )
+            result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+            if result is not None:
+                collection_results[collection_name] = result
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -368,12 +434,9 @@ def query_collection_with_hybrid_search(
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that failed to fetch data
     tasks = [
-        (cn, q)
-        for cn in collection_names
-        if collection_results[cn] is not None
-        for q in queries
+        (cn, q) for cn in collection_names if cn in collection_results for q in queries
     ]
 
     with ThreadPoolExecutor() as executor:
@@ -402,13 +465,15 @@ def get_embedding_function(
     key,
     embedding_batch_size,
     azure_api_version=None,
+    background=False,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        embed = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        # Batches are split and sent concurrently by `EMBEDDING_CLIENT`
+        embed = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -417,29 +482,22 @@ def get_embedding_function(
             key=key,
             user=user,
             azure_api_version=azure_api_version,
-        )
-
-        def generate_multiple(query, prefix, user, func):
-            if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
-            else:
-                return func(query, prefix, user)
-
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+            batch_size=embedding_batch_size,
+            background=background,
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if EMBEDDING_CACHE is not None:
+        return get_cached_embedding_function(
+            EMBEDDING_CACHE,
+            embedding_engine,
+            embedding_model,
+            embed,
+            url=url if embedding_engine else None,
+        )
+    return embed
+
 
 def get_sources_from_files(
     request,
@@ -655,6 +713,19 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+def get_user_info_headers(user: Optional[UserModel]) -> dict:
+    return (
+        {
+            "X-OpenWebUI-User-Name": user.name,
+            "X-OpenWebUI-User-Id": user.id,
+            "X-OpenWebUI-User-Email": user.email,
+            "X-OpenWebUI-User-Role": user.role,
+        }
+        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+        else {}
+    )
+
+
 def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
@@ -662,39 +733,30 @@ def generate_openai_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
+    batch_size: Optional[int] = None,
+    background: bool = False,
 ) -> Optional[list[list[float]]]:
     try:
         log.debug(
             f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
+        json_data = {"model": model}
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        return EMBEDDING_CLIENT.embed(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
+                **get_user_info_headers(user),
             },
-            json=json_data,
+            texts=texts,
+            payload=lambda batch: {**json_data, "input": batch},
+            parse=lambda data: [elem["embedding"] for elem in data["data"]],
+            batch_size=batch_size,
+            background=background,
         )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -708,47 +770,30 @@ def generate_azure_openai_batch_embeddings(
     version: str = "",
     prefix: str = None,
     user: UserModel = None,
+    batch_size: Optional[int] = None,
+    background: bool = False,
 ) -> Optional[list[list[float]]]:
     try:
         log.debug(
             f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts}
+        json_data = {}
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
-
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
+        return EMBEDDING_CLIENT.embed(
+            f"{url}/openai/deployments/{model}/embeddings?api-version={version}",
+            headers={
+                "Content-Type": "application/json",
+                "api-key": key,
+                **get_user_info_headers(user),
+            },
+            texts=texts,
+            payload=lambda batch: {**json_data, "input": batch},
+            parse=lambda data: [elem["embedding"] for elem in data["data"]],
+            batch_size=batch_size,
+            background=background,
+        )
     except Exception as e:
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
@@ -761,40 +806,30 @@ def generate_ollama_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
+    batch_size: Optional[int] = None,
+    background: bool = False,
 ) -> Optional[list[list[float]]]:
     try:
         log.debug(
             f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
+        json_data = {"model": model}
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        return EMBEDDING_CLIENT.embed(
             f"{url}/api/embed",
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
+                **get_user_info_headers(user),
             },
-            json=json_data,
+            texts=texts,
+            payload=lambda batch: {**json_data, "input": batch},
+            parse=lambda data: data["embeddings"],
+            batch_size=batch_size,
+            background=background,
         )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -810,6 +845,8 @@ def generate_embeddings(
     url = kwargs.get("url", "")
     key = kwargs.get("key", "")
     user = kwargs.get("user")
+    batch_size = kwargs.get("batch_size")
+    background = kwargs.get("background", False)
 
     if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
         if isinstance(text, list):
@@ -826,14 +863,21 @@ def generate_embeddings(
                 "key": key,
                 "prefix": prefix,
                 "user": user,
+                "batch_size": batch_size,
+                "background": background,
             }
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
     elif engine == "openai":
         embeddings = generate_openai_batch_embeddings(
-            model, text if isinstance(text, list) else [text], url, key, prefix, user
+            model,
+            text if isinstance(text, list) else [text],
+            url,
+            key,
+            prefix,
+            user,
+            batch_size,
+            background,
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
     elif engine == "azure_openai":
         azure_api_version = kwargs.get("azure_api_version", "")
         embeddings = generate_azure_openai_batch_embeddings(
@@ -844,8 +888,15 @@ def generate_embeddings(
             azure_api_version,
             prefix,
             user,
+            batch_size,
+            background,
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
+    else:
+        return None
+
+    if embeddings is None:
+        return None
+    return embeddings[0] if isinstance(text, str) else embeddings
 
 
 import operator
@@ -860,6 +911,8 @@ class RerankCompressor(BaseDocumentCompressor):
     top_n: int
     reranking_function: Any
     r_score: float
+    # Stored vectors of candidates by chunk id, used instead of re-embedding
+    stored_vectors: Any = None
 
     class Config:
         extra = "forbid"
@@ -878,13 +931,24 @@ class RerankCompressor(BaseDocumentCompressor):
                 [(query, doc.page_content) for doc in documents]
             )
         else:
-            from sentence_transformers import util
-
             query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+
+            stored_vectors = self.stored_vectors or {}
+            vectors = [
+                stored_vectors.get(doc.id) if doc.id else None for doc in documents
+            ]
+
+            # Only candidates without a stored vector (e.g. BM25 matches) are embedded
+            missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+            if missing:
+                embeddings = self.embedding_function(
+                    [documents[idx].page_content for idx in missing],
+                    RAG_EMBEDDING_CONTENT_PREFIX,
+                )
+                for idx, embedding in zip(missing, embeddings):
+                    vectors[idx] = embedding
+
+            scores = cosine_similarity(query_embedding, vectors)
 
         docs_with_scores = list(
             zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
@@ -900,6 +964,7 @@ class RerankCompressor(BaseDocumentCompressor):
             metadata = doc.metadata
             metadata["score"] = doc_score
             doc = Document(
+                id=doc.id,
                 page_content=doc.page_content,
                 metadata=metadata,
             )
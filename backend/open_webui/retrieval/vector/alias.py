@@ -0,0 +1,256 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorItem,
+)
+from sqlalchemy import BigInteger, Column, Text
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Seconds an instance may keep using an alias after it was changed elsewhere
+ALIAS_CACHE_TTL = 5.0
+
+
+####################
+# Collection Alias DB Schema
+####################
+
+
+class CollectionAlias(Base):
+    __tablename__ = "vector_collection_alias"
+
+    name = Column(Text, primary_key=True)
+    target = Column(Text, nullable=False)
+
+    updated_at = Column(BigInteger)
+
+
+class RetiredCollection(Base):
+    __tablename__ = "vector_collection_retired"
+
+    name = Column(Text, primary_key=True)
+
+    retired_at = Column(BigInteger)
+
+
+class CollectionAliases:
+    """
+    Maps collection names to the vector DB collection that currently holds
+    them. Names without an alias are their own collection. The whole table
+    is small and cached for `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = ALIAS_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.aliases: dict[str, str] = {}
+        self.loaded_at: Optional[float] = None
+
+    def _load(self):
+        with get_db() as db:
+            self.aliases = {
+                alias.name: alias.target for alias in db.query(CollectionAlias).all()
+            }
+        self.loaded_at = time.monotonic()
+
+    def resolve(self, name: str) -> str:
+        with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl:
+                try:
+                    self._load()
+                except Exception as e:
+                    # Keep serving the last known aliases until the next reload
+                    log.exception(f"Error loading collection aliases: {e}")
+                    self.loaded_at = time.monotonic()
+            return self.aliases.get(name, name)
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded_at = None
+
+    def set(self, name: str, target: str):
+        with get_db() as db:
+            db.merge(
+                CollectionAlias(name=name, target=target, updated_at=int(time.time()))
+            )
+            # Served again, it must not be dropped anymore
+            db.query(RetiredCollection).filter_by(name=target).delete()
+            db.commit()
+        self.invalidate()
+
+    def retire(self, name: str):
+        """Records that the collection `name` is to be dropped."""
+        with get_db() as db:
+            db.merge(RetiredCollection(name=name, retired_at=int(time.time())))
+            db.commit()
+
+    def get_retired(self, before: int) -> list[str]:
+        with get_db() as db:
+            return [
+                retired.name
+                for retired in db.query(RetiredCollection)
+                .filter(RetiredCollection.retired_at <= before)
+                .all()
+            ]
+
+    def unretire(self, name: str):
+        with get_db() as db:
+            db.query(RetiredCollection).filter_by(name=name).delete()
+            db.commit()
+
+    def delete(self, name: str):
+        with get_db() as db:
+            db.query(CollectionAlias).filter_by(name=name).delete()
+            db.commit()
+        self.invalidate()
+
+    def reset(self):
+        with get_db() as db:
+            db.query(CollectionAlias).delete()
+            db.query(RetiredCollection).delete()
+            db.commit()
+        self.invalidate()
+
+
+COLLECTION_ALIASES = CollectionAliases()
+
+
+class AliasedVectorDB(VectorDBBase):
+    """
+    Wraps a vector DB client so every collection name is resolved through
+    `CollectionAliases`. A collection can then be rebuilt under another
+    name and swapped in with `swap_collection`, without readers ever
+    seeing it half built.
+    """
+
+    def __init__(
+        self, client: VectorDBBase, aliases: CollectionAliases = COLLECTION_ALIASES
+    ):
+        self.client = client
+        self.aliases = aliases
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def swap_collection(self, collection_name: str, source: str) -> None:
+        """
+        Makes `collection_name` serve the contents of the collection
+        `source`. The collection it was served from until now is retired,
+        `drop_retired_collections` drops it once no instance can still be
+        reading it.
+        """
+        self.aliases.invalidate()
+        previous = self.aliases.resolve(collection_name)
+        if previous == source:
+            return
+
+        self.aliases.set(collection_name, source)
+        log.info(f"collection {collection_name} now served from {source}")
+
+        if self.client.has_collection(previous):
+            self.aliases.retire(previous)
+
+    def drop_retired_collections(self) -> list[str]:
+        """
+        Drops the collections retired by `swap_collection` more than the
+        alias cache TTL ago, so other instances have stopped using them.
+        Runs periodically on every instance, see `register_maintenance_task`.
+        """
+        dropped = []
+        for name in self.aliases.get_retired(int(time.time() - self.aliases.ttl)):
+            if self.client.has_collection(name):
+                self.client.delete_collection(name)
+            self.aliases.unretire(name)
+            log.info(f"dropped retired collection {name}")
+            dropped.append(name)
+        return dropped
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(self.aliases.resolve(collection_name))
+
+    def delete_collection(self, collection_name: str) -> None:
+        target = self.aliases.resolve(collection_name)
+        result = self.client.delete_collection(target)
+        if target != collection_name:
+            self.aliases.delete(collection_name)
+            # Served again without the alias, a retired copy would reappear
+            if self.client.has_collection(collection_name):
+                self.client.delete_collection(collection_name)
+            self.aliases.unretire(collection_name)
+        return result
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return self.client.insert(self.aliases.resolve(collection_name), items)
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return self.client.upsert(self.aliases.resolve(collection_name), items)
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> Optional[SearchResult]:
+        return self.client.search(
+            self.aliases.resolve(collection_name),
+            vectors,
+            limit,
+            include_vectors=include_vectors,
+        )
+
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> Dict[str, Optional[SearchResult]]:
+        targets = {name: self.aliases.resolve(name) for name in collection_names}
+        results = self.client.search_many(
+            list(dict.fromkeys(targets.values())),
+            vectors,
+            limit,
+            include_vectors=include_vectors,
+        )
+        return {name: results.get(target) for name, target in targets.items()}
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(self.aliases.resolve(collection_name), filter, limit)
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(self.aliases.resolve(collection_name))
+
+    def update_metadata(
+        self, collection_name: str, filter: Dict, metadata: Dict
+    ) -> None:
+        return self.client.update_metadata(
+            self.aliases.resolve(collection_name), filter, metadata
+        )
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        return self.client.delete(
+            self.aliases.resolve(collection_name), ids=ids, filter=filter
+        )
+
+    def reset(self) -> None:
+        result = self.client.reset()
+        self.aliases.reset()
+        return result
@@ -68,8 +68,30 @@ class ChromaClient(VectorDBBase):
         # Delete the collection based on the collection name.
         return self.client.delete_collection(name=collection_name)
 
+    def _embeddings_to_lists(self, embeddings) -> Optional[list]:
+        # chromadb returns numpy arrays for embeddings
+        if embeddings is None:
+            return None
+        return [
+            [
+                embedding.tolist() if hasattr(embedding, "tolist") else embedding
+                for embedding in row
+            ]
+            for row in embeddings
+        ]
+
+    def _search_include(self, include_vectors: bool) -> list[str]:
+        include = ["documents", "metadatas", "distances"]
+        if include_vectors:
+            include.append("embeddings")
+        return include
+
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         try:
@@ -78,6 +100,7 @@ class ChromaClient(VectorDBBase):
                 result = collection.query(
                     query_embeddings=vectors,
                     n_results=limit,
+                    include=self._search_include(include_vectors),
                 )
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
@@ -92,12 +115,49 @@ class ChromaClient(VectorDBBase):
                         "distances": distances,
                         "documents": result["documents"],
                         "metadatas": result["metadatas"],
+                        "vectors": self._embeddings_to_lists(result.get("embeddings")),
                     }
                 )
             return None
         except Exception as e:
             return None
 
+    def search_many(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> dict[str, Optional[SearchResult]]:
+        # One query per collection covers every query vector
+        results = {}
+        for collection_name in collection_names:
+            try:
+                collection = self.client.get_collection(name=collection_name)
+                result = collection.query(
+                    query_embeddings=vectors,
+                    n_results=limit,
+                    include=self._search_include(include_vectors),
+                )
+
+                # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
+                results[collection_name] = SearchResult(
+                    **{
+                        "ids": result["ids"],
+                        "distances": [
+                            [(2 - dist) / 2 for dist in distances]
+                            for distances in result["distances"]
+                        ],
+                        "documents": result["documents"],
+                        "metadatas": result["metadatas"],
+                        "vectors": self._embeddings_to_lists(result.get("embeddings")),
+                    }
+                )
+            except Exception as e:
+                log.exception(f"Error searching collection '{collection_name}': {e}")
+                results[collection_name] = None
+        return results
+
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -170,6 +230,22 @@ class ChromaClient(VectorDBBase):
             ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
         )
 
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        # Merge `metadata` into the metadata of the items matching `filter`.
+        collection = self.client.get_collection(name=collection_name)
+        result = collection.get(where=filter, include=["metadatas"])
+        if not result["ids"]:
+            return
+
+        for ids, _, metadatas, _ in create_batches(
+            api=self.client,
+            ids=result["ids"],
+            metadatas=[
+                {**(existing or {}), **metadata} for existing in result["metadatas"]
+            ],
+        ):
+            collection.update(ids=ids, metadatas=metadatas)
+
     def delete(
         self,
         collection_name: str,
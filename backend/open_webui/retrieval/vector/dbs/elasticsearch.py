@@ -151,7 +151,11 @@ class ElasticsearchClient(VectorDBBase):
 
     # Status: works
     def search(
-        self, collection_name: str, vectors: list[list[float]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         query = {
             "size": limit,
@@ -273,6 +277,29 @@ class ElasticsearchClient(VectorDBBase):
             bulk(self.client, actions)
 
     # Delete specific documents from a collection by filtering on both collection and document IDs.
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        # Merge `metadata` into the metadata of the documents matching `filter`.
+        query = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"collection": collection_name}},
+                        *(
+                            {"term": {f"metadata.{field}": value}}
+                            for field, value in filter.items()
+                        ),
+                    ]
+                }
+            },
+            "script": {
+                "source": "ctx._source.metadata.putAll(params.metadata)",
+                "params": {"metadata": metadata},
+            },
+        }
+        self.client.update_by_query(
+            index=f"{self.index_prefix}*", body=query, refresh=True
+        )
+
     def delete(
         self,
         collection_name: str,
@@ -61,11 +61,13 @@ class MilvusClient(VectorDBBase):
         distances = []
         documents = []
         metadatas = []
+        vectors = []
         for match in result:
             _ids = []
             _distances = []
             _documents = []
             _metadatas = []
+            _vectors = []
             for item in match:
                 _ids.append(item.get("id"))
                 # normalize milvus score from [-1, 1] to [0, 1] range
@@ -74,16 +76,23 @@ class MilvusClient(VectorDBBase):
                 _distances.append(_dist)
                 _documents.append(item.get("entity", {}).get("data", {}).get("text"))
                 _metadatas.append(item.get("entity", {}).get("metadata"))
+                _vectors.append(item.get("entity", {}).get("vector"))
             ids.append(_ids)
             distances.append(_distances)
             documents.append(_documents)
             metadatas.append(_metadatas)
+            vectors.append(_vectors)
         return SearchResult(
             **{
                 "ids": ids,
                 "distances": distances,
                 "documents": documents,
                 "metadatas": metadatas,
+                "vectors": (
+                    vectors
+                    if all(v is not None for row in vectors for v in row)
+                    else None
+                ),
             }
         )
 
@@ -169,7 +178,11 @@ class MilvusClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         collection_name = collection_name.replace("-", "_")
@@ -180,11 +193,34 @@ class MilvusClient(VectorDBBase):
             collection_name=f"{self.collection_prefix}_{collection_name}",
             data=vectors,
             limit=limit,
-            output_fields=["data", "metadata"],
+            output_fields=(
+                ["data", "metadata", "vector"]
+                if include_vectors
+                else ["data", "metadata"]
+            ),
             # search_params=search_params # Potentially add later if needed
         )
         return self._result_to_search_result(result)
 
+    def search_many(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> dict[str, Optional[SearchResult]]:
+        # `search` already sends every query vector in one request
+        results = {}
+        for collection_name in collection_names:
+            try:
+                results[collection_name] = self.search(
+                    collection_name, vectors, limit, include_vectors=include_vectors
+                )
+            except Exception as e:
+                log.exception(f"Error searching collection '{collection_name}': {e}")
+                results[collection_name] = None
+        return results
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
         collection_name = collection_name.replace("-", "_")
@@ -353,6 +389,41 @@ class MilvusClient(VectorDBBase):
             ],
         )
 
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        # Merge `metadata` into the metadata of the items matching `filter`.
+        # Milvus has no partial updates, the rows are upserted whole.
+        collection_name = collection_name.replace("-", "_")
+        if not self.has_collection(collection_name):
+            return None
+
+        filter_string = " && ".join(
+            [
+                f'metadata["{key}"] == {json.dumps(value)}'
+                for key, value in filter.items()
+            ]
+        )
+        # Read every row before writing, upserts may reorder the pages
+        rows = []
+        while True:
+            batch = self.client.query(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                filter=filter_string,
+                output_fields=["id", "vector", "data", "metadata"],
+                limit=1000,
+                offset=len(rows),
+            )
+            rows.extend(batch)
+            if len(batch) < 1000:
+                break
+
+        for row in rows:
+            row["metadata"] = {**(row.get("metadata") or {}), **metadata}
+        for idx in range(0, len(rows), 1000):
+            self.client.upsert(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                data=rows[idx : idx + 1000],
+            )
+
     def delete(
         self,
         collection_name: str,
@@ -112,7 +112,11 @@ class OpenSearchClient(VectorDBBase):
         self.client.indices.delete(index=self._get_index_name(collection_name))
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         try:
             if not self.has_collection(collection_name):
@@ -229,6 +233,26 @@ class OpenSearchClient(VectorDBBase):
             ]
             bulk(self.client, actions)
 
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        # Merge `metadata` into the metadata of the documents matching `filter`.
+        query_body = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"match": {"metadata." + str(field): value}}
+                        for field, value in filter.items()
+                    ]
+                }
+            },
+            "script": {
+                "source": "ctx._source.metadata.putAll(params.metadata)",
+                "params": {"metadata": metadata},
+            },
+        }
+        self.client.update_by_query(
+            index=self._get_index_name(collection_name), body=query_body
+        )
+
     def delete(
         self,
         collection_name: str,
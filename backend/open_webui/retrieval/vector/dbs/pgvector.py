@@ -21,7 +21,7 @@ from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.dialects.postgresql import JSONB, array, insert as pg_insert
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -34,7 +34,12 @@ from open_webui.retrieval.vector.main import (
 )
 from open_webui.config import (
     PGVECTOR_DB_URL,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_INDEX_METHOD,
     PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_INSERT_BATCH_SIZE,
+    PGVECTOR_IVFFLAT_LISTS,
     PGVECTOR_PGCRYPTO,
     PGVECTOR_PGCRYPTO_KEY,
 )
@@ -111,12 +116,7 @@ class PgvectorClient(VectorDBBase):
             Base.metadata.create_all(bind=connection)
 
             # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
-            )
+            self.ensure_vector_index()
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -130,6 +130,43 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during initialization: {e}")
             raise
 
+    def ensure_vector_index(self) -> None:
+        """
+        Creates the ANN index on the vector column with PGVECTOR_INDEX_METHOD,
+        rebuilding it if it exists with another method.
+        """
+        # Workers start at the same time, let one of them check and build it,
+        # the lock is held until the initialization commits
+        self.session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext('idx_document_chunk_vector'));")
+        )
+
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            options = f"m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION}"
+        else:
+            options = f"lists = {PGVECTOR_IVFFLAT_LISTS}"
+
+        indexdef = self.session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = 'document_chunk' AND indexname = 'idx_document_chunk_vector';"
+            )
+        ).scalar()
+        if indexdef and f"USING {PGVECTOR_INDEX_METHOD} " not in indexdef:
+            log.info(
+                f"Rebuilding idx_document_chunk_vector with {PGVECTOR_INDEX_METHOD}, this may take a while."
+            )
+            self.session.execute(
+                text("DROP INDEX IF EXISTS idx_document_chunk_vector;")
+            )
+
+        self.session.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
+                f"ON document_chunk USING {PGVECTOR_INDEX_METHOD} (vector vector_cosine_ops) WITH ({options});"
+            )
+        )
+
     def check_vector_length(self) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
@@ -176,53 +213,64 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
+    def get_rows(self, collection_name: str, items: List[VectorItem]) -> List[dict]:
+        rows = []
+        for item in items:
+            row = {
+                "id": item["id"],
+                "vector": self.adjust_vector_length(item["vector"]),
+                "collection_name": collection_name,
+            }
+            if PGVECTOR_PGCRYPTO:
+                # Encrypted server side, the key never leaves the statement
+                row["text"] = pgcrypto_encrypt(item["text"], PGVECTOR_PGCRYPTO_KEY)
+                row["vmetadata"] = pgcrypto_encrypt(
+                    json.dumps(item["metadata"]), PGVECTOR_PGCRYPTO_KEY
+                )
+            else:
+                row["text"] = item["text"]
+                row["vmetadata"] = item["metadata"]
+            rows.append(row)
+        return rows
+
+    def write_rows(self, rows: List[dict], update: bool) -> None:
+        """
+        Writes `rows` with one multi-row INSERT per PGVECTOR_INSERT_BATCH_SIZE
+        rows, committing after each. Existing ids are updated when `update`,
+        skipped otherwise.
+        """
+        batch_size = max(PGVECTOR_INSERT_BATCH_SIZE, 1)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            if update:
+                # A statement can't update the same row twice, last item wins
+                batch = list({row["id"]: row for row in batch}.values())
+
+            stmt = pg_insert(DocumentChunk.__table__).values(batch)
+            if update:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={
+                        "vector": stmt.excluded.vector,
+                        "collection_name": stmt.excluded.collection_name,
+                        "text": stmt.excluded.text,
+                        "vmetadata": stmt.excluded.vmetadata,
+                    },
+                )
+            elif PGVECTOR_PGCRYPTO:
+                stmt = stmt.on_conflict_do_nothing(index_elements=["id"])
+
+            self.session.execute(stmt)
+            self.session.commit()
+
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
+            self.write_rows(self.get_rows(collection_name, items), update=False)
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    # Use raw SQL for BYTEA/pgcrypto
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata::text, :key)
-                            )
-                            ON CONFLICT (id) DO NOTHING
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata": json.dumps(item["metadata"]),
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
                 log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
-
             else:
-                new_items = []
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    new_items.append(new_chunk)
-                self.session.bulk_save_objects(new_items)
-                self.session.commit()
                 log.info(
-                    f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                    f"Inserted {len(items)} items into collection '{collection_name}'."
                 )
         except Exception as e:
             self.session.rollback()
@@ -231,62 +279,10 @@ class PgvectorClient(VectorDBBase):
 
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
+            self.write_rows(self.get_rows(collection_name, items), update=True)
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata::text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata": json.dumps(item["metadata"]),
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
                 log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
             else:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    existing = (
-                        self.session.query(DocumentChunk)
-                        .filter(DocumentChunk.id == item["id"])
-                        .first()
-                    )
-                    if existing:
-                        existing.vector = vector
-                        existing.text = item["text"]
-                        existing.vmetadata = item["metadata"]
-                        existing.collection_name = (
-                            collection_name  # Update collection_name if necessary
-                        )
-                    else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=item["metadata"],
-                        )
-                        self.session.add(new_chunk)
-                self.session.commit()
                 log.info(
                     f"Upserted {len(items)} items into collection '{collection_name}'."
                 )
@@ -300,10 +296,25 @@ class PgvectorClient(VectorDBBase):
         collection_name: str,
         vectors: List[List[float]],
         limit: Optional[int] = None,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
+        if not vectors:
+            return None
+        return self.search_many(
+            [collection_name], vectors, limit, include_vectors=include_vectors
+        )[collection_name]
+
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+        include_vectors: bool = False,
+    ) -> Dict[str, Optional[SearchResult]]:
+        # All (collection, vector) pairs are searched in a single statement
         try:
-            if not vectors:
-                return None
+            if not vectors or not collection_names:
+                return {collection_name: None for collection_name in collection_names}
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
@@ -312,20 +323,31 @@ class PgvectorClient(VectorDBBase):
             def vector_expr(vector):
                 return cast(array(vector), Vector(VECTOR_LENGTH))
 
-            # Create the values for query vectors
+            # Create the values for query vectors, one per collection and vector
             qid_col = column("qid", Integer)
+            q_collection_name_col = column("q_collection_name", Text)
             q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
             query_vectors = (
-                values(qid_col, q_vector_col)
+                values(qid_col, q_collection_name_col, q_vector_col)
                 .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
+                    [
+                        (
+                            collection_idx * num_queries + idx,
+                            collection_name,
+                            vector_expr(vector),
+                        )
+                        for collection_idx, collection_name in enumerate(
+                            collection_names
+                        )
+                        for idx, vector in enumerate(vectors)
+                    ]
                 )
                 .alias("query_vectors")
             )
 
-            result_fields = [
-                DocumentChunk.id,
-            ]
+            result_fields = [DocumentChunk.id]
+            if include_vectors:
+                result_fields.append(DocumentChunk.vector)
             if PGVECTOR_PGCRYPTO:
                 result_fields.append(
                     pgcrypto_decrypt(
@@ -349,7 +371,9 @@ class PgvectorClient(VectorDBBase):
             # Build the lateral subquery for each query vector
             subq = (
                 select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
+                .where(
+                    DocumentChunk.collection_name == query_vectors.c.q_collection_name
+                )
                 .order_by(
                     (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
                 )
@@ -363,6 +387,7 @@ class PgvectorClient(VectorDBBase):
                 select(
                     query_vectors.c.qid,
                     subq.c.id,
+                    *([subq.c.vector] if include_vectors else []),
                     subq.c.text,
                     subq.c.vmetadata,
                     subq.c.distance,
@@ -375,18 +400,11 @@ class PgvectorClient(VectorDBBase):
             result_proxy = self.session.execute(stmt)
             results = result_proxy.all()
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
-
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
+            ids = [[] for _ in range(num_queries * len(collection_names))]
+            distances = [[] for _ in range(num_queries * len(collection_names))]
+            documents = [[] for _ in range(num_queries * len(collection_names))]
+            metadatas = [[] for _ in range(num_queries * len(collection_names))]
+            result_vectors = [[] for _ in range(num_queries * len(collection_names))]
 
             for row in results:
                 qid = int(row.qid)
@@ -396,13 +414,31 @@ class PgvectorClient(VectorDBBase):
                 distances[qid].append((2.0 - row.distance) / 2.0)
                 documents[qid].append(row.text)
                 metadatas[qid].append(row.vmetadata)
+                if include_vectors:
+                    result_vectors[qid].append(
+                        row.vector.tolist() if row.vector is not None else []
+                    )
 
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
+            return {
+                collection_name: SearchResult(
+                    ids=ids[start : start + num_queries],
+                    distances=distances[start : start + num_queries],
+                    documents=documents[start : start + num_queries],
+                    metadatas=metadatas[start : start + num_queries],
+                    vectors=(
+                        result_vectors[start : start + num_queries]
+                        if include_vectors
+                        else None
+                    ),
+                )
+                for collection_name, start in zip(
+                    collection_names,
+                    range(0, num_queries * len(collection_names), num_queries),
+                )
+            }
         except Exception as e:
             log.exception(f"Error during search: {e}")
-            return None
+            return {collection_name: None for collection_name in collection_names}
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
@@ -504,6 +540,38 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during get: {e}")
             return None
 
+    def update_metadata(
+        self, collection_name: str, filter: Dict[str, Any], metadata: Dict[str, Any]
+    ) -> None:
+        try:
+            wheres = [DocumentChunk.collection_name == collection_name]
+            if PGVECTOR_PGCRYPTO:
+                decrypted = pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                )
+                for key, value in filter.items():
+                    wheres.append(decrypted[key].astext == str(value))
+                merged = pgcrypto_encrypt(
+                    func.cast(decrypted.op("||")(cast(metadata, JSONB)), Text),
+                    PGVECTOR_PGCRYPTO_KEY,
+                )
+            else:
+                for key, value in filter.items():
+                    wheres.append(DocumentChunk.vmetadata[key].astext == str(value))
+                merged = DocumentChunk.vmetadata.op("||")(cast(metadata, JSONB))
+
+            result = self.session.execute(
+                DocumentChunk.__table__.update().where(*wheres).values(vmetadata=merged)
+            )
+            self.session.commit()
+            log.info(
+                f"Updated the metadata of {result.rowcount} items in collection '{collection_name}'."
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during metadata update: {e}")
+            raise
+
     def delete(
         self,
         collection_name: str,
@@ -391,7 +391,11 @@ class PineconeClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         """Search for similar vectors in a collection."""
         if not vectors or not vectors[0]:
@@ -508,6 +512,19 @@ class PineconeClient(VectorDBBase):
             log.error(f"Error getting collection '{collection_name}': {e}")
             return None
 
+    def update_metadata(
+        self, collection_name: str, filter: Dict, metadata: Dict
+    ) -> None:
+        """Merge `metadata` into the metadata of the vectors matching `filter`."""
+        result = self.query(collection_name, filter)
+        if result is None:
+            return
+
+        for id in result.ids[0]:
+            self._retry_pinecone_operation(
+                lambda id=id: self.index.update(id=id, set_metadata=metadata)
+            )
+
     def delete(
         self,
         collection_name: str,
@@ -115,7 +115,11 @@ class QdrantClient(VectorDBBase):
         )
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         if limit is None:
@@ -125,6 +129,7 @@ class QdrantClient(VectorDBBase):
             collection_name=f"{self.collection_prefix}_{collection_name}",
             query=vectors[0],
             limit=limit,
+            with_vectors=include_vectors,
         )
         get_result = self._result_to_get_result(query_response.points)
         return SearchResult(
@@ -133,8 +138,61 @@ class QdrantClient(VectorDBBase):
             metadatas=get_result.metadatas,
             # qdrant distance is [-1, 1], normalize to [0, 1]
             distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+            vectors=(
+                [[point.vector for point in query_response.points]]
+                if include_vectors
+                else None
+            ),
         )
 
+    def search_many(
+        self,
+        collection_names: list[str],
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> dict[str, Optional[SearchResult]]:
+        # One batched request per collection covers every query vector
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        results = {}
+        for collection_name in collection_names:
+            try:
+                responses = self.client.query_batch_points(
+                    collection_name=f"{self.collection_prefix}_{collection_name}",
+                    requests=[
+                        models.QueryRequest(
+                            query=vector,
+                            limit=limit,
+                            with_payload=True,
+                            with_vector=include_vectors,
+                        )
+                        for vector in vectors
+                    ],
+                )
+            except Exception as e:
+                log.exception(f"Error searching collection '{collection_name}': {e}")
+                results[collection_name] = None
+                continue
+
+            rows = [self._result_to_get_result(r.points) for r in responses]
+            results[collection_name] = SearchResult(
+                ids=[row.ids[0] for row in rows],
+                documents=[row.documents[0] for row in rows],
+                metadatas=[row.metadatas[0] for row in rows],
+                # qdrant distance is [-1, 1], normalize to [0, 1]
+                distances=[
+                    [(point.score + 1.0) / 2.0 for point in r.points] for r in responses
+                ],
+                vectors=(
+                    [[point.vector for point in r.points] for r in responses]
+                    if include_vectors
+                    else None
+                ),
+            )
+        return results
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
         if not self.has_collection(collection_name):
@@ -181,6 +239,21 @@ class QdrantClient(VectorDBBase):
         points = self._create_points(items)
         return self.client.upsert(f"{self.collection_prefix}_{collection_name}", points)
 
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        # Merge `metadata` into the metadata of the points matching `filter`.
+        field_conditions = [
+            models.FieldCondition(
+                key=f"metadata.{key}", match=models.MatchValue(value=value)
+            )
+            for key, value in filter.items()
+        ]
+        return self.client.set_payload(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            payload=metadata,
+            key="metadata",
+            points=models.Filter(must=field_conditions),
+        )
+
     def delete(
         self,
         collection_name: str,
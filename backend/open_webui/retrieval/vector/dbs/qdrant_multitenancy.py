@@ -305,6 +305,33 @@ class QdrantClient(VectorDBBase):
             log.debug(f"Error checking collection {mt_collection}: {e}")
             return False
 
+    def update_metadata(self, collection_name: str, filter: dict, metadata: dict):
+        """
+        Merge `metadata` into the metadata of the points matching `filter`,
+        with tenant isolation.
+        """
+        if not self.client:
+            return None
+
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        must_conditions = [
+            models.FieldCondition(
+                key="tenant_id", match=models.MatchValue(value=tenant_id)
+            ),
+            *(
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+                for key, value in filter.items()
+            ),
+        ]
+        return self.client.set_payload(
+            collection_name=mt_collection,
+            payload=metadata,
+            key="metadata",
+            points=models.Filter(must=must_conditions),
+        )
+
     def delete(
         self,
         collection_name: str,
@@ -371,7 +398,11 @@ class QdrantClient(VectorDBBase):
             raise
 
     def search(
-        self, collection_name: str, vectors: list[list[float | int]], limit: int
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
         """
         Search for the nearest neighbor items based on the vectors with tenant isolation.
@@ -1,6 +1,12 @@
+from open_webui.retrieval.vector.alias import AliasedVectorDB
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
-from open_webui.config import VECTOR_DB, ENABLE_QDRANT_MULTITENANCY_MODE
+from open_webui.config import (
+    VECTOR_DB,
+    ENABLE_QDRANT_MULTITENANCY_MODE,
+    ENABLE_RAG_HYBRID_SEARCH,
+    ENABLE_RAG_LEXICAL_INDEX,
+)
 
 
 class Vector:
@@ -52,4 +58,14 @@ class Vector:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+# Collection names are resolved through aliases, see `swap_collection`
+VECTOR_DB_CLIENT = AliasedVectorDB(Vector.get_vector(VECTOR_DB))
+
+if ENABLE_RAG_LEXICAL_INDEX:
+    from open_webui.retrieval.lexical import LexicalIndexedVectorDB
+
+    # Follows the hybrid search setting as changed at runtime
+    VECTOR_DB_CLIENT = LexicalIndexedVectorDB(
+        VECTOR_DB_CLIENT,
+        index_new_collections=lambda: ENABLE_RAG_HYBRID_SEARCH.value,
+    )
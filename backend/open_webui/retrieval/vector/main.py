@@ -1,7 +1,15 @@
-from pydantic import BaseModel
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel, Field
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
 
 class VectorItem(BaseModel):
     id: str
@@ -18,6 +26,9 @@ class GetResult(BaseModel):
 
 class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
+    # Stored vectors of the matches, for reranking without re-embedding.
+    # Backends that cannot return them leave this unset; never serialized.
+    vectors: Optional[List[List[List[float | int]]]] = Field(default=None, exclude=True)
 
 
 class VectorDBBase(ABC):
@@ -53,11 +64,78 @@ class VectorDBBase(ABC):
 
     @abstractmethod
     def search(
-        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
     ) -> Optional[SearchResult]:
-        """Search for similar vectors in a collection."""
+        """
+        Search for similar vectors in a collection. The stored vectors of the
+        matches are only returned when `include_vectors` is set.
+        """
         pass
 
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+        include_vectors: bool = False,
+    ) -> Dict[str, Optional[SearchResult]]:
+        """
+        Search several collections with several vectors at once.
+
+        Returns a `SearchResult` per collection (None if it failed) holding
+        one row per query vector, in the order of `vectors`. Backends
+        override this to batch the lookups; this fallback issues one
+        `search` per collection and vector, a vector whose search failed
+        gets an empty row.
+        """
+
+        def search(collection_name, vector):
+            try:
+                return self.search(
+                    collection_name, [vector], limit, include_vectors=include_vectors
+                )
+            except Exception as e:
+                log.exception(f"Error searching collection '{collection_name}': {e}")
+                return None
+
+        with ThreadPoolExecutor() as executor:
+            futures = {
+                collection_name: [
+                    executor.submit(search, collection_name, vector)
+                    for vector in vectors
+                ]
+                for collection_name in collection_names
+            }
+
+        results = {}
+        for collection_name, collection_futures in futures.items():
+            rows = [future.result() for future in collection_futures]
+            if all(row is None for row in rows):
+                results[collection_name] = None
+                continue
+
+            empty = SearchResult(
+                ids=[[]], documents=[[]], metadatas=[[]], distances=[[]], vectors=[[]]
+            )
+            rows = [empty if row is None else row for row in rows]
+
+            results[collection_name] = SearchResult(
+                ids=[row.ids[0] for row in rows],
+                documents=[row.documents[0] for row in rows],
+                metadatas=[row.metadatas[0] for row in rows],
+                distances=[row.distances[0] for row in rows],
+                vectors=(
+                    [row.vectors[0] for row in rows]
+                    if all(row.vectors for row in rows)
+                    else None
+                ),
+            )
+        return results
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
@@ -70,6 +148,14 @@ class VectorDBBase(ABC):
         """Retrieve all vectors from a collection."""
         pass
 
+    def update_metadata(
+        self, collection_name: str, filter: Dict, metadata: Dict
+    ) -> None:
+        """Merge `metadata` into the metadata of the items matching `filter`."""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support updating metadata"
+        )
+
     @abstractmethod
     def delete(
         self,
@@ -0,0 +1,31 @@
+from typing import Optional
+
+import numpy as np
+
+
+def cosine_similarity(
+    query_vector: list[float | int], vectors: list[Optional[list[float | int]]]
+) -> list[float]:
+    """
+    Cosine similarity of `query_vector` against each of `vectors` in one
+    vectorized pass. Vectors of different lengths are zero-padded to the
+    longest one (pgvector stores vectors padded to `VECTOR_LENGTH`), and
+    empty or zero vectors score 0.
+    """
+    if not vectors:
+        return []
+
+    dimension = max([len(query_vector)] + [len(v) for v in vectors if v is not None])
+
+    matrix = np.zeros((len(vectors), dimension), dtype=np.float32)
+    for idx, vector in enumerate(vectors):
+        if vector is not None and len(vector):
+            matrix[idx, : len(vector)] = vector
+
+    query = np.zeros(dimension, dtype=np.float32)
+    query[: len(query_vector)] = query_vector
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    dots = matrix @ query
+    scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    return scores.tolist()
@@ -444,7 +444,7 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
@@ -473,6 +473,7 @@ async def update_chat_message_by_id(
             }
         )
 
+    chat = Chats.get_chat_by_id(id)
     return ChatResponse(**chat.model_dump())
 
 
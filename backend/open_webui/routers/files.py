@@ -32,6 +32,7 @@ from open_webui.models.files import (
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
+from open_webui.models.jobs import JobResponse
 from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
@@ -88,6 +89,7 @@ def upload_file(
     file: UploadFile = File(...),
     metadata: Optional[dict | str] = Form(None),
     process: bool = Query(True),
+    background: bool = Query(False),
     internal: bool = False,
     user=Depends(get_verified_user),
 ):
@@ -153,6 +155,7 @@ def upload_file(
             ),
         )
         if process:
+            job = None
             try:
                 if file.content_type:
                     stt_supported_content_types = (
@@ -178,14 +181,29 @@ def upload_file(
                     elif (not file.content_type.startswith(("image/", "video/"))) or (
                         request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
                     ):
-                        process_file(request, ProcessFileForm(file_id=id), user=user)
+                        job = process_file(
+                            request,
+                            ProcessFileForm(file_id=id),
+                            background=background,
+                            user=user,
+                        )
                 else:
                     log.info(
                         f"File type {file.content_type} is not provided, but trying to process anyway"
                     )
-                    process_file(request, ProcessFileForm(file_id=id), user=user)
+                    job = process_file(
+                        request,
+                        ProcessFileForm(file_id=id),
+                        background=background,
+                        user=user,
+                    )
 
                 file_item = Files.get_file_by_id(id=id)
+                if isinstance(job, JobResponse):
+                    # Processed later, poll /api/v1/jobs/{job_id}
+                    file_item = FileModelResponse(
+                        **file_item.model_dump(), job_id=job.id
+                    )
             except Exception as e:
                 log.exception(e)
                 log.error(f"Error processing file: {file_item.id}")
@@ -0,0 +1,84 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.jobs import JobModel, JobResponse, Jobs
+from open_webui.utils.auth import get_verified_user
+from open_webui.utils.jobs import JOB_MANAGER
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+
+def get_job_or_raise(id: str, user) -> JobModel:
+    job = Jobs.get_job_by_id(id)
+    if not job or (job.user_id != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
+
+
+############################
+# GetJobs
+############################
+
+
+@router.get("/", response_model=list[JobResponse])
+async def get_jobs(user=Depends(get_verified_user)):
+    return Jobs.get_jobs_by_user_id(user.id)
+
+
+############################
+# GetJobById
+############################
+
+
+@router.get("/{id}", response_model=JobResponse)
+async def get_job_by_id(id: str, user=Depends(get_verified_user)):
+    return get_job_or_raise(id, user)
+
+
+############################
+# CancelJobById
+############################
+
+
+@router.post("/{id}/cancel", response_model=JobResponse)
+async def cancel_job_by_id(id: str, user=Depends(get_verified_user)):
+    get_job_or_raise(id, user)
+
+    job = JOB_MANAGER.cancel(id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Only pending or running jobs can be cancelled"
+            ),
+        )
+    return job
+
+
+############################
+# RetryJobById
+############################
+
+
+@router.post("/{id}/retry", response_model=JobResponse)
+async def retry_job_by_id(id: str, user=Depends(get_verified_user)):
+    get_job_or_raise(id, user)
+
+    job = JOB_MANAGER.retry(id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Only failed or cancelled jobs can be retried"
+            ),
+        )
+    return job
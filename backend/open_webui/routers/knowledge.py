@@ -1,4 +1,5 @@
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Union
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 import logging
@@ -10,6 +11,7 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.models.jobs import JobResponse, Jobs
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -19,9 +21,17 @@ from open_webui.routers.retrieval import (
 )
 from open_webui.storage.provider import Storage
 
+from open_webui.config import RAG_REINDEX_CONCURRENCY
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.jobs import (
+    JOB_MANAGER,
+    get_current_job,
+    register_job_handler,
+    register_maintenance_task,
+    update_job_progress,
+)
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -166,6 +176,25 @@ async def create_new_knowledge(
 ############################
 
 
+def is_knowledge_reindexing(knowledge_id: str) -> bool:
+    """
+    Whether a reindex job has yet to swap in the rebuilt collection of
+    `knowledge_id`. Files added or removed until then would be missed by it.
+    """
+    for job in Jobs.get_jobs_by_type("knowledge_reindex", ["pending", "running"]):
+        checkpoint = (job.progress or {}).get("knowledge")
+        if checkpoint is None:
+            # Not started yet, every knowledge base is about to be reindexed
+            return True
+        if knowledge_id in checkpoint and not checkpoint[knowledge_id]["done"]:
+            return True
+    return False
+
+
+# Collections replaced by a reindex, see `AliasedVectorDB.swap_collection`
+register_maintenance_task(VECTOR_DB_CLIENT.drop_retired_collections)
+
+
 @router.post("/reindex", response_model=bool)
 async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
     if user.role != "admin":
@@ -174,11 +203,36 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
+    # Runs in the background, see `reindex_knowledge_job`
+    JOB_MANAGER.enqueue(user.id, "knowledge_reindex", {})
+    return True
+
+
+@register_job_handler("knowledge_reindex")
+def reindex_knowledge_job(request: Request, user, payload: dict) -> dict:
+    """
+    Re-embeds every knowledge base into a new collection, processing up to
+    `RAG_REINDEX_CONCURRENCY` files at once, and swaps each one in as soon as
+    all its files are done, so searches keep using the old embeddings until
+    then. Files that failed are left out rather than keeping embeddings that
+    may come from another model, and are listed in the job's result. Writes
+    to a knowledge base are refused until it is done, see
+    `is_knowledge_reindexing`. Finished files are checkpointed in the job's
+    progress; a job resumed after a restart skips them and redoes the others
+    from scratch.
+    """
+    job = get_current_job()
+    job_id = job.id if job else "reindex"
+    checkpoint = ((job.progress if job else None) or {}).get("knowledge", {})
+
     knowledge_bases = Knowledges.get_knowledge_bases()
 
     log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
 
     deleted_knowledge_bases = []
+    state = {}
+    pending = {}
+    tasks = []
 
     for knowledge_base in knowledge_bases:
         # -- Robust error handling for missing or invalid data
@@ -195,51 +249,202 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
                 )
             continue
 
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
+        knowledge_state = checkpoint.get(knowledge_base.id)
+        if knowledge_state is None:
+            knowledge_state = {
+                "collection_name": f"{knowledge_base.id}-{job_id[:8]}",
+                "files": [],
+                "failed": [],
+                "done": False,
+            }
             try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
+                # Left over from an earlier attempt of this job
+                if VECTOR_DB_CLIENT.has_collection(
+                    collection_name=knowledge_state["collection_name"]
+                ):
                     VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
+                        collection_name=knowledge_state["collection_name"]
                     )
             except Exception as e:
                 log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
                 continue  # Skip, don't raise
 
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
+        state[knowledge_base.id] = knowledge_state
+        if knowledge_state["done"]:
+            continue
+
+        done = set(knowledge_state["files"]) | {
+            failed["file_id"] for failed in knowledge_state["failed"]
+        }
+        files = [
+            file
+            for file in Files.get_files_by_ids(knowledge_base.data.get("file_ids", []))
+            if file.id not in done
+        ]
+        try:
+            # Chunks a crashed run wrote for unfinished files would make
+            # `process_file` reject them as duplicate content
+            if files and VECTOR_DB_CLIENT.has_collection(
+                collection_name=knowledge_state["collection_name"]
+            ):
+                for file in files:
+                    VECTOR_DB_CLIENT.delete(
+                        collection_name=knowledge_state["collection_name"],
+                        filter={"file_id": file.id},
                     )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
+        except Exception as e:
+            log.error(f"Error cleaning up collection {knowledge_base.id}: {str(e)}")
+            state.pop(knowledge_base.id)
+            continue  # Skip, don't raise
+        pending[knowledge_base.id] = {file.id for file in files}
+        tasks.extend((knowledge_base.id, file) for file in files)
+
+    def save_checkpoint():
+        update_job_progress(
+            {
+                "knowledge": state,
+                "files": sum(
+                    len(s["files"]) + len(s["failed"]) for s in state.values()
+                ),
+                "total": sum(len(s["files"]) + len(s["failed"]) for s in state.values())
+                + sum(len(file_ids) for file_ids in pending.values()),
+            },
+            force=True,
+        )
+
+    def record(knowledge_id, file, error: Optional[Exception] = None):
+        if error is None:
+            state[knowledge_id]["files"].append(file.id)
+            # `process_file` records the collection it was indexed into
+            Files.update_file_metadata_by_id(file.id, {"collection_name": knowledge_id})
+        else:
+            log.error(
+                f"Error processing file {file.filename} (ID: {file.id}): {str(error)}"
+            )
+            state[knowledge_id]["failed"].append(
+                {"file_id": file.id, "error": str(error)}
+            )
+
+    def reconcile(knowledge_id):
+        # Catches up with writes that were already running when the job started
+        knowledge_state = state[knowledge_id]
+        knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+        file_ids = set(
+            ((knowledge.data if knowledge else None) or {}).get("file_ids", [])
+        )
+
+        for file_id in set(knowledge_state["files"]) - file_ids:
+            VECTOR_DB_CLIENT.delete(
+                collection_name=knowledge_state["collection_name"],
+                filter={"file_id": file_id},
+            )
+            knowledge_state["files"].remove(file_id)
+        knowledge_state["failed"] = [
+            failed
+            for failed in knowledge_state["failed"]
+            if failed["file_id"] in file_ids
+        ]
+
+        done = set(knowledge_state["files"]) | {
+            failed["file_id"] for failed in knowledge_state["failed"]
+        }
+        for file in Files.get_files_by_ids(list(file_ids - done)):
+            try:
+                process_file(
+                    request,
+                    ProcessFileForm(
+                        file_id=file.id,
+                        collection_name=knowledge_state["collection_name"],
+                    ),
+                    user=user,
+                )
+                record(knowledge_id, file)
+            except Exception as e:
+                record(knowledge_id, file, e)
+
+    def swap(knowledge_id):
+        knowledge_state = state[knowledge_id]
+        try:
+            reconcile(knowledge_id)
+
+            if knowledge_state["failed"]:
+                # Kept embeddings could be from the previous model, the
+                # failed files are left out until they are reprocessed
+                log.warning(
+                    f"Failed to process {len(knowledge_state['failed'])} files in knowledge base {knowledge_id}, they are not searchable"
+                )
+                for failed in knowledge_state["failed"]:
+                    log.warning(
+                        f"File ID: {failed['file_id']}, Error: {failed['error']}"
                     )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
 
+            if VECTOR_DB_CLIENT.has_collection(
+                collection_name=knowledge_state["collection_name"]
+            ):
+                VECTOR_DB_CLIENT.swap_collection(
+                    knowledge_id, knowledge_state["collection_name"]
+                )
+            elif VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_id):
+                # Nothing was indexed, as before the knowledge base ends up empty
+                VECTOR_DB_CLIENT.delete_collection(collection_name=knowledge_id)
+            knowledge_state["done"] = True
         except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+            log.error(f"Error swapping collection {knowledge_id}: {str(e)}")
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
+    save_checkpoint()
+    for knowledge_id, knowledge_state in state.items():
+        if not knowledge_state["done"] and not pending.get(knowledge_id):
+            swap(knowledge_id)
+            save_checkpoint()
+
+    executor = ThreadPoolExecutor(max_workers=max(RAG_REINDEX_CONCURRENCY, 1))
+    try:
+        futures = {
+            executor.submit(
+                process_file,
+                request,
+                ProcessFileForm(
+                    file_id=file.id,
+                    collection_name=state[knowledge_id]["collection_name"],
+                ),
+                user=user,
+            ): (knowledge_id, file)
+            for knowledge_id, file in tasks
+        }
+
+        for future in as_completed(futures):
+            knowledge_id, file = futures[future]
+            try:
+                future.result()
+                record(knowledge_id, file)
+            except Exception as e:
+                record(knowledge_id, file, e)
+
+            pending[knowledge_id].discard(file.id)
+            if not pending[knowledge_id]:
+                swap(knowledge_id)
+            save_checkpoint()
+    finally:
+        # Stops queued files when the job is cancelled
+        executor.shutdown(wait=True, cancel_futures=True)
 
     log.info(
         f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
     )
-    return True
+    return {
+        "knowledge_bases": len(state),
+        "failed_files": [
+            failed
+            for knowledge_state in state.values()
+            for failed in knowledge_state["failed"]
+        ],
+        "incomplete_knowledge_bases": [
+            knowledge_id
+            for knowledge_id, knowledge_state in state.items()
+            if knowledge_state["failed"]
+        ],
+        "deleted_knowledge_bases": deleted_knowledge_bases,
+    }
 
 
 ############################
@@ -330,11 +535,15 @@ class KnowledgeFileIdForm(BaseModel):
     file_id: str
 
 
-@router.post("/{id}/file/add", response_model=Optional[KnowledgeFilesResponse])
+@router.post(
+    "/{id}/file/add",
+    response_model=Optional[Union[KnowledgeFilesResponse, JobResponse]],
+)
 def add_file_to_knowledge_by_id(
     request: Request,
     id: str,
     form_data: KnowledgeFileIdForm,
+    background: bool = False,
     user=Depends(get_verified_user),
 ):
     knowledge = Knowledges.get_knowledge_by_id(id=id)
@@ -355,6 +564,12 @@ def add_file_to_knowledge_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     file = Files.get_file_by_id(form_data.file_id)
     if not file:
         raise HTTPException(
@@ -367,6 +582,14 @@ def add_file_to_knowledge_by_id(
             detail=ERROR_MESSAGES.FILE_NOT_PROCESSED,
         )
 
+    if background:
+        job = JOB_MANAGER.enqueue(
+            user.id,
+            "knowledge_file_add",
+            {"knowledge_id": id, "file_id": form_data.file_id},
+        )
+        return JobResponse(**job.model_dump())
+
     # Add content to the vector database
     try:
         process_file(
@@ -415,6 +638,17 @@ def add_file_to_knowledge_by_id(
         )
 
 
+@register_job_handler("knowledge_file_add")
+def add_file_to_knowledge_job(request: Request, user, payload: dict) -> dict:
+    add_file_to_knowledge_by_id(
+        request,
+        payload["knowledge_id"],
+        KnowledgeFileIdForm(file_id=payload["file_id"]),
+        user=user,
+    )
+    return payload
+
+
 @router.post("/{id}/file/update", response_model=Optional[KnowledgeFilesResponse])
 def update_file_from_knowledge_by_id(
     request: Request,
@@ -440,6 +674,12 @@ def update_file_from_knowledge_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     file = Files.get_file_by_id(form_data.file_id)
     if not file:
         raise HTTPException(
@@ -510,6 +750,12 @@ def remove_file_from_knowledge_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     file = Files.get_file_by_id(form_data.file_id)
     if not file:
         raise HTTPException(
@@ -598,6 +844,12 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     log.info(f"Deleting knowledge base: {id} (name: {knowledge.name})")
 
     # Get all models
@@ -661,6 +913,12 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
     except Exception as e:
@@ -677,11 +935,15 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 ############################
 
 
-@router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
+@router.post(
+    "/{id}/files/batch/add",
+    response_model=Optional[Union[KnowledgeFilesResponse, JobResponse]],
+)
 def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
+    background: bool = False,
     user=Depends(get_verified_user),
 ):
     """
@@ -704,6 +966,12 @@ def add_files_to_knowledge_batch(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
+    if is_knowledge_reindexing(id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES.KNOWLEDGE_REINDEXING,
+        )
+
     # Get files content
     log.info(f"files/batch/add - {len(form_data)} files")
     files: List[FileModel] = []
@@ -716,6 +984,14 @@ def add_files_to_knowledge_batch(
             )
         files.append(file)
 
+    if background:
+        job = JOB_MANAGER.enqueue(
+            user.id,
+            "knowledge_files_batch_add",
+            {"knowledge_id": id, "file_ids": [file.id for file in files]},
+        )
+        return JobResponse(**job.model_dump())
+
     # Process files
     try:
         result = process_files_batch(
@@ -758,3 +1034,14 @@ def add_files_to_knowledge_batch(
         **knowledge.model_dump(),
         files=Files.get_file_metadatas_by_ids(existing_file_ids),
     )
+
+
+@register_job_handler("knowledge_files_batch_add")
+def add_files_to_knowledge_batch_job(request: Request, user, payload: dict) -> dict:
+    response = add_files_to_knowledge_batch(
+        request,
+        payload["knowledge_id"],
+        [KnowledgeFileIdForm(file_id=file_id) for file_id in payload["file_ids"]],
+        user=user,
+    )
+    return {**payload, "warnings": getattr(response, "warnings", None)}
@@ -1,20 +1,15 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
+from functools import partial
 
 from typing import Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 
 from open_webui.models.chats import Chats
@@ -36,7 +31,7 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, validator
-from starlette.background import BackgroundTask
+from starlette.background import BackgroundTask, BackgroundTasks
 
 
 from open_webui.models.models import Models
@@ -50,6 +45,10 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.balancer import OLLAMA_BALANCER, Candidate
+from open_webui.utils.http_sessions import get_session, release_response
+from open_webui.utils.model_access import MODEL_ACCESS
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 
 from open_webui.config import (
@@ -79,26 +78,26 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with get_session(url).get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -107,10 +106,10 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
 ):
-    if response:
-        response.close()
+    # Shared sessions from `get_session` are left open, see `HTTP_SESSIONS`
+    await release_response(response)
     if session:
         await session.close()
 
@@ -124,15 +123,14 @@ async def send_post_request(
     user: UserModel = None,
 ):
 
+    tracker = OLLAMA_BALANCER.track(url)
     r = None
+    streaming = False
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
-        r = await session.post(
+        r = await get_session(url).post(
             url,
             data=payload,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             headers={
                 "Content-Type": "application/json",
                 **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -149,11 +147,12 @@ async def send_post_request(
             },
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        tracker.response(r.status)
 
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -172,28 +171,78 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            # The node stays busy until the stream ends
+            background = BackgroundTasks()
+            background.add_task(cleanup_response, response=r)
+            background.add_task(tracker.done)
+
+            streaming = True
             return StreamingResponse(
                 r.content,
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=background,
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await cleanup_response(r)
             return res
 
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if r is None:
+            tracker.error(e)
+        await cleanup_response(r)
         detail = f"Ollama: {e}"
 
         raise HTTPException(
             status_code=r.status if r else 500,
             detail=detail if e else "Open WebUI: Server Connection Error",
         )
+    finally:
+        if not streaming:
+            tracker.done()
+
+
+def select_url_idx(request: Request, model: str, url_indices: list[int]) -> int:
+    """Picks which of the `url_indices` serving `model` to use, see `OLLAMA_BALANCER`."""
+    candidates = []
+    for idx in url_indices:
+        url = request.app.state.config.OLLAMA_BASE_URLS[idx]
+        api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
+            str(idx),
+            request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+        )
+        candidates.append(
+            Candidate(idx=idx, url=url, weight=float(api_config.get("weight") or 1))
+        )
+    return OLLAMA_BALANCER.select(candidates, model)
+
+
+def get_health_check_targets(app) -> list:
+    """The enabled Ollama nodes, probed by `OLLAMA_BALANCER.run`."""
+    if not app.state.config.ENABLE_OLLAMA_API:
+        return []
+
+    targets = []
+    for idx, url in enumerate(app.state.config.OLLAMA_BASE_URLS):
+        api_config = app.state.config.OLLAMA_API_CONFIGS.get(
+            str(idx),
+            app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+        )
+        if not api_config.get("enable", True):
+            continue
+
+        key = api_config.get("key", None)
+        targets.append(
+            (
+                url,
+                partial(send_get_request, f"{url}/api/ps", key),
+                api_config.get("prefix_id", None),
+            )
+        )
+    return targets
 
 
 def get_api_key(idx, url, configs):
@@ -283,6 +332,15 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/balancer")
+async def get_balancer_stats(request: Request, user=Depends(get_admin_user)):
+    stats = OLLAMA_BALANCER.get_stats()
+    urls = [url.rstrip("/") for url in request.app.state.config.OLLAMA_BASE_URLS]
+    for node in stats["nodes"]:
+        node["url_idx"] = urls.index(node["url"]) if node["url"] in urls else None
+    return stats
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -306,6 +364,8 @@ async def update_config(
         if key in keys
     }
 
+    await MODEL_REGISTRY.invalidate(request.app, "ollama")
+
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
         "OLLAMA_BASE_URLS": request.app.state.config.OLLAMA_BASE_URLS,
@@ -329,16 +389,20 @@ def merge_ollama_models_lists(model_lists):
     return list(merged_models.values())
 
 
-@cached(ttl=1)
-async def get_all_models(request: Request, user: UserModel = None):
-    log.info("get_all_models()")
+async def fetch_all_models(request: Request, user: UserModel = None):
+    log.info("fetch_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
         request_tasks = []
         for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                request_tasks.append(
+                    MODEL_REGISTRY.last_known_good(
+                        MODEL_REGISTRY.get_connection_key("ollama", idx, url, user),
+                        send_get_request(f"{url}/api/tags", user=user),
+                    )
+                )
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -352,7 +416,10 @@ async def get_all_models(request: Request, user: UserModel = None):
 
                 if enable:
                     request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
+                        MODEL_REGISTRY.last_known_good(
+                            MODEL_REGISTRY.get_connection_key("ollama", idx, url, user),
+                            send_get_request(f"{url}/api/tags", key, user=user),
+                        )
                     )
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
@@ -427,17 +494,32 @@ async def get_all_models(request: Request, user: UserModel = None):
     return models
 
 
+MODEL_REGISTRY.register("ollama", fetch_all_models)
+
+
+async def get_all_models(request: Request, user: UserModel = None):
+    """
+    The models of every Ollama connection, served by `MODEL_REGISTRY`
+    unless user info is forwarded to the connections.
+    """
+    if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+        return await fetch_all_models(request, user=user)
+
+    models = await MODEL_REGISTRY.get(request, "ollama")
+    request.app.state.OLLAMA_MODELS = {
+        model["model"]: model for model in models["models"]
+    }
+    return models
+
+
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    visible_model_ids = MODEL_ACCESS.get_visible_model_ids(user.id)
+    return [
+        model
+        for model in models.get("models", [])
+        if model["model"] in visible_model_ids
+    ]
 
 
 @router.get("/api/tags")
@@ -838,6 +920,7 @@ async def copy_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        await MODEL_REGISTRY.invalidate(request.app, "ollama")
         return True
     except Exception as e:
         log.exception(e)
@@ -903,6 +986,7 @@ async def delete_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        await MODEL_REGISTRY.invalidate(request.app, "ollama")
         return True
     except Exception as e:
         log.exception(e)
@@ -935,7 +1019,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(models[form_data.name]["urls"])
+    url_idx = select_url_idx(request, form_data.name, models[form_data.name]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1009,7 +1093,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1096,7 +1180,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1189,7 +1273,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1256,7 +1340,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(request, model, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -6,7 +6,6 @@ from pathlib import Path
 from typing import Literal, Optional, overload
 
 import aiohttp
-from aiocache import cached
 import requests
 
 
@@ -43,6 +42,9 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.http_sessions import get_session, release_response
+from open_webui.utils.model_access import MODEL_ACCESS
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 
 log = logging.getLogger(__name__)
@@ -59,25 +61,25 @@ log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        async with get_session(url).get(
+            url,
+            timeout=timeout,
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -86,10 +88,10 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
 ):
-    if response:
-        response.close()
+    # Shared sessions from `get_session` are left open, see `HTTP_SESSIONS`
+    await release_response(response)
     if session:
         await session.close()
 
@@ -177,6 +179,8 @@ async def update_config(
         if key in keys
     }
 
+    await MODEL_REGISTRY.invalidate(request.app, "openai")
+
     return {
         "ENABLE_OPENAI_API": request.app.state.config.ENABLE_OPENAI_API,
         "OPENAI_API_BASE_URLS": request.app.state.config.OPENAI_API_BASE_URLS,
@@ -294,10 +298,13 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             url not in request.app.state.config.OPENAI_API_CONFIGS  # Legacy support
         ):
             request_tasks.append(
-                send_get_request(
-                    f"{url}/models",
-                    request.app.state.config.OPENAI_API_KEYS[idx],
-                    user=user,
+                MODEL_REGISTRY.last_known_good(
+                    MODEL_REGISTRY.get_connection_key("openai", idx, url, user),
+                    send_get_request(
+                        f"{url}/models",
+                        request.app.state.config.OPENAI_API_KEYS[idx],
+                        user=user,
+                    ),
                 )
             )
         else:
@@ -314,10 +321,13 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             if enable:
                 if len(model_ids) == 0:
                     request_tasks.append(
-                        send_get_request(
-                            f"{url}/models",
-                            request.app.state.config.OPENAI_API_KEYS[idx],
-                            user=user,
+                        MODEL_REGISTRY.last_known_good(
+                            MODEL_REGISTRY.get_connection_key("openai", idx, url, user),
+                            send_get_request(
+                                f"{url}/models",
+                                request.app.state.config.OPENAI_API_KEYS[idx],
+                                user=user,
+                            ),
                         )
                     )
                 else:
@@ -375,20 +385,14 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("data", []):
-        model_info = Models.get_model_by_id(model["id"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    visible_model_ids = MODEL_ACCESS.get_visible_model_ids(user.id)
+    return [
+        model for model in models.get("data", []) if model["id"] in visible_model_ids
+    ]
 
 
-@cached(ttl=1)
-async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
-    log.info("get_all_models()")
+async def fetch_all_models(request: Request, user: UserModel = None) -> dict[str, list]:
+    log.info("fetch_all_models()")
 
     if not request.app.state.config.ENABLE_OPENAI_API:
         return {"data": []}
@@ -448,6 +452,22 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     return models
 
 
+MODEL_REGISTRY.register("openai", fetch_all_models)
+
+
+async def get_all_models(request: Request, user: UserModel = None) -> dict[str, list]:
+    """
+    The models of every OpenAI connection, served by `MODEL_REGISTRY`
+    unless user info is forwarded to the connections.
+    """
+    if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+        return await fetch_all_models(request, user=user)
+
+    models = await MODEL_REGISTRY.get(request, "openai")
+    request.app.state.OPENAI_MODELS = {model["id"]: model for model in models["data"]}
+    return models
+
+
 @router.get("/models")
 @router.get("/models/{url_idx}")
 async def get_models(
@@ -829,20 +849,16 @@ async def generate_chat_completion(
     payload = json.dumps(payload)
 
     r = None
-    session = None
     streaming = False
     response = None
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
-        r = await session.request(
+        r = await get_session(request_url).request(
             method="POST",
             url=request_url,
             data=payload,
             headers=headers,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
 
@@ -853,9 +869,7 @@ async def generate_chat_completion(
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             try:
@@ -881,10 +895,8 @@ async def generate_chat_completion(
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await cleanup_response(r)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -911,11 +923,9 @@ async def embeddings(request: Request, form_data: dict, user):
     url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
     key = request.app.state.config.OPENAI_API_KEYS[idx]
     r = None
-    session = None
     streaming = False
     try:
-        session = aiohttp.ClientSession(trust_env=True)
-        r = await session.request(
+        r = await get_session(url).request(
             method="POST",
             url=f"{url}/embeddings",
             data=body,
@@ -941,9 +951,7 @@ async def embeddings(request: Request, form_data: dict, user):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -963,10 +971,8 @@ async def embeddings(request: Request, form_data: dict, user):
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await cleanup_response(r)
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -988,7 +994,6 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -1021,8 +1026,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
             headers["Authorization"] = f"Bearer {key}"
             request_url = f"{url}/{path}"
 
-        session = aiohttp.ClientSession(trust_env=True)
-        r = await session.request(
+        r = await get_session(request_url).request(
             method=request.method,
             url=request_url,
             data=body,
@@ -1038,9 +1042,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -1063,7 +1065,5 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming:
+            await cleanup_response(r)
@@ -67,7 +67,10 @@ from open_webui.retrieval.web.sougou import search_sougou
 from open_webui.retrieval.web.firecrawl import search_firecrawl
 from open_webui.retrieval.web.external import search_external
 
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.ingest import ingest_chunks
 from open_webui.retrieval.utils import (
+    ensure_lexical_index,
     get_embedding_function,
     get_model_path,
     query_collection,
@@ -79,6 +82,13 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.jobs import (
+    JOB_MANAGER,
+    JobCancelledError,
+    register_job_handler,
+    update_job_progress,
+)
+from open_webui.models.jobs import JobResponse
 
 from open_webui.config import (
     ENV,
@@ -90,6 +100,7 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    ENABLE_RAG_LEXICAL_INDEX,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -247,6 +258,13 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    if EMBEDDING_CACHE is None:
+        return {"status": False}
+    return {"status": True, **EMBEDDING_CACHE.get_stats()}
+
+
 class OpenAIConfigForm(BaseModel):
     url: str
     key: str
@@ -1096,6 +1114,87 @@ async def update_rag_config(
 ####################################
 
 
+def get_text_splitter(request: Request):
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        return TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
+def get_content_embedding_function(request: Request):
+    return get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+            )
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_API_KEY
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+            )
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        azure_api_version=(
+            request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+            else None
+        ),
+        # Leaves the query slots of `EMBEDDING_CLIENT` to searches
+        background=True,
+    )
+
+
+def get_chunk_metadata(request: Request, doc: Document, metadata: Optional[dict]):
+    metadata = {
+        **doc.metadata,
+        **(metadata if metadata else {}),
+        "embedding_config": json.dumps(
+            {
+                "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+            }
+        ),
+    }
+
+    # ChromaDB does not like datetime formats
+    # for meta-data so convert them to string.
+    for key, value in metadata.items():
+        if (
+            isinstance(value, datetime)
+            or isinstance(value, list)
+            or isinstance(value, dict)
+        ):
+            metadata[key] = str(value)
+    return metadata
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1140,57 +1239,13 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-        docs = text_splitter.split_documents(docs)
+        docs = get_text_splitter(request).split_documents(docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
     texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
-        }
-        for doc in docs
-    ]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if (
-                isinstance(value, datetime)
-                or isinstance(value, list)
-                or isinstance(value, dict)
-            ):
-                metadata[key] = str(value)
+    metadatas = [get_chunk_metadata(request, doc, metadata) for doc in docs]
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
@@ -1206,35 +1261,7 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"adding to collection {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                )
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
-                )
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-            azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                else None
-            ),
-        )
+        embedding_function = get_content_embedding_function(request)
 
         embeddings = embedding_function(
             list(map(lambda x: x.replace("\n", " "), texts)),
@@ -1263,6 +1290,184 @@ def save_docs_to_vector_db(
         raise e
 
 
+def emit_file_event(user, data: dict):
+    # Ingestion runs in AnyIO, job and reindex worker threads alike
+    try:
+        JOB_MANAGER.emit_to_user(user.id, "file-events", data)
+    except Exception as e:
+        log.debug(f"Error emitting file event: {e}")
+
+
+def get_loader_config(request: Request) -> dict:
+    return {
+        "engine": request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+        "DATALAB_MARKER_API_KEY": request.app.state.config.DATALAB_MARKER_API_KEY,
+        "DATALAB_MARKER_LANGS": request.app.state.config.DATALAB_MARKER_LANGS,
+        "DATALAB_MARKER_SKIP_CACHE": request.app.state.config.DATALAB_MARKER_SKIP_CACHE,
+        "DATALAB_MARKER_FORCE_OCR": request.app.state.config.DATALAB_MARKER_FORCE_OCR,
+        "DATALAB_MARKER_PAGINATE": request.app.state.config.DATALAB_MARKER_PAGINATE,
+        "DATALAB_MARKER_STRIP_EXISTING_OCR": request.app.state.config.DATALAB_MARKER_STRIP_EXISTING_OCR,
+        "DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION": request.app.state.config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
+        "DATALAB_MARKER_USE_LLM": request.app.state.config.DATALAB_MARKER_USE_LLM,
+        "DATALAB_MARKER_OUTPUT_FORMAT": request.app.state.config.DATALAB_MARKER_OUTPUT_FORMAT,
+        "EXTERNAL_DOCUMENT_LOADER_URL": request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
+        "EXTERNAL_DOCUMENT_LOADER_API_KEY": request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
+        "TIKA_SERVER_URL": request.app.state.config.TIKA_SERVER_URL,
+        "DOCLING_SERVER_URL": request.app.state.config.DOCLING_SERVER_URL,
+        "DOCLING_PARAMS": {
+            "ocr_engine": request.app.state.config.DOCLING_OCR_ENGINE,
+            "ocr_lang": request.app.state.config.DOCLING_OCR_LANG,
+            "do_picture_description": request.app.state.config.DOCLING_DO_PICTURE_DESCRIPTION,
+            "picture_description_mode": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_MODE,
+            "picture_description_local": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_LOCAL,
+            "picture_description_api": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_API,
+        },
+        "PDF_EXTRACT_IMAGES": request.app.state.config.PDF_EXTRACT_IMAGES,
+        "DOCUMENT_INTELLIGENCE_ENDPOINT": request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+        "DOCUMENT_INTELLIGENCE_KEY": request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
+        "MISTRAL_OCR_API_KEY": request.app.state.config.MISTRAL_OCR_API_KEY,
+    }
+
+
+def get_ingest_config(request: Request) -> dict:
+    # Checkpoints only line up with pages extracted, split and embedded the
+    # same way. API keys don't change the pages and aren't stored with files.
+    return {
+        "loader": {
+            name: value
+            for name, value in get_loader_config(request).items()
+            if not name.endswith("_KEY")
+        },
+        "text_splitter": request.app.state.config.TEXT_SPLITTER,
+        "chunk_size": request.app.state.config.CHUNK_SIZE,
+        "chunk_overlap": request.app.state.config.CHUNK_OVERLAP,
+        "tiktoken_encoding_name": request.app.state.config.TIKTOKEN_ENCODING_NAME,
+        "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+        "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+    }
+
+
+def get_ingest_checkpoint(
+    request: Request, file: FileModel, collection_name: str
+) -> Optional[int]:
+    """
+    Returns how many chunks of `file` an interrupted ingestion already wrote
+    to `collection_name` (0 to start over), or None if the collection was
+    filled some other way.
+    """
+    checkpoint = (file.data or {}).get("ingest") or {}
+
+    if checkpoint.get("collection_name") == collection_name:
+        if checkpoint.get("config") == get_ingest_config(request):
+            return checkpoint.get("chunks", 0)
+
+        log.info(f"ingestion settings changed, restarting {collection_name}")
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+        return 0
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        return None
+    return 0
+
+
+def stream_file_to_vector_db(
+    request: Request,
+    file: FileModel,
+    pages: Iterator[Document],
+    collection_name: str,
+    skip: int = 0,
+    user=None,
+) -> str:
+    """
+    Splits, embeds and inserts `pages` into `collection_name` batch by batch
+    as they are loaded, recording a checkpoint on the file after every batch
+    so a retry resumes after the last written chunk. Progress is emitted to
+    the user as `file-events`. Returns the text content of the pages.
+    """
+    config = get_ingest_config(request)
+    text_splitter = get_text_splitter(request)
+    embedding_function = get_content_embedding_function(request)
+    metadata = {"file_id": file.id, "name": file.filename}
+
+    contents = []
+
+    def progress(stage, counts):
+        data = {
+            "file_id": file.id,
+            "collection_name": collection_name,
+            "stage": stage,
+            "pages": len(contents),
+            **counts,
+        }
+        emit_file_event(user, data)
+        # Stops the ingestion once its job is cancelled
+        update_job_progress(data)
+
+    def chunks():
+        for page in pages:
+            contents.append(page.page_content)
+            yield from text_splitter.split_documents([page])
+
+    def embed(batch):
+        embeddings = embedding_function(
+            [doc.page_content.replace("\n", " ") for doc in batch],
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        )
+        if embeddings is None:
+            raise ValueError(ERROR_MESSAGES.DEFAULT("Error generating embeddings"))
+        return embeddings
+
+    def write(start, batch, vectors):
+        items = [
+            {
+                # Stable ids make rewriting chunks after a resume idempotent
+                "id": str(
+                    uuid.uuid5(
+                        uuid.NAMESPACE_URL, f"{collection_name}/{file.id}/{start + idx}"
+                    )
+                ),
+                "text": doc.page_content,
+                "vector": vectors[idx],
+                "metadata": get_chunk_metadata(request, doc, metadata),
+            }
+            for idx, doc in enumerate(batch)
+        ]
+
+        if skip and start == skip:
+            # Written before the checkpoint of an interrupted run, maybe in part
+            VECTOR_DB_CLIENT.upsert(collection_name=collection_name, items=items)
+        else:
+            VECTOR_DB_CLIENT.insert(collection_name=collection_name, items=items)
+
+        Files.update_file_data_by_id(
+            file.id,
+            {
+                "ingest": {
+                    "collection_name": collection_name,
+                    "config": config,
+                    "chunks": start + len(batch),
+                }
+            },
+        )
+
+    log.info(f"streaming file {file.id} to collection {collection_name} from {skip}")
+    if ingest_chunks(chunks(), embed, write, skip=skip, progress=progress) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    text_content = " ".join(contents)
+    # Only known once every page is loaded, the chunks are written before
+    VECTOR_DB_CLIENT.update_metadata(
+        collection_name=collection_name,
+        filter={"file_id": file.id},
+        metadata={"hash": calculate_sha256_string(text_content)},
+    )
+
+    Files.update_file_data_by_id(file.id, {"ingest": None})
+    return text_content
+
+
 class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
@@ -1273,12 +1478,20 @@ class ProcessFileForm(BaseModel):
 def process_file(
     request: Request,
     form_data: ProcessFileForm,
+    background: bool = False,
     user=Depends(get_verified_user),
 ):
+    if background:
+        job = JOB_MANAGER.enqueue(
+            user.id, "process_file", form_data.model_dump(), priority=1
+        )
+        return JobResponse(**job.model_dump())
+
     try:
         file = Files.get_file_by_id(form_data.file_id)
 
         collection_name = form_data.collection_name
+        streamed = False
 
         if collection_name is None:
             collection_name = f"file-{file.id}"
@@ -1345,39 +1558,19 @@ def process_file(
             file_path = file.path
             if file_path:
                 file_path = Storage.get_file(file_path)
-                loader = Loader(
-                    engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                    DATALAB_MARKER_API_KEY=request.app.state.config.DATALAB_MARKER_API_KEY,
-                    DATALAB_MARKER_LANGS=request.app.state.config.DATALAB_MARKER_LANGS,
-                    DATALAB_MARKER_SKIP_CACHE=request.app.state.config.DATALAB_MARKER_SKIP_CACHE,
-                    DATALAB_MARKER_FORCE_OCR=request.app.state.config.DATALAB_MARKER_FORCE_OCR,
-                    DATALAB_MARKER_PAGINATE=request.app.state.config.DATALAB_MARKER_PAGINATE,
-                    DATALAB_MARKER_STRIP_EXISTING_OCR=request.app.state.config.DATALAB_MARKER_STRIP_EXISTING_OCR,
-                    DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION=request.app.state.config.DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION,
-                    DATALAB_MARKER_USE_LLM=request.app.state.config.DATALAB_MARKER_USE_LLM,
-                    DATALAB_MARKER_OUTPUT_FORMAT=request.app.state.config.DATALAB_MARKER_OUTPUT_FORMAT,
-                    EXTERNAL_DOCUMENT_LOADER_URL=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_URL,
-                    EXTERNAL_DOCUMENT_LOADER_API_KEY=request.app.state.config.EXTERNAL_DOCUMENT_LOADER_API_KEY,
-                    TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                    DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
-                    DOCLING_PARAMS={
-                        "ocr_engine": request.app.state.config.DOCLING_OCR_ENGINE,
-                        "ocr_lang": request.app.state.config.DOCLING_OCR_LANG,
-                        "do_picture_description": request.app.state.config.DOCLING_DO_PICTURE_DESCRIPTION,
-                        "picture_description_mode": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_MODE,
-                        "picture_description_local": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_LOCAL,
-                        "picture_description_api": request.app.state.config.DOCLING_PICTURE_DESCRIPTION_API,
-                    },
-                    PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                    DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                    DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
-                    MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
-                )
-                docs = loader.load(
-                    file.filename, file.meta.get("content_type"), file_path
+                loader = Loader(**get_loader_config(request))
+
+                skip = (
+                    None
+                    if request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+                    else get_ingest_checkpoint(request, file, collection_name)
                 )
+                if skip is not None:
+                    load = loader.lazy_load
+                else:
+                    load = loader.load
 
-                docs = [
+                docs = (
                     Document(
                         page_content=doc.page_content,
                         metadata={
@@ -1388,8 +1581,19 @@ def process_file(
                             "source": file.filename,
                         },
                     )
-                    for doc in docs
-                ]
+                    for doc in load(
+                        file.filename, file.meta.get("content_type"), file_path
+                    )
+                )
+
+                if skip is not None:
+                    # Pages are indexed while loading, see `stream_file_to_vector_db`
+                    text_content = stream_file_to_vector_db(
+                        request, file, docs, collection_name, skip=skip, user=user
+                    )
+                    streamed = True
+                else:
+                    docs = list(docs)
             else:
                 docs = [
                     Document(
@@ -1403,7 +1607,8 @@ def process_file(
                         },
                     )
                 ]
-            text_content = " ".join([doc.page_content for doc in docs])
+            if not streamed:
+                text_content = " ".join([doc.page_content for doc in docs])
 
         log.debug(f"text_content: {text_content}")
         Files.update_file_data_by_id(
@@ -1416,7 +1621,7 @@ def process_file(
 
         if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
-                result = save_docs_to_vector_db(
+                result = streamed or save_docs_to_vector_db(
                     request,
                     docs=docs,
                     collection_name=collection_name,
@@ -1453,6 +1658,9 @@ def process_file(
                 "content": text_content,
             }
 
+    except JobCancelledError:
+        # Let the job manager record the cancellation
+        raise
     except Exception as e:
         log.exception(e)
         if "No pandoc was found" in str(e):
@@ -1467,6 +1675,13 @@ def process_file(
             )
 
 
+@register_job_handler("process_file")
+def process_file_job(request: Request, user, payload: dict) -> dict:
+    result = process_file(request, ProcessFileForm(**payload), user=user)
+    # The content is already stored on the file
+    return {key: value for key, value in (result or {}).items() if key != "content"}
+
+
 class ProcessTextForm(BaseModel):
     name: str
     content: str
@@ -1967,9 +2182,14 @@ def query_doc_handler(
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
             collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
+            if ENABLE_RAG_LEXICAL_INDEX and ensure_lexical_index(
+                form_data.collection_name
+            ):
+                collection_results[form_data.collection_name] = None
+            else:
+                collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
+                    collection_name=form_data.collection_name
+                )
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
                 collection_result=collection_results[form_data.collection_name],
@@ -2169,7 +2389,8 @@ def process_files_batch(
 
     # Prepare all documents first
     all_docs: List[Document] = []
-    for file in form_data.files:
+    for idx, file in enumerate(form_data.files):
+        update_job_progress({"files": idx, "total": len(form_data.files)})
         try:
             text_content = file.data.get("content", "")
 
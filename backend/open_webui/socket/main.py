@@ -2,7 +2,6 @@ import asyncio
 import socketio
 import logging
 import sys
-import time
 from redis import asyncio as aioredis
 
 from open_webui.models.users import Users, UserNameResponse
@@ -17,12 +16,20 @@ from open_webui.env import (
     ENABLE_WEBSOCKET_SUPPORT,
     WEBSOCKET_MANAGER,
     WEBSOCKET_REDIS_URL,
-    WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_EVENT_COALESCE_INTERVAL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.utils.content_delta import apply_content_delta, merge_content_deltas
+from open_webui.socket.utils import (
+    AsyncLocalDict,
+    AsyncLocalSetDict,
+    AsyncLocalUsagePool,
+    AsyncRedisDict,
+    AsyncRedisSetDict,
+    AsyncRedisUsagePool,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -72,72 +79,26 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         "open-webui:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USAGE_POOL = RedisDict(
-        "open-webui:usage_pool",
+    USER_POOL = AsyncRedisSetDict(
+        "open-webui:user_sessions",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-
-    clean_up_lock = RedisLock(
+    USAGE_POOL = AsyncRedisUsagePool(
+        "open-webui:usage_models",
+        timeout=TIMEOUT_DURATION,
         redis_url=WEBSOCKET_REDIS_URL,
-        lock_name="usage_cleanup_lock",
-        timeout_secs=WEBSOCKET_REDIS_LOCK_TIMEOUT,
         redis_sentinels=redis_sentinels,
     )
-    aquire_func = clean_up_lock.aquire_lock
-    renew_func = clean_up_lock.renew_lock
-    release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
-    aquire_func = release_func = renew_func = lambda: True
-
-
-async def periodic_usage_pool_cleanup():
-    if not aquire_func():
-        log.debug("Usage pool cleanup lock already exists. Not running it.")
-        return
-    log.debug("Running periodic_usage_pool_cleanup")
-    try:
-        while True:
-            if not renew_func():
-                log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
-                raise Exception("Unable to renew usage pool cleanup lock.")
-
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
-            await asyncio.sleep(TIMEOUT_DURATION)
-    finally:
-        release_func()
+    SESSION_POOL = AsyncLocalDict("session_pool")
+    USER_POOL = AsyncLocalSetDict("user_sessions")
+    USAGE_POOL = AsyncLocalUsagePool("usage_models", timeout=TIMEOUT_DURATION)
 
 
 app = socketio.ASGIApp(
@@ -146,61 +107,57 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.models_in_use()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
+    users = await SESSION_POOL.get_many(
+        [session_id[0] for session_id in active_session_ids]
     )
+    active_user_ids = list(set([user["id"] for user in users.values()]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await USER_POOL.contains(user_id)
+
+
+async def add_user_session(sid, user):
+    await SESSION_POOL.set(sid, user.model_dump())
+    await USER_POOL.add(user.id, sid)
+    await sio.enter_room(sid, f"user:{user.id}")
 
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
-        model_id = data["model"]
-        # Record the timestamp for the last update
-        current_time = int(time.time())
-
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+    if await SESSION_POOL.contains(sid):
+        # Record the heartbeat, the model expires from the pool on its own
+        await USAGE_POOL.heartbeat(data["model"])
 
 
 @sio.event
@@ -213,11 +170,7 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await add_user_session(sid, user)
 
 
 @sio.on("user-join")
@@ -235,11 +188,7 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await add_user_session(sid, user)
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -292,7 +241,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**await SESSION_POOL.get(sid)).model_dump(),
             },
             room=room,
         )
@@ -300,78 +249,136 @@ async def channel_events(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+    user = await SESSION_POOL.get(sid)
+    if user:
+        await SESSION_POOL.delete(sid)
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        await USER_POOL.remove(user["id"], sid)
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
-def get_event_emitter(request_info, update_db=True):
-    async def __event_emitter__(event_data):
-        user_id = request_info["user_id"]
-
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
-                    [request_info.get("session_id")]
-                    if request_info.get("session_id")
-                    else []
-                )
-            )
-        )
+class EventEmitter:
+    """
+    Per-request `__event_emitter__`.
+
+    Events are emitted once to the user's `user:{id}` room (and the requesting
+    session) instead of once per session id. Streamed `chat:completion`
+    content events arriving within `coalesce_interval` seconds of each other
+    are merged and emitted as a single event.
+    """
+
+    def __init__(
+        self,
+        request_info,
+        update_db=True,
+        coalesce_interval=WEBSOCKET_EVENT_COALESCE_INTERVAL,
+    ):
+        self.request_info = request_info
+        self.update_db = update_db
+        self.coalesce_interval = coalesce_interval
+
+        self.rooms = [f"user:{request_info['user_id']}"]
+        if request_info.get("session_id"):
+            self.rooms.append(request_info["session_id"])
+
+        self._pending = None
+        self._flush_task = None
+        # Keeps flushed and direct emits in order
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, event_data):
+        if (
+            self.coalesce_interval > 0
+            and event_data.get("type") == "chat:completion"
+            and self._coalesce(event_data.get("data", {}))
+        ):
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+            return
+
+        await self.flush()
+        await self._emit(event_data)
+
+        if self.update_db:
+            self._update_db(event_data)
+
+    def _coalesce(self, data):
+        keys = set(data)
+        pending = self._pending
+
+        if keys == {"content"} or keys == {"seq", "content"}:
+            # Full content supersedes anything pending
+            self._pending = data
+        elif keys == {"seq", "delta"}:
+            if pending is None:
+                self._pending = data
+            elif "delta" in pending:
+                self._pending = {
+                    "seq_start": pending.get("seq_start", pending["seq"]),
+                    "seq": data["seq"],
+                    "delta": merge_content_deltas(pending["delta"], data["delta"]),
+                }
+            elif "seq" in pending:
+                self._pending = {
+                    "seq": data["seq"],
+                    "content": apply_content_delta(pending["content"], data["delta"]),
+                }
+            else:
+                return False
+        else:
+            return False
 
-        emit_tasks = [
-            sio.emit(
+        return True
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.coalesce_interval)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        if self._pending is None:
+            return
+
+        data, self._pending = self._pending, None
+        await self._emit({"type": "chat:completion", "data": data})
+
+    async def _emit(self, event_data):
+        async with self._lock:
+            await sio.emit(
                 "chat-events",
                 {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
+                    "chat_id": self.request_info.get("chat_id", None),
+                    "message_id": self.request_info.get("message_id", None),
                     "data": event_data,
                 },
-                to=session_id,
+                to=self.rooms,
             )
-            for session_id in session_ids
-        ]
-
-        await asyncio.gather(*emit_tasks)
 
-        if update_db:
-            if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    event_data.get("data", {}),
-                )
-
-            if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
+    def _update_db(self, event_data):
+        request_info = self.request_info
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
+        if "type" in event_data and event_data["type"] == "status":
+            Chats.add_message_status_to_chat_by_id_and_message_id(
+                request_info["chat_id"],
+                request_info["message_id"],
+                event_data.get("data", {}),
+            )
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
+        if "type" in event_data and event_data["type"] == "message":
+            message = Chats.get_message_by_id_and_message_id(
+                request_info["chat_id"],
+                request_info["message_id"],
+            )
 
-            if "type" in event_data and event_data["type"] == "replace":
-                content = event_data.get("data", {}).get("content", "")
+            if message:
+                content = message.get("content", "")
+                content += event_data.get("data", {}).get("content", "")
 
                 Chats.upsert_message_to_chat_by_id_and_message_id(
                     request_info["chat_id"],
@@ -381,7 +388,20 @@ def get_event_emitter(request_info, update_db=True):
                     },
                 )
 
-    return __event_emitter__
+        if "type" in event_data and event_data["type"] == "replace":
+            content = event_data.get("data", {}).get("content", "")
+
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                request_info["chat_id"],
+                request_info["message_id"],
+                {
+                    "content": content,
+                },
+            )
+
+
+def get_event_emitter(request_info, update_db=True):
+    return EventEmitter(request_info, update_db=update_db)
 
 
 def get_event_call(request_info):
@@ -1,91 +1,259 @@
 import json
-import uuid
+import time
+
+from redis.exceptions import WatchError
+
 from open_webui.utils.redis import get_redis_connection
 
 
-class RedisLock:
-    def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
-        self.lock_name = lock_name
-        self.lock_id = str(uuid.uuid4())
-        self.timeout_secs = timeout_secs
-        self.lock_obtained = False
-        self.redis = get_redis_connection(
-            redis_url, redis_sentinels, decode_responses=True
-        )
+class AsyncRedisDict:
+    """
+    Dict-like asyncio view of a Redis hash of JSON values.
 
-    def aquire_lock(self):
-        # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
-            self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
-        )
-        return self.lock_obtained
+    Multi-key operations (`get_many`, `set_many`, `delete_many`) complete in
+    a single round-trip.
+    """
 
-    def renew_lock(self):
-        # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
-            self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
+    def __init__(self, name, redis_url=None, redis_sentinels=[], redis=None):
+        self.name = name
+        self.redis = redis or get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
         )
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
-        if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+    async def get(self, key, default=None):
+        value = await self.redis.hget(self.name, key)
+        if value is None:
+            return default
+        return json.loads(value)
+
+    async def set(self, key, value):
+        await self.redis.hset(self.name, key, json.dumps(value))
+
+    async def delete(self, key) -> bool:
+        return await self.redis.hdel(self.name, key) > 0
+
+    async def contains(self, key) -> bool:
+        return await self.redis.hexists(self.name, key)
+
+    async def length(self) -> int:
+        return await self.redis.hlen(self.name)
+
+    async def keys(self) -> list:
+        return await self.redis.hkeys(self.name)
+
+    async def values(self) -> list:
+        return [json.loads(v) for v in await self.redis.hvals(self.name)]
+
+    async def items(self) -> list:
+        return [
+            (k, json.loads(v)) for k, v in (await self.redis.hgetall(self.name)).items()
+        ]
+
+    async def get_many(self, keys) -> dict:
+        keys = list(keys)
+        if not keys:
+            return {}
 
+        values = await self.redis.hmget(self.name, keys)
+        return {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
 
-class RedisDict:
-    def __init__(self, name, redis_url, redis_sentinels=[]):
+    async def set_many(self, mapping):
+        if mapping:
+            await self.redis.hset(
+                self.name, mapping={k: json.dumps(v) for k, v in mapping.items()}
+            )
+
+    async def delete_many(self, keys) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        return await self.redis.hdel(self.name, *keys)
+
+    async def clear(self):
+        await self.redis.delete(self.name)
+
+
+class AsyncLocalDict:
+    """In-memory `AsyncRedisDict` for single-node deployments."""
+
+    def __init__(self, name=None):
         self.name = name
-        self.redis = get_redis_connection(
-            redis_url, redis_sentinels, decode_responses=True
+        self.data = {}
+
+    async def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+    async def delete(self, key) -> bool:
+        if key not in self.data:
+            return False
+        del self.data[key]
+        return True
+
+    async def contains(self, key) -> bool:
+        return key in self.data
+
+    async def length(self) -> int:
+        return len(self.data)
+
+    async def keys(self) -> list:
+        return list(self.data.keys())
+
+    async def values(self) -> list:
+        return list(self.data.values())
+
+    async def items(self) -> list:
+        return list(self.data.items())
+
+    async def get_many(self, keys) -> dict:
+        return {k: self.data[k] for k in keys if k in self.data}
+
+    async def set_many(self, mapping):
+        self.data.update(mapping)
+
+    async def delete_many(self, keys) -> int:
+        return sum([await self.delete(k) for k in list(keys)])
+
+    async def clear(self):
+        self.data.clear()
+
+
+class AsyncRedisSetDict:
+    """
+    Dict-like asyncio view of Redis sets, one per key, e.g. the sessions of
+    each user. Members are added and removed atomically, so concurrent
+    updates of the same key are never lost.
+
+    The set of `key` lives at "{name}:{key}", and the set at `name` indexes
+    the keys with at least one member.
+    """
+
+    def __init__(self, name, redis_url=None, redis_sentinels=[], redis=None):
+        self.name = name
+        self.redis = redis or get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
         )
 
-    def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
-        self.redis.hset(self.name, key, serialized_value)
+    def _key(self, key) -> str:
+        return f"{self.name}:{key}"
 
-    def __getitem__(self, key):
-        value = self.redis.hget(self.name, key)
-        if value is None:
-            raise KeyError(key)
-        return json.loads(value)
+    async def add(self, key, member):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(self._key(key), member)
+            pipe.sadd(self.name, key)
+            await pipe.execute()
 
-    def __delitem__(self, key):
-        result = self.redis.hdel(self.name, key)
-        if result == 0:
-            raise KeyError(key)
+    async def remove(self, key, member) -> int:
+        """Removes `member` from `key` and returns how many members are left."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Retried when a member is added before the key is unindexed
+                    await pipe.watch(self._key(key))
+                    await pipe.srem(self._key(key), member)
+                    remaining = await pipe.scard(self._key(key))
+                    pipe.multi()
+                    if remaining == 0:
+                        pipe.srem(self.name, key)
+                    await pipe.execute()
+                    return remaining
+                except WatchError:
+                    continue
 
-    def __contains__(self, key):
-        return self.redis.hexists(self.name, key)
+    async def get(self, key) -> list:
+        return list(await self.redis.smembers(self._key(key)))
 
-    def __len__(self):
-        return self.redis.hlen(self.name)
+    async def contains(self, key) -> bool:
+        return bool(await self.redis.sismember(self.name, key))
 
-    def keys(self):
-        return self.redis.hkeys(self.name)
+    async def length(self) -> int:
+        return await self.redis.scard(self.name)
 
-    def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+    async def keys(self) -> list:
+        return list(await self.redis.smembers(self.name))
 
-    def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
 
-    def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+class AsyncLocalSetDict:
+    """In-memory `AsyncRedisSetDict` for single-node deployments."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.data = {}
+
+    async def add(self, key, member):
+        self.data.setdefault(key, set()).add(member)
+
+    async def remove(self, key, member) -> int:
+        members = self.data.get(key, set())
+        members.discard(member)
+        if not members:
+            self.data.pop(key, None)
+        return len(members)
+
+    async def get(self, key) -> list:
+        return list(self.data.get(key, ()))
 
-    def clear(self):
-        self.redis.delete(self.name)
+    async def contains(self, key) -> bool:
+        return key in self.data
+
+    async def length(self) -> int:
+        return len(self.data)
+
+    async def keys(self) -> list:
+        return list(self.data.keys())
+
+
+class AsyncRedisUsagePool:
+    """
+    Tracks the models in use as a Redis sorted set of model ids scored by
+    their latest heartbeat.
+
+    A model stays in use for `timeout` seconds after its last heartbeat.
+    Stale members are trimmed by score range on each heartbeat, so both
+    heartbeats and `models_in_use` are O(log n) and no periodic scan over all
+    sessions is needed.
+    """
+
+    def __init__(self, name, timeout, redis_url=None, redis_sentinels=[], redis=None):
+        self.name = name
+        self.timeout = timeout
+        self.redis = redis or get_redis_connection(
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+
+    async def heartbeat(self, model_id, now=None):
+        now = time.time() if now is None else now
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            # GT keeps the latest heartbeat across replicas with skewed clocks
+            pipe.zadd(self.name, {model_id: now}, gt=True)
+            pipe.zremrangebyscore(self.name, "-inf", f"({now - self.timeout}")
+            await pipe.execute()
+
+    async def models_in_use(self, now=None) -> list:
+        now = time.time() if now is None else now
+        return await self.redis.zrangebyscore(self.name, now - self.timeout, "+inf")
+
+
+class AsyncLocalUsagePool:
+    """In-memory `AsyncRedisUsagePool` for single-node deployments."""
+
+    def __init__(self, name=None, timeout=3):
+        self.name = name
+        self.timeout = timeout
+        self.heartbeats = {}
 
-    def update(self, other=None, **kwargs):
-        if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
+    async def heartbeat(self, model_id, now=None):
+        now = time.time() if now is None else now
+        self.heartbeats[model_id] = max(self.heartbeats.get(model_id, now), now)
 
-    def setdefault(self, key, default=None):
-        if key not in self:
-            self[key] = default
-        return self[key]
+    async def models_in_use(self, now=None) -> list:
+        now = time.time() if now is None else now
+        self.heartbeats = {
+            model_id: heartbeat
+            for model_id, heartbeat in self.heartbeats.items()
+            if now - heartbeat <= self.timeout
+        }
+        return list(self.heartbeats.keys())
@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch):
+    """
+    Returns `create(tables, modules)`, which creates `tables` in a new
+    in-memory SQLite database, points the `get_db` of each of `modules` at
+    it and returns its engine.
+    """
+
+    def create(tables, modules):
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        tables[0].metadata.create_all(engine, tables=tables)
+        SessionLocal = sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+
+        @contextmanager
+        def get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        for module in modules:
+            monkeypatch.setattr(module, "get_db", get_db)
+        return engine
+
+    return create
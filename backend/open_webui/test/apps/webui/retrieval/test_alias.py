@@ -0,0 +1,121 @@
+import pytest
+
+from open_webui.retrieval.vector import alias
+from open_webui.retrieval.vector.alias import (
+    AliasedVectorDB,
+    CollectionAlias,
+    CollectionAliases,
+    RetiredCollection,
+)
+from open_webui.retrieval.vector.main import GetResult, SearchResult, VectorDBBase
+
+
+class FakeVectorDB(VectorDBBase):
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(items)
+
+    def upsert(self, collection_name, items):
+        self.insert(collection_name, items)
+
+    def search(self, collection_name, vectors, limit, include_vectors=False):
+        if collection_name not in self.collections:
+            return None
+        ids = [item["id"] for item in self.collections[collection_name]][:limit]
+        return SearchResult(
+            ids=[ids],
+            documents=[ids],
+            metadatas=[[{} for _ in ids]],
+            distances=[[1.0 for _ in ids]],
+        )
+
+    def query(self, collection_name, filter, limit=None):
+        pass
+
+    def get(self, collection_name):
+        if collection_name not in self.collections:
+            return None
+        ids = [item["id"] for item in self.collections[collection_name]]
+        return GetResult(ids=[ids], documents=[ids], metadatas=[[{} for _ in ids]])
+
+    def delete(self, collection_name, ids=None, filter=None):
+        pass
+
+    def reset(self):
+        self.collections = {}
+
+
+@pytest.fixture
+def aliases(sqlite_db):
+    sqlite_db([CollectionAlias.__table__, RetiredCollection.__table__], [alias])
+    return CollectionAliases(ttl=0)
+
+
+def item(id: str) -> dict:
+    return {"id": id, "text": id, "vector": [0.0], "metadata": {}}
+
+
+def test_swap_collection_serves_shadow(aliases):
+    client = FakeVectorDB()
+    db = AliasedVectorDB(client, aliases)
+    db.insert("kb", [item("old")])
+    db.insert("kb-shadow", [item("new")])
+
+    db.swap_collection("kb", "kb-shadow")
+
+    assert db.search("kb", [[0.0]], 10).ids == [["new"]]
+    assert db.search_many(["kb"], [[0.0]], 10)["kb"].ids == [["new"]]
+    # The old collection is dropped once other instances stop using it
+    assert db.drop_retired_collections() == ["kb"]
+    assert not client.has_collection("kb")
+
+    db.insert("kb", [item("more")])
+    assert db.get("kb").ids == [["new", "more"]]
+
+    # Swapping again drops the collection served until now
+    db.insert("kb-shadow-2", [item("newer")])
+    db.swap_collection("kb", "kb-shadow-2")
+    assert db.get("kb").ids == [["newer"]]
+    assert db.drop_retired_collections() == ["kb-shadow"]
+    assert not client.has_collection("kb-shadow")
+
+
+def test_retired_collection_survives_restart(aliases):
+    client = FakeVectorDB()
+    db = AliasedVectorDB(client, CollectionAliases(ttl=60))
+    db.insert("kb", [item("old")])
+    db.insert("kb-shadow", [item("new")])
+
+    db.swap_collection("kb", "kb-shadow")
+
+    # Other instances may still read it until their alias cache expires
+    assert db.drop_retired_collections() == []
+    assert client.has_collection("kb")
+
+    # A new process finds the pending drop in the database
+    restarted = AliasedVectorDB(client, CollectionAliases(ttl=0))
+    assert restarted.drop_retired_collections() == ["kb"]
+    assert not client.has_collection("kb")
+    assert restarted.get("kb").ids == [["new"]]
+
+
+def test_delete_collection_removes_alias(aliases):
+    client = FakeVectorDB()
+    db = AliasedVectorDB(client, aliases)
+    db.insert("kb-shadow", [item("new")])
+    db.swap_collection("kb", "kb-shadow")
+
+    db.delete_collection("kb")
+
+    assert not client.has_collection("kb-shadow")
+    assert aliases.resolve("kb") == "kb"
+    assert not db.has_collection("kb")
+    assert db.drop_retired_collections() == []
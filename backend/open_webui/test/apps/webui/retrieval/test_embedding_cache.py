@@ -0,0 +1,120 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from open_webui.retrieval.embedding_cache import (
+    DiskEmbeddingStore,
+    EmbeddingCache,
+    encode_embedding,
+    get_cached_embedding_function,
+    get_embedding_cache_key,
+)
+
+
+class Engine:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query, prefix=None, user=None):
+        self.calls.append(query)
+        if isinstance(query, list):
+            return [[float(len(text)), 0.1] for text in query]
+        return [float(len(query)), 0.1]
+
+
+def test_only_missing_texts_are_embedded(tmp_path):
+    cache = EmbeddingCache(size=10, directory=str(tmp_path))
+    engine = Engine()
+    embed = get_cached_embedding_function(cache, "openai", "model", engine)
+
+    assert embed(["a", "bb"]) == [[1.0, 0.1], [2.0, 0.1]]
+    assert embed(["bb", "ccc", "bb"]) == [[2.0, 0.1], [3.0, 0.1], [2.0, 0.1]]
+    assert embed("a") == [1.0, 0.1]
+    assert engine.calls == [["a", "bb"], ["ccc"]]
+
+    # Prefixes are part of the key
+    assert embed("a", prefix="query: ") == [1.0, 0.1]
+    assert engine.calls[-1] == "a"
+
+    stats = cache.get_stats()
+    assert stats["misses"] == 4
+    assert stats["hits"]["memory"] == 2
+
+
+def test_slower_tiers_are_shared_and_promoted(tmp_path):
+    redis = fakeredis.FakeRedis()
+    key = get_embedding_cache_key("ollama", "model", None, "text")
+
+    EmbeddingCache(size=10, directory=str(tmp_path / "a"), redis=redis).set_many(
+        {key: [0.5, 0.25]}
+    )
+
+    # Another host only shares Redis
+    cache = EmbeddingCache(size=10, directory=str(tmp_path / "b"), redis=redis)
+    assert cache.get_many([key]) == {key: [0.5, 0.25]}
+    assert cache.get_stats()["hits"]["redis"] == 1
+
+    # Another worker on that host only shares the disk
+    cache = EmbeddingCache(size=10, directory=str(tmp_path / "b"))
+    assert cache.get_many([key]) == {key: [0.5, 0.25]}
+    assert cache.get_many([key]) == {key: [0.5, 0.25]}
+    assert cache.get_stats()["hits"] == {"memory": 1, "disk": 1, "redis": 0}
+
+
+def test_memory_tier_is_bounded():
+    cache = EmbeddingCache(size=2, directory=None)
+    cache.set_many({"a": [1.0], "b": [2.0]})
+    cache.get_many(["a"])
+    cache.set_many({"c": [3.0]})
+
+    assert list(cache.memory) == ["a", "c"]
+
+
+def test_failed_embeddings_are_not_cached():
+    cache = EmbeddingCache(size=10, directory=None)
+    embed = get_cached_embedding_function(
+        cache, "openai", "model", lambda query, prefix=None, user=None: None
+    )
+
+    assert embed(["a"]) is None
+    assert embed("a") is None
+    assert cache.memory == {}
+
+
+def test_engine_urls_are_part_of_the_key():
+    cache = EmbeddingCache(size=10, directory=None)
+    engine = Engine()
+    for url in ["http://a", "http://b", "http://a"]:
+        get_cached_embedding_function(cache, "ollama", "model", engine, url=url)("a")
+
+    assert engine.calls == ["a", "a"]
+
+
+def test_missing_embeddings_raise():
+    cache = EmbeddingCache(size=10, directory=None)
+    embed = get_cached_embedding_function(
+        cache, "openai", "model", lambda query, prefix=None, user=None: [[1.0]]
+    )
+
+    with pytest.raises(ValueError, match="1 embeddings for 2 texts"):
+        embed(["a", "b"])
+    assert cache.memory == {}
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    # Each vector takes 4 * 64 bytes as float32
+    store = DiskEmbeddingStore(str(tmp_path), max_size=4 * 64 * 10)
+    vector = encode_embedding([0.5] * 64)
+    assert len(vector) == 4 * 64
+
+    store.set_many({f"old-{idx}": vector for idx in range(5)})
+    store.conn.execute(f"UPDATE {store.table} SET accessed_at = rowid")
+    store.conn.commit()
+    store.get_many(["old-0"])
+    store.set_many({f"new-{idx}": vector for idx in range(6)})
+
+    keys = {key for (key,) in store.conn.execute(f"SELECT key FROM {store.table}")}
+    assert store.size <= store.max_size
+    assert "old-0" in keys
+    assert {f"new-{idx}" for idx in range(6)} <= keys
+    assert {"old-1", "old-2"}.isdisjoint(keys)
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from aiohttp import web
+
+from open_webui.retrieval.embedding_client import (
+    EmbeddingClient,
+    EmbeddingRequestError,
+    get_retry_after,
+)
+
+
+class EmbeddingServer:
+    """OpenAI-style `/embeddings` endpoint with scripted failures."""
+
+    def __init__(
+        self, max_batch_size: int = 100, rate_limited: int = 0, delay: float = 0.01
+    ):
+        self.max_batch_size = max_batch_size
+        self.rate_limited = rate_limited
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        data = await request.json()
+        texts = data["input"]
+
+        if self.rate_limited:
+            self.rate_limited -= 1
+            return web.json_response(
+                {"error": "rate limited"}, status=429, headers={"Retry-After": "0"}
+            )
+        if len(texts) > self.max_batch_size:
+            return web.json_response({"error": "batch too large"}, status=413)
+
+        self.batches.append(texts)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        return web.json_response(
+            {"data": [{"embedding": [float(text)]} for text in texts]}
+        )
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_post("/embeddings", self.handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/embeddings"
+
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def embed(
+    client: EmbeddingClient,
+    url: str,
+    texts: list[str],
+    batch_size: int,
+    background: bool = True,
+):
+    return client.embed(
+        url,
+        headers={},
+        texts=texts,
+        payload=lambda batch: {"input": batch},
+        parse=lambda data: [elem["embedding"] for elem in data["data"]],
+        batch_size=batch_size,
+        background=background,
+    )
+
+
+def test_batches_run_concurrently_in_order():
+    texts = [str(i) for i in range(40)]
+    client = EmbeddingClient(concurrency=4, timeout=10)
+
+    with EmbeddingServer() as server:
+        try:
+            assert embed(client, server.url, texts, 5) == [[float(t)] for t in texts]
+        finally:
+            client.close()
+
+    assert len(server.batches) == 8
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_rate_limits_are_retried():
+    client = EmbeddingClient(concurrency=2, max_retries=3, timeout=10)
+
+    with EmbeddingServer(rate_limited=3) as server:
+        try:
+            assert embed(client, server.url, ["1", "2"], 2) == [[1.0], [2.0]]
+        finally:
+            client.close()
+
+    with EmbeddingServer(rate_limited=10) as server:
+        client = EmbeddingClient(concurrency=2, max_retries=1, timeout=10)
+        try:
+            with pytest.raises(EmbeddingRequestError):
+                embed(client, server.url, ["1"], 1)
+        finally:
+            client.close()
+
+
+def test_oversized_batches_are_split():
+    texts = [str(i) for i in range(10)]
+    client = EmbeddingClient(concurrency=4, timeout=10)
+
+    with EmbeddingServer(max_batch_size=3) as server:
+        try:
+            assert embed(client, server.url, texts, 10) == [[float(t)] for t in texts]
+            assert client.batch_sizes[server.url] <= 3
+
+            # The learned size is used up front for the next call
+            server.batches.clear()
+            assert embed(client, server.url, texts, 10) == [[float(t)] for t in texts]
+            assert all(len(batch) <= 3 for batch in server.batches)
+        finally:
+            client.close()
+
+
+def test_queries_have_their_own_slots():
+    client = EmbeddingClient(concurrency=1, query_concurrency=1, timeout=10)
+
+    with EmbeddingServer(delay=0.2) as server:
+        try:
+            ingestion = threading.Thread(
+                target=embed, args=(client, server.url, ["1", "2", "3", "4", "5"], 1)
+            )
+            ingestion.start()
+            while not server.batches:
+                time.sleep(0.01)
+
+            # Served while the ingestion batches are still queued
+            assert embed(client, server.url, ["6"], 1, background=False) == [[6.0]]
+            assert len(server.batches) < 5
+            ingestion.join()
+        finally:
+            client.close()
+
+    assert server.max_in_flight == 2
+
+
+def test_get_retry_after():
+    assert get_retry_after("2.5", 0) == 2.5
+    assert get_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", 0) == 0.0
+    assert get_retry_after(None, 3) == 8.0
+    assert get_retry_after("soon", 10) == 30.0
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from open_webui.retrieval.ingest import ingest_chunks
+
+
+def embed(batch):
+    return [[float(chunk)] for chunk in batch]
+
+
+def test_ingest_chunks_in_batches():
+    writes = []
+    events = []
+
+    total = ingest_chunks(
+        iter(range(7)),
+        embed,
+        lambda start, batch, vectors: writes.append((start, batch, vectors)),
+        batch_size=3,
+        progress=lambda stage, counts: events.append((stage, counts)),
+    )
+
+    assert total == 7
+    assert [(start, batch) for start, batch, _ in writes] == [
+        (0, [0, 1, 2]),
+        (3, [3, 4, 5]),
+        (6, [6]),
+    ]
+    assert writes[1][2] == [[3.0], [4.0], [5.0]]
+    assert [stage for stage, _ in events] == ["embed", "embed", "embed", "done"]
+    assert events[-1][1] == {"chunks": 7, "embedded": 7, "written": 7}
+
+
+def test_ingest_chunks_resumes_after_skip():
+    writes = []
+    embedded = []
+
+    def tracking_embed(batch):
+        embedded.extend(batch)
+        return embed(batch)
+
+    total = ingest_chunks(
+        iter(range(5)),
+        tracking_embed,
+        lambda start, batch, vectors: writes.append((start, batch)),
+        batch_size=2,
+        skip=3,
+    )
+
+    assert total == 5
+    assert embedded == [3, 4]
+    assert writes == [(3, [3, 4])]
+
+
+def test_ingest_chunks_applies_backpressure():
+    release = threading.Event()
+    read = []
+
+    def chunks():
+        for idx in range(10):
+            read.append(idx)
+            yield idx
+
+    def write(start, batch, vectors):
+        release.wait(5)
+
+    thread = threading.Thread(
+        target=ingest_chunks,
+        args=(chunks(), embed, write),
+        kwargs={"batch_size": 1, "queue_size": 1},
+    )
+    thread.start()
+    thread.join(0.5)
+
+    # One batch being written, one queued and one waiting to be queued
+    assert len(read) == 3
+    release.set()
+    thread.join(5)
+    assert len(read) == 10
+
+
+def test_ingest_chunks_stops_on_write_error():
+    read = []
+
+    def chunks():
+        for idx in range(100):
+            read.append(idx)
+            yield idx
+
+    def write(start, batch, vectors):
+        raise ValueError("insert failed")
+
+    with pytest.raises(ValueError, match="insert failed"):
+        ingest_chunks(chunks(), embed, write, batch_size=1, queue_size=1)
+
+    assert len(read) < 100
@@ -0,0 +1,200 @@
+import pytest
+
+from open_webui.retrieval import lexical
+from open_webui.retrieval.lexical import (
+    LexicalCollection,
+    LexicalDocument,
+    LexicalIndex,
+    LexicalIndexedVectorDB,
+    LexicalPosting,
+)
+from open_webui.retrieval.vector.main import GetResult
+
+
+@pytest.fixture
+def index(sqlite_db):
+    sqlite_db(
+        [
+            LexicalCollection.__table__,
+            LexicalDocument.__table__,
+            LexicalPosting.__table__,
+        ],
+        [lexical],
+    )
+    return LexicalIndex()
+
+
+def item(id: str, text: str, file_id: str = "file-1") -> dict:
+    return {"id": id, "text": text, "vector": [0.0], "metadata": {"file_id": file_id}}
+
+
+def search_ids(index: LexicalIndex, query: str, limit: int = 10) -> list[str]:
+    return index.search("kb", query, limit).ids[0]
+
+
+def test_search_ranks_by_bm25(index):
+    index.insert(
+        "kb",
+        [
+            item("a", "the quick brown fox"),
+            item("b", "the lazy dog sleeps all day"),
+            item("c", "fox fox fox"),
+        ],
+    )
+
+    assert search_ids(index, "fox") == ["c", "a"]
+    assert search_ids(index, "lazy fox", limit=1) == ["c"]
+    assert search_ids(index, "unknown") == []
+
+    result = index.search("kb", "dog", 1)
+    assert result.documents == [["the lazy dog sleeps all day"]]
+    assert result.metadatas == [[{"file_id": "file-1"}]]
+
+    assert index.search("missing", "fox", 10) is None
+
+
+def test_delete_and_upsert_keep_index_in_step(index):
+    index.insert(
+        "kb",
+        [
+            item("a", "alpha beta", file_id="file-1"),
+            item("b", "alpha gamma", file_id="file-2"),
+        ],
+    )
+
+    index.delete("kb", filter={"file_id": "file-1"})
+    assert search_ids(index, "alpha") == ["b"]
+
+    index.upsert("kb", [item("b", "delta")])
+    assert search_ids(index, "alpha") == []
+    assert search_ids(index, "delta") == ["b"]
+
+    with lexical.get_db() as db:
+        collection = db.get(LexicalCollection, "kb")
+        assert (collection.document_count, collection.total_length) == (1, 1)
+
+    index.delete_collection("kb")
+    assert not index.has_collection("kb")
+
+
+def test_update_metadata_fills_indexed_columns(index):
+    index.insert(
+        "kb",
+        [
+            item("a", "alpha beta", file_id="file-1"),
+            item("b", "alpha gamma", file_id="file-2"),
+        ],
+    )
+
+    index.update_metadata("kb", {"file_id": "file-1"}, {"hash": "abc"})
+
+    result = index.search("kb", "beta", 1)
+    assert result.metadatas == [[{"file_id": "file-1", "hash": "abc"}]]
+
+    index.delete("kb", filter={"hash": "abc"})
+    assert search_ids(index, "alpha") == ["b"]
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(items)
+
+    def get(self, collection_name):
+        items = self.collections[collection_name]
+        return GetResult(
+            ids=[[item["id"] for item in items]],
+            documents=[[item["text"] for item in items]],
+            metadatas=[[item["metadata"] for item in items]],
+        )
+
+    def delete(self, collection_name, ids=None, filter=None):
+        pass
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+
+def test_wrapper_only_indexes_tracked_collections(index):
+    client = FakeVectorDB()
+    client.insert("old", [item("a", "legacy chunk")])
+
+    wrapped = LexicalIndexedVectorDB(client, index)
+    wrapped.insert("kb", [item("a", "fresh chunk")])
+    wrapped.insert("old", [item("b", "another chunk")])
+
+    assert index.has_collection("kb")
+    # Collections that predate the index are backfilled on first search
+    assert not index.has_collection("old")
+
+    index.index_collection("old", wrapped.get("old"))
+    assert sorted(index.search("old", "chunk", 10).ids[0]) == ["a", "b"]
+
+    wrapped.delete_collection("kb")
+    assert not index.has_collection("kb")
+
+
+def test_wrapper_indexes_new_collections_while_enabled(index):
+    client = FakeVectorDB()
+    enabled = False
+
+    wrapped = LexicalIndexedVectorDB(
+        client, index, index_new_collections=lambda: enabled
+    )
+    wrapped.insert("off", [item("a", "early chunk")])
+    assert not index.has_collection("off")
+
+    enabled = True
+    wrapped.insert("on", [item("b", "later chunk")])
+    wrapped.insert("off", [item("c", "another chunk")])
+    assert index.has_collection("on")
+    # Created while disabled, backfilled on first search
+    assert not index.has_collection("off")
+    assert wrapped.backfill("off")
+    assert sorted(index.search("off", "chunk", 10).ids[0]) == ["a", "c"]
+
+
+def test_replace_collection_moves_index(index):
+    index.insert("kb", [item("a", "stale chunk")])
+    index.insert("kb-shadow", [item("b", "fresh chunk"), item("c", "fresh text")])
+
+    index.replace_collection("kb", "kb-shadow")
+
+    assert not index.has_collection("kb-shadow")
+    assert search_ids(index, "stale") == []
+    assert sorted(search_ids(index, "fresh")) == ["b", "c"]
+
+
+def test_backfill_catches_up_with_concurrent_writes(index):
+    client = FakeVectorDB()
+    client.insert("old", [item("a", "legacy chunk"), item("b", "gone chunk")])
+    wrapped = LexicalIndexedVectorDB(client, index)
+
+    get = client.get
+    reads = []
+
+    def get_racing_a_write(collection_name):
+        result = get(collection_name)
+        if not reads:
+            # Lands after the first read, before the index is committed
+            wrapped.insert("old", [item("c", "racing chunk")])
+        reads.append(collection_name)
+        return result
+
+    client.get = get_racing_a_write
+    assert wrapped.backfill("old")
+    assert sorted(index.search("old", "chunk", 10).ids[0]) == ["a", "b", "c"]
+
+    # Writes after the backfill are indexed directly
+    wrapped.insert("old", [item("d", "later chunk")])
+    assert "d" in index.search("old", "later", 10).ids[0]
+
+    # Indexing again drops what the collection no longer has
+    client.collections["old"] = [i for i in client.collections["old"] if i["id"] != "b"]
+    index.index_collection("old", get("old"))
+    assert sorted(index.search("old", "chunk", 10).ids[0]) == ["a", "c", "d"]
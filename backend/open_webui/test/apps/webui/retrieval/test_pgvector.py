@@ -0,0 +1,106 @@
+import random
+import time
+
+import pytest
+
+pytest.importorskip("pgvector")
+
+from sqlalchemy.dialects import postgresql
+
+from open_webui.retrieval.vector.dbs import pgvector
+from open_webui.retrieval.vector.dbs.pgvector import PgvectorClient
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(pgvector, "PGVECTOR_INSERT_BATCH_SIZE", 2)
+    monkeypatch.setattr(pgvector, "VECTOR_LENGTH", 3)
+
+    # Skips __init__, which connects to the database
+    client = PgvectorClient.__new__(PgvectorClient)
+    client.session = RecordingSession()
+    return client
+
+
+def item(id: str) -> dict:
+    return {"id": id, "text": id, "vector": [1.0, 2.0], "metadata": {"id": id}}
+
+
+def compile(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_insert_writes_multi_row_batches(client):
+    client.insert("kb", [item("a"), item("b"), item("c")])
+
+    statements = client.session.statements
+    assert len(statements) == 2
+    assert client.session.commits == 2
+
+    sql = compile(statements[0])
+    assert sql.count("%(id_m") == 2
+    assert "ON CONFLICT" not in sql
+    assert statements[0].compile().params["vector_m0"] == [1.0, 2.0, 0.0]
+
+
+def test_upsert_updates_conflicts_once(client):
+    client.upsert("kb", [item("a"), dict(item("a"), text="new")])
+
+    (stmt,) = client.session.statements
+    sql = compile(stmt)
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    assert sql.count("%(id_m") == 1
+    assert stmt.compile().params["text_m0"] == "new"
+
+
+def test_encrypted_insert_skips_conflicts(client, monkeypatch):
+    monkeypatch.setattr(pgvector, "PGVECTOR_PGCRYPTO", True)
+    monkeypatch.setattr(pgvector, "PGVECTOR_PGCRYPTO_KEY", "secret")
+
+    client.insert("kb", [item("a")])
+
+    sql = compile(client.session.statements[0])
+    assert "pgp_sym_encrypt" in sql
+    assert "ON CONFLICT (id) DO NOTHING" in sql
+
+
+if __name__ == "__main__":
+    # Benchmark against PGVECTOR_DB_URL: python test_pgvector.py
+    rows, dim, call_size = 100_000, pgvector.VECTOR_LENGTH, 1000
+    rng = random.Random(0)
+    client = PgvectorClient()
+    items = [
+        {
+            "id": f"bench-{idx}",
+            "text": f"chunk {idx}",
+            "vector": [rng.random() for _ in range(dim)],
+            "metadata": {"idx": idx},
+        }
+        for idx in range(rows)
+    ]
+
+    try:
+        start = time.perf_counter()
+        for offset in range(0, rows, call_size):
+            client.insert("benchmark", items[offset : offset + call_size])
+        elapsed = time.perf_counter() - start
+    finally:
+        client.delete_collection("benchmark")
+
+    print(f"{rows} x {dim}-dim vectors, batch {pgvector.PGVECTOR_INSERT_BATCH_SIZE}")
+    print(f"insert: {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
@@ -0,0 +1,142 @@
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.utils import RerankCompressor, query_doc_with_hybrid_search
+from open_webui.retrieval.vector.main import SearchResult
+from open_webui.retrieval.vector.utils import cosine_similarity
+
+
+def test_cosine_similarity():
+    scores = cosine_similarity([1.0, 0.0], [[1.0, 0.0], [0.0, 2.0], [-3.0, 0.0]])
+
+    assert scores == pytest.approx([1.0, 0.0, -1.0])
+
+
+def test_cosine_similarity_pads_and_handles_empty_vectors():
+    # pgvector returns vectors zero-padded to its fixed dimension
+    scores = cosine_similarity([1.0, 1.0], [[1.0, 1.0, 0.0, 0.0], [], [0.0, 0.0]])
+
+    assert scores == pytest.approx([1.0, 0.0, 0.0])
+    assert cosine_similarity([1.0], []) == []
+
+
+def test_search_result_vectors_not_serialized():
+    result = SearchResult(
+        ids=[["a"]],
+        documents=[["a"]],
+        metadatas=[[{}]],
+        distances=[[1.0]],
+        vectors=[[[0.1, 0.2]]],
+    )
+
+    assert result.vectors == [[[0.1, 0.2]]]
+    assert "vectors" not in result.model_dump()
+
+
+def test_compressor_embeds_only_candidates_without_stored_vectors():
+    calls = []
+
+    def embedding_function(query, prefix=None):
+        calls.append(query)
+        if isinstance(query, list):
+            return [[0.0, 1.0] for _ in query]
+        return [1.0, 0.0]
+
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=3,
+        reranking_function=None,
+        r_score=0.0,
+        # Vector search matches come with their stored vectors
+        stored_vectors={"chunk-1": [1.0, 0.1], "chunk-2": [0.1, 1.0]},
+    )
+    documents = [
+        Document(id="chunk-2", page_content="far", metadata={}),
+        Document(page_content="bm25 only", metadata={}),
+        Document(id="chunk-1", page_content="close", metadata={}),
+    ]
+
+    results = compressor.compress_documents(documents, "query")
+
+    # The query, then only the BM25 match in one batch
+    assert calls == ["query", ["bm25 only"]]
+    assert [doc.page_content for doc in results] == ["close", "far", "bm25 only"]
+    assert [doc.id for doc in results] == ["chunk-1", "chunk-2", None]
+    assert results[0].metadata["score"] == pytest.approx(
+        cosine_similarity([1.0, 0.0], [[1.0, 0.1]])[0]
+    )
+
+
+def test_stored_vectors_are_keyed_by_chunk_id():
+    compressor = RerankCompressor(
+        embedding_function=lambda query, prefix=None: [1.0, 0.0],
+        top_n=2,
+        reranking_function=None,
+        r_score=0.0,
+        stored_vectors={"chunk-1": [1.0, 0.0], "chunk-2": [0.0, 1.0]},
+    )
+    # Chunks with the same text keep their own vectors
+    documents = [
+        Document(id="chunk-2", page_content="same", metadata={}),
+        Document(id="chunk-1", page_content="same", metadata={}),
+    ]
+
+    results = compressor.compress_documents(documents, "query")
+
+    assert [(doc.id, doc.metadata["score"]) for doc in results] == [
+        ("chunk-1", pytest.approx(1.0)),
+        ("chunk-2", pytest.approx(0.0)),
+    ]
+
+
+class VectorDB:
+    def __init__(self):
+        self.searches = []
+
+    def search(self, collection_name, vectors, limit, include_vectors=False):
+        self.searches.append(include_vectors)
+        return SearchResult(
+            ids=[["chunk-1", "chunk-2"]],
+            documents=[["first", "second"]],
+            metadatas=[[{}, {}]],
+            distances=[[0.9, 0.1]],
+            vectors=[[[1.0, 0.0], [0.0, 1.0]]] if include_vectors else None,
+        )
+
+
+class Reranker:
+    def predict(self, pairs):
+        return [1.0 if document == "second" else 0.0 for _, document in pairs]
+
+
+@pytest.mark.parametrize(
+    "reranking_function, include_vectors", [(None, True), (Reranker(), False)]
+)
+def test_hybrid_search_requests_vectors_only_for_the_embedding_rerank(
+    monkeypatch, reranking_function, include_vectors
+):
+    db = VectorDB()
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", db)
+    calls = []
+
+    def embedding_function(query, prefix=None):
+        calls.append(query)
+        return [1.0, 0.0]
+
+    result = query_doc_with_hybrid_search(
+        collection_name="kb",
+        collection_result=None,
+        query="query",
+        embedding_function=embedding_function,
+        k=2,
+        reranking_function=reranking_function,
+        k_reranker=2,
+        r=0.0,
+        hybrid_bm25_weight=0.0,
+    )
+
+    assert db.searches == [include_vectors]
+    # Only the query itself is embedded, the matches reuse their stored vectors
+    assert set(calls) == {"query"}
+    assert len(result["documents"][0]) == 2
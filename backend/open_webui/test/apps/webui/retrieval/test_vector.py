@@ -0,0 +1,88 @@
+from open_webui.retrieval.vector.main import SearchResult, VectorDBBase
+
+
+class SingleVectorDB(VectorDBBase):
+    """Backend without a native `search_many`, scoring by dot product."""
+
+    def __init__(self, collections):
+        self.collections = collections
+        self.searches = []
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def search(self, collection_name, vectors, limit, include_vectors=False):
+        self.searches.append((collection_name, len(vectors)))
+        if collection_name not in self.collections:
+            return None
+        if vectors[0] == [0.0, 0.0]:
+            raise ValueError("unsupported vector")
+
+        items = sorted(
+            self.collections[collection_name],
+            key=lambda item: -sum(a * b for a, b in zip(item[1], vectors[0])),
+        )[:limit]
+        return SearchResult(
+            ids=[[id for id, _ in items]],
+            documents=[[id for id, _ in items]],
+            metadatas=[[{} for _ in items]],
+            distances=[[sum(a * b for a, b in zip(v, vectors[0])) for _, v in items]],
+            vectors=[[v for _, v in items]] if include_vectors else None,
+        )
+
+    def delete_collection(self, collection_name):
+        pass
+
+    def insert(self, collection_name, items):
+        pass
+
+    def upsert(self, collection_name, items):
+        pass
+
+    def query(self, collection_name, filter, limit=None):
+        pass
+
+    def get(self, collection_name):
+        pass
+
+    def delete(self, collection_name, ids=None, filter=None):
+        pass
+
+    def reset(self):
+        pass
+
+
+def test_search_many_fallback():
+    db = SingleVectorDB(
+        {
+            "a": [("a1", [1.0, 0.0]), ("a2", [0.0, 1.0])],
+            "b": [("b1", [0.5, 0.5])],
+        }
+    )
+
+    results = db.search_many(["a", "b", "missing"], [[1.0, 0.0], [0.0, 1.0]], 1)
+
+    assert results["a"].ids == [["a1"], ["a2"]]
+    assert results["a"].distances == [[1.0], [1.0]]
+    assert results["b"].ids == [["b1"], ["b1"]]
+    assert results["missing"] is None
+    assert results["a"].vectors is None
+    assert all(count == 1 for _, count in db.searches)
+
+
+def test_search_many_fallback_includes_vectors_on_request():
+    db = SingleVectorDB({"a": [("a1", [1.0, 0.0]), ("a2", [0.0, 1.0])]})
+
+    results = db.search_many(["a"], [[1.0, 0.0], [0.0, 1.0]], 1, include_vectors=True)
+
+    assert results["a"].vectors == [[[1.0, 0.0]], [[0.0, 1.0]]]
+
+
+def test_search_many_fallback_keeps_successful_rows():
+    db = SingleVectorDB({"a": [("a1", [1.0, 0.0])]})
+
+    results = db.search_many(["a"], [[1.0, 0.0], [0.0, 0.0]], 1)
+
+    assert results["a"].ids == [["a1"], []]
+    assert results["a"].distances == [[1.0], []]
+    assert db.search_many(["a"], [[0.0, 0.0]], 1)["a"] is None
@@ -234,3 +234,50 @@ class TestChats(AbstractPostgresTest):
 
         chat = self.chats.get_chat_by_id(chat_id)
         assert chat.share_id is None
+
+    def test_upsert_message_to_chat(self):
+        chat_id = self.chats.get_chats()[0].id
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "2", {"id": "2", "content": "Hello"}
+        )
+        message = self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "2", {"content": "Hello world"}
+        )
+        assert message == {"id": "2", "content": "Hello world"}
+
+        self.chats.add_message_status_to_chat_by_id_and_message_id(
+            chat_id, "2", {"done": True}
+        )
+        assert self.chats.get_message_by_id_and_message_id(chat_id, "2") == {
+            "id": "2",
+            "content": "Hello world",
+            "statusHistory": [{"done": True}],
+        }
+
+        chat = self.chats.get_chat_by_id(chat_id)
+        assert chat.chat["history"]["currentId"] == "2"
+        assert chat.chat["history"]["messages"]["2"]["content"] == "Hello world"
+
+    def test_search_finds_upserted_message(self):
+        chat_id = self.chats.get_chats()[0].id
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "2", {"id": "2", "content": "Zebra crossing"}
+        )
+
+        chats = self.chats.get_chats_by_user_id_and_search_text("2", "zebra")
+        assert [chat.id for chat in chats] == [chat_id]
+
+    def test_update_chat_syncs_message_rows(self):
+        chat_id = self.chats.get_chats()[0].id
+        messages = {
+            "1": {"id": "1", "content": "Hello"},
+            "2": {"id": "2", "content": "Hi"},
+            "3": {"id": "3", "content": "Bye"},
+        }
+        self.chats.update_chat_by_id(chat_id, {"history": {"messages": messages}})
+
+        del messages["3"]
+        messages["2"] = {"id": "2", "content": "Hi there"}
+        self.chats.update_chat_by_id(chat_id, {"history": {"messages": messages}})
+
+        assert self.chats.get_messages_by_chat_id(chat_id) == messages
@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.routers import knowledge
+
+
+class Crash(BaseException):
+    """Stands in for the process dying, nothing catches it."""
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(items)
+
+    def delete(self, collection_name, ids=None, filter=None):
+        self.collections[collection_name] = [
+            item
+            for item in self.collections.get(collection_name, [])
+            if item["metadata"]["file_id"] != filter["file_id"]
+        ]
+
+    def swap_collection(self, collection_name, source):
+        self.collections[collection_name] = self.collections.pop(source)
+
+
+@pytest.fixture
+def reindex(monkeypatch):
+    client = FakeVectorDB()
+    client.insert("kb", [{"id": "old", "metadata": {"file_id": "old"}}])
+    files = {id: SimpleNamespace(id=id, filename=id) for id in ["a", "b", "c"]}
+    knowledge_base = SimpleNamespace(id="kb", data={"file_ids": list(files)})
+    job = SimpleNamespace(id="job-1234", progress=None)
+    crash = set()
+    fail = set()
+
+    def process_file(request, form_data, user=None):
+        # Like `save_docs_to_vector_db`, chunks are checked by content hash
+        if any(
+            item["metadata"].get("hash") == form_data.file_id
+            for item in client.collections.get(form_data.collection_name, [])
+        ):
+            raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
+        if form_data.file_id in fail:
+            raise ValueError("embedding failed")
+
+        for idx in range(2):
+            if idx == 1 and form_data.file_id in crash:
+                crash.discard(form_data.file_id)
+                raise Crash()
+            client.insert(
+                form_data.collection_name,
+                [
+                    {
+                        "id": f"{form_data.file_id}-{idx}",
+                        "metadata": {
+                            "file_id": form_data.file_id,
+                            "hash": form_data.file_id,
+                        },
+                    }
+                ],
+            )
+
+    def update_job_progress(progress, force=False):
+        job.progress = progress
+
+    monkeypatch.setattr(knowledge, "VECTOR_DB_CLIENT", client)
+    monkeypatch.setattr(knowledge, "RAG_REINDEX_CONCURRENCY", 1)
+    monkeypatch.setattr(knowledge, "process_file", process_file)
+    monkeypatch.setattr(knowledge, "get_current_job", lambda: job)
+    monkeypatch.setattr(knowledge, "update_job_progress", update_job_progress)
+    monkeypatch.setattr(
+        knowledge.Knowledges, "get_knowledge_bases", lambda: [knowledge_base]
+    )
+    monkeypatch.setattr(
+        knowledge.Knowledges, "get_knowledge_by_id", lambda id: knowledge_base
+    )
+    monkeypatch.setattr(
+        knowledge.Files,
+        "get_files_by_ids",
+        lambda ids: [files[id] for id in ids if id in files],
+    )
+    monkeypatch.setattr(
+        knowledge.Files, "update_file_metadata_by_id", lambda id, metadata: None
+    )
+    return SimpleNamespace(client=client, job=job, crash=crash, fail=fail)
+
+
+def test_reindex_resumes_file_interrupted_mid_write(reindex):
+    reindex.crash.add("b")
+    with pytest.raises(Crash):
+        knowledge.reindex_knowledge_job(None, None, {})
+
+    checkpoint = reindex.job.progress["knowledge"]["kb"]
+    assert checkpoint["files"] == ["a"]
+    assert not checkpoint["done"]
+    # The old collection is still served, next to a half written one
+    assert [item["id"] for item in reindex.client.collections["kb"]] == ["old"]
+    assert "b-0" in {item["id"] for item in reindex.client.collections["kb-job-1234"]}
+
+    result = knowledge.reindex_knowledge_job(None, None, {})
+
+    assert result["failed_files"] == []
+    assert reindex.job.progress["knowledge"]["kb"]["done"]
+    assert sorted(item["id"] for item in reindex.client.collections["kb"]) == [
+        "a-0",
+        "a-1",
+        "b-0",
+        "b-1",
+        "c-0",
+        "c-1",
+    ]
+    assert "kb-job-1234" not in reindex.client.collections
+
+
+def test_reindex_swaps_without_failed_files(reindex):
+    reindex.fail.add("b")
+
+    result = knowledge.reindex_knowledge_job(None, None, {})
+
+    assert [failed["file_id"] for failed in result["failed_files"]] == ["b"]
+    assert result["incomplete_knowledge_bases"] == ["kb"]
+    # Nothing is kept from the old collection, it may use another model
+    assert sorted(item["id"] for item in reindex.client.collections["kb"]) == [
+        "a-0",
+        "a-1",
+        "c-0",
+        "c-1",
+    ]
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+from fakeredis import FakeAsyncRedis
+from open_webui.socket import main
+from open_webui.socket.utils import AsyncRedisDict, AsyncRedisSetDict
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    redis = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(
+        main, "SESSION_POOL", AsyncRedisDict("open-webui:session_pool", redis=redis)
+    )
+    monkeypatch.setattr(
+        main, "USER_POOL", AsyncRedisSetDict("open-webui:user_sessions", redis=redis)
+    )
+
+    async def enter_room(sid, room):
+        pass
+
+    monkeypatch.setattr(main.sio, "enter_room", enter_room)
+
+
+def user(id: str):
+    return SimpleNamespace(id=id, model_dump=lambda: {"id": id, "name": id})
+
+
+def test_concurrent_connects_keep_every_session(pools):
+    async def run():
+        await asyncio.gather(
+            main.add_user_session("sid-1", user("user-1")),
+            main.add_user_session("sid-2", user("user-1")),
+        )
+        assert sorted(await main.USER_POOL.get("user-1")) == ["sid-1", "sid-2"]
+
+        await asyncio.gather(main.disconnect("sid-1"), main.disconnect("sid-2"))
+        assert not await main.get_user_active_status("user-1")
+        assert await main.get_active_user_ids() == []
+
+    asyncio.run(run())
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+from fakeredis import FakeAsyncRedis
+from open_webui.socket.utils import (
+    AsyncLocalDict,
+    AsyncLocalSetDict,
+    AsyncLocalUsagePool,
+    AsyncRedisDict,
+    AsyncRedisSetDict,
+    AsyncRedisUsagePool,
+)
+
+
+@pytest.fixture(params=["redis", "local"])
+def pool(request):
+    if request.param == "redis":
+        return AsyncRedisDict(
+            "open-webui:test_pool", redis=FakeAsyncRedis(decode_responses=True)
+        )
+    return AsyncLocalDict("test_pool")
+
+
+def test_single_key_operations(pool):
+    async def run():
+        assert await pool.get("user-1") is None
+        assert await pool.get("user-1", []) == []
+
+        await pool.set("user-1", ["sid-1", "sid-2"])
+        assert await pool.get("user-1") == ["sid-1", "sid-2"]
+        assert await pool.contains("user-1")
+        assert await pool.length() == 1
+
+        assert await pool.delete("user-1")
+        assert not await pool.delete("user-1")
+        assert not await pool.contains("user-1")
+
+    asyncio.run(run())
+
+
+def test_multi_key_operations(pool):
+    async def run():
+        await pool.set_many(
+            {
+                "sid-1": {"id": "user-1"},
+                "sid-2": {"id": "user-2"},
+                "sid-3": {"id": "user-1"},
+            }
+        )
+        await pool.set_many({})
+
+        assert sorted(await pool.keys()) == ["sid-1", "sid-2", "sid-3"]
+        assert dict(await pool.items())["sid-2"] == {"id": "user-2"}
+        assert await pool.get_many(["sid-1", "sid-4", "sid-3"]) == {
+            "sid-1": {"id": "user-1"},
+            "sid-3": {"id": "user-1"},
+        }
+        assert await pool.get_many([]) == {}
+
+        assert await pool.delete_many(["sid-1", "sid-2", "sid-4"]) == 2
+        assert await pool.values() == [{"id": "user-1"}]
+
+        await pool.clear()
+        assert await pool.length() == 0
+
+    asyncio.run(run())
+
+
+@pytest.fixture(params=["redis", "local"])
+def usage_pool(request):
+    if request.param == "redis":
+        return AsyncRedisUsagePool(
+            "open-webui:test_usage_models",
+            timeout=3,
+            redis=FakeAsyncRedis(decode_responses=True),
+        )
+    return AsyncLocalUsagePool("test_usage_models", timeout=3)
+
+
+def test_usage_pool_expires_models(usage_pool):
+    async def run():
+        await usage_pool.heartbeat("model-a", now=100)
+        await usage_pool.heartbeat("model-b", now=101)
+        # An older heartbeat from another replica does not move it back
+        await usage_pool.heartbeat("model-b", now=99)
+
+        assert sorted(await usage_pool.models_in_use(now=102)) == [
+            "model-a",
+            "model-b",
+        ]
+        assert await usage_pool.models_in_use(now=103.5) == ["model-b"]
+        assert await usage_pool.models_in_use(now=105) == []
+
+        await usage_pool.heartbeat("model-a", now=106)
+        assert await usage_pool.models_in_use(now=106) == ["model-a"]
+
+    asyncio.run(run())
+
+
+@pytest.fixture(params=["redis", "local"])
+def set_pool(request):
+    if request.param == "redis":
+        return AsyncRedisSetDict(
+            "open-webui:test_sessions", redis=FakeAsyncRedis(decode_responses=True)
+        )
+    return AsyncLocalSetDict("test_sessions")
+
+
+def test_set_pool_operations(set_pool):
+    async def run():
+        assert await set_pool.get("user-1") == []
+        assert not await set_pool.contains("user-1")
+
+        await set_pool.add("user-1", "sid-1")
+        await set_pool.add("user-1", "sid-2")
+        await set_pool.add("user-1", "sid-2")
+        await set_pool.add("user-2", "sid-3")
+        assert sorted(await set_pool.get("user-1")) == ["sid-1", "sid-2"]
+        assert sorted(await set_pool.keys()) == ["user-1", "user-2"]
+        assert await set_pool.length() == 2
+
+        assert await set_pool.remove("user-1", "sid-1") == 1
+        assert await set_pool.contains("user-1")
+        assert await set_pool.remove("user-1", "sid-2") == 0
+        assert not await set_pool.contains("user-1")
+        assert await set_pool.remove("user-1", "sid-2") == 0
+        assert await set_pool.keys() == ["user-2"]
+
+    asyncio.run(run())
+
+
+def test_set_pool_concurrent_updates(set_pool):
+    async def run():
+        await asyncio.gather(
+            *[set_pool.add("user-1", f"sid-{idx}") for idx in range(20)]
+        )
+        assert len(await set_pool.get("user-1")) == 20
+
+        await asyncio.gather(
+            *[set_pool.remove("user-1", f"sid-{idx}") for idx in range(19)],
+            set_pool.add("user-1", "sid-20"),
+        )
+        assert sorted(await set_pool.get("user-1")) == ["sid-19", "sid-20"]
+        assert await set_pool.contains("user-1")
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+from open_webui.utils import access_control
+
+
+def test_user_group_ids_are_memoized_per_request(monkeypatch):
+    calls = []
+
+    def get_group_ids_by_member_id(user_id):
+        calls.append(user_id)
+        return ["group-a"] if user_id == "user-1" else []
+
+    monkeypatch.setattr(
+        access_control.Groups, "get_group_ids_by_member_id", get_group_ids_by_member_id
+    )
+    access_control_dict = {"read": {"group_ids": ["group-a"], "user_ids": []}}
+
+    # Outside a request every check hits the database
+    assert access_control.has_access("user-1", "read", access_control_dict)
+    assert access_control.has_access("user-1", "read", access_control_dict)
+    assert calls == ["user-1", "user-1"]
+
+    calls.clear()
+    token = access_control.user_group_ids_cache.set({})
+    try:
+        for _ in range(3):
+            assert access_control.has_access("user-1", "read", access_control_dict)
+            assert not access_control.has_access("user-2", "read", access_control_dict)
+    finally:
+        access_control.user_group_ids_cache.reset(token)
+
+    assert calls == ["user-1", "user-2"]
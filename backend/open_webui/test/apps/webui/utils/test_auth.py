@@ -0,0 +1,132 @@
+import threading
+
+from open_webui.models import users
+from open_webui.models.users import UserCache, UserModel
+from open_webui.utils import auth
+from open_webui.utils.auth import LastActiveUpdater
+
+
+def create_user(id: str, role: str = "user") -> UserModel:
+    return UserModel(
+        id=id,
+        name=id,
+        email=f"{id}@openwebui.com",
+        role=role,
+        profile_image_url="/user.png",
+        last_active_at=0,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def test_user_cache_invalidation():
+    cache = UserCache(ttl=60)
+    cache.set(create_user("user-1"), api_key="sk-1")
+
+    user = cache.get("user-1")
+    user.role = "admin"
+    assert cache.get("user-1").role == "user"
+    assert cache.get_by_api_key("sk-1").id == "user-1"
+
+    cache.invalidate("user-1")
+    assert cache.get("user-1") is None
+    assert cache.get_by_api_key("sk-1") is None
+
+    disabled = UserCache(ttl=0)
+    disabled.set(create_user("user-2"))
+    assert disabled.get("user-2") is None
+
+
+def test_user_cache_skips_rows_read_before_a_write():
+    cache = UserCache(ttl=60)
+
+    # A request read the row, then a write committed and invalidated it
+    generation = cache.generation.value
+    stale = create_user("user-1", role="admin")
+    cache.invalidate("user-1")
+
+    cache.set(stale, generation=generation)
+    assert cache.get("user-1") is None
+
+    cache.set(create_user("user-1"), generation=cache.generation.value)
+    assert cache.get("user-1").role == "user"
+
+
+def test_user_cache_evicts_least_recently_used():
+    cache = UserCache(ttl=60, size=2)
+    cache.set(create_user("user-1"), api_key="sk-1")
+    cache.set(create_user("user-2"), api_key="sk-2")
+    assert cache.get("user-1") is not None
+
+    cache.set(create_user("user-3"))
+    assert cache.get("user-2") is None
+    assert cache.get_by_api_key("sk-2") is None
+    assert cache._api_keys == {"sk-1": "user-1"}
+    assert cache.get_by_api_key("sk-1").id == "user-1"
+    assert cache.get("user-3") is not None
+
+
+def test_user_cache_expiry_keeps_other_loads(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(users.time, "monotonic", lambda: now)
+    cache = UserCache(ttl=60)
+    cache.set(create_user("user-1"), api_key="sk-1")
+
+    generation = cache.generation.value
+    now += 120
+    assert cache.get_by_api_key("sk-1") is None
+    assert cache._users == {} and cache._api_keys == {}
+
+    # Only the expired entry is dropped, a load of another user still caches
+    cache.set(create_user("user-2"), generation=generation)
+    assert cache.get("user-2") is not None
+
+
+def test_last_active_updates_are_throttled_and_batched(monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        auth.Users,
+        "update_users_last_active_by_ids",
+        lambda ids: batches.append(sorted(ids)) or len(ids),
+    )
+
+    updater = LastActiveUpdater(interval=60)
+    for _ in range(10):
+        updater.touch("user-1")
+        updater.touch("user-2")
+
+    assert updater.flush() == 2
+    assert batches == [["user-1", "user-2"]]
+
+    # Within the interval the users are not written again
+    updater.touch("user-1")
+    assert updater.flush() == 0
+    assert batches == [["user-1", "user-2"]]
+
+
+def test_touches_during_flushes_are_not_lost(monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        auth.Users,
+        "update_users_last_active_by_ids",
+        lambda ids: written.extend(ids) or len(ids),
+    )
+
+    updater = LastActiveUpdater(interval=60)
+    threads = [
+        threading.Thread(
+            target=lambda i=i: [updater.touch(f"user-{i}-{j}") for j in range(500)]
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        updater.flush()
+    for thread in threads:
+        thread.join()
+    updater.flush()
+
+    assert sorted(written) == sorted(
+        f"user-{i}-{j}" for i in range(4) for j in range(500)
+    )
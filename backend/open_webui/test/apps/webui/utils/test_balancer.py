@@ -0,0 +1,166 @@
+import asyncio
+
+from open_webui.utils import balancer
+from open_webui.utils.balancer import Balancer, Candidate
+
+
+def candidates(*weights):
+    return [
+        Candidate(idx=idx, url=f"http://gpu-{idx}:11434", weight=weight)
+        for idx, weight in enumerate(weights)
+    ]
+
+
+def test_least_in_flight_spreads_requests():
+    lb = Balancer("least_in_flight")
+    nodes = candidates(1, 1, 1)
+
+    trackers = []
+    for _ in range(6):
+        idx = lb.select(nodes, "llama3:latest")
+        trackers.append(lb.track(f"{nodes[idx].url}/api/chat"))
+
+    assert [node.in_flight for node in lb.nodes.values()] == [2, 2, 2]
+
+    for tracker in trackers:
+        tracker.done()
+        tracker.done()
+    assert [node.in_flight for node in lb.nodes.values()] == [0, 0, 0]
+
+
+def test_weighted_round_robin_follows_weights():
+    lb = Balancer("weighted_round_robin")
+    nodes = candidates(3, 1)
+
+    picks = [lb.select(nodes) for _ in range(8)]
+
+    assert picks.count(0) == 6
+    assert picks.count(1) == 2
+    # Smooth: the light node isn't starved until the end of the cycle
+    assert 1 in picks[:4]
+
+
+def test_ewma_latency_prefers_fast_nodes():
+    lb = Balancer("ewma_latency")
+    nodes = candidates(1, 1)
+    lb.get_node(nodes[0].url).ewma_latency = 2.0
+    lb.get_node(nodes[1].url).ewma_latency = 0.5
+
+    assert lb.select(nodes) == 1
+
+    # Until it is busy enough to be slower
+    lb.get_node(nodes[1].url).in_flight = 4
+    assert lb.select(nodes) == 0
+
+
+def test_model_affinity_keeps_models_on_loaded_nodes(monkeypatch):
+    monkeypatch.setattr(balancer, "OLLAMA_AFFINITY_MAX_IN_FLIGHT", 2)
+    lb = Balancer("model_affinity")
+    nodes = candidates(1, 1, 1)
+    lb.get_node(nodes[2].url).loaded_models = {"llama3:latest"}
+
+    assert lb.select(nodes, "llama3:latest") == 2
+    lb.get_node(nodes[2].url).in_flight = 1
+    assert lb.select(nodes, "llama3:latest") == 2
+
+    # Spills over once the node is busy, and remembers where it went
+    lb.get_node(nodes[2].url).in_flight = 2
+    idx = lb.select(nodes, "llama3:latest")
+    assert idx in (0, 1)
+    assert "llama3:latest" in lb.get_node(nodes[idx].url).loaded_models
+
+
+def test_circuit_breaker_ejects_failing_nodes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(balancer.time, "monotonic", lambda: now[0])
+
+    lb = Balancer("least_in_flight", circuit_breaker_threshold=2)
+    lb.circuit_breaker_cooldown = 30
+    nodes = candidates(1, 1)
+    lb.get_node(nodes[0].url)
+    lb.get_node(nodes[1].url).requests = 100
+
+    for _ in range(2):
+        tracker = lb.track(f"{nodes[0].url}/api/chat")
+        tracker.error(ConnectionError("refused"))
+        tracker.done()
+
+    assert [lb.select(nodes) for _ in range(3)] == [1, 1, 1]
+    assert lb.get_stats()["nodes"][0]["healthy"] is False
+
+    # Half open after the cooldown, closed again on success
+    now[0] += 31
+    assert lb.select(nodes) == 0
+    tracker = lb.track(f"{nodes[0].url}/api/chat")
+    tracker.response(200)
+    tracker.done()
+    assert lb.get_node(nodes[0].url).consecutive_failures == 0
+
+    # Client errors don't count against the node
+    for _ in range(3):
+        lb.track(f"{nodes[0].url}/api/chat").response(404)
+    assert lb.get_stats()["nodes"][0]["healthy"] is True
+
+
+def test_track_matches_node_by_base_url():
+    lb = Balancer()
+    lb.get_node("http://gpu:1")
+    lb.get_node("http://gpu:11434/")
+
+    assert lb.find_node("http://gpu:11434/api/chat").url == "http://gpu:11434"
+    assert lb.find_node("http://gpu:1/api/chat").url == "http://gpu:1"
+    assert lb.find_node("http://other:11434/api/chat") is None
+    lb.track("http://other:11434/api/chat").done()
+
+
+def test_probe_learns_loaded_models_and_health():
+    lb = Balancer(circuit_breaker_threshold=1)
+
+    async def loaded():
+        return {"models": [{"model": "llama3:latest"}]}
+
+    async def down():
+        return None
+
+    async def main():
+        await lb.probe("http://gpu-0:11434", loaded, prefix_id="gpu")
+        await lb.probe("http://gpu-1:11434", down)
+
+    asyncio.run(main())
+
+    stats = {node["url"]: node for node in lb.get_stats()["nodes"]}
+    assert stats["http://gpu-0:11434"]["loaded_models"] == ["gpu.llama3:latest"]
+    assert stats["http://gpu-0:11434"]["healthy"] is True
+    assert stats["http://gpu-1:11434"]["healthy"] is False
+
+
+def test_probe_error_reply_keeps_node_ejected(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(balancer.time, "monotonic", lambda: now[0])
+    lb = Balancer(circuit_breaker_threshold=2)
+    lb.circuit_breaker_cooldown = 30
+    url = "http://gpu-0:11434"
+    lb.get_node(url)
+
+    for _ in range(2):
+        tracker = lb.track(f"{url}/api/chat")
+        tracker.response(503)
+        tracker.done()
+    assert lb.get_stats()["nodes"][0]["healthy"] is False
+
+    async def busy():
+        return {"error": "server busy"}
+
+    async def empty():
+        return {}
+
+    async def main():
+        await lb.probe(url, busy)
+        await lb.probe(url, empty)
+
+    asyncio.run(main())
+
+    node = lb.get_node(url)
+    assert node.consecutive_failures == 4
+    assert node.ejected_until > now[0]
+    assert lb.get_stats()["nodes"][0]["healthy"] is False
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import chat_buffer
+from open_webui.utils.chat_buffer import ChatMessageBuffer
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    saves = []
+
+    def upsert_message(chat_id, message_id, message):
+        saves.append((chat_id, message_id, message))
+        return message
+
+    monkeypatch.setattr(
+        chat_buffer.Chats, "upsert_message_to_chat_by_id_and_message_id", upsert_message
+    )
+    return saves
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(
+        chat_buffer,
+        "time",
+        SimpleNamespace(monotonic=lambda: clock.now, perf_counter=time.perf_counter),
+    )
+    return clock
+
+
+def test_flushes_once_enough_content_accumulates(saves, clock):
+    buffer = ChatMessageBuffer("chat-1", "message-1", interval=60, max_bytes=10)
+
+    buffer.update({"content": "Hello"})
+    assert saves == []
+
+    buffer.update({"content": "Hello world!"})
+    assert saves == [("chat-1", "message-1", {"content": "Hello world!"})]
+
+    # Counted from the last write
+    buffer.update({"content": "Hello world! More"})
+    assert len(saves) == 1
+
+
+def test_flushes_once_the_interval_passes(saves, clock):
+    buffer = ChatMessageBuffer("chat-1", "message-1", interval=1, max_bytes=1024)
+
+    buffer.update({"content": "Hello"})
+    clock.now = 0.5
+    buffer.update({"content": "Hello world", "done": False})
+    assert saves == []
+
+    clock.now = 1.0
+    buffer.update({"content": "Hello world!"})
+    assert saves == [
+        ("chat-1", "message-1", {"content": "Hello world!", "done": False})
+    ]
+
+
+def test_flush_writes_pending_updates_only(saves, clock):
+    buffer = ChatMessageBuffer("chat-1", "message-1", interval=60, max_bytes=1024)
+
+    assert buffer.flush() is None
+    assert saves == []
+
+    buffer.update({"content": "Hello"})
+    assert buffer.flush(reason="cancelled") == {"content": "Hello"}
+    assert buffer.flush() is None
+    assert len(saves) == 1
+
+
+def test_pending_content_is_flushed_during_a_stall(saves):
+    async def stream():
+        buffer = ChatMessageBuffer("chat-1", "message-1", interval=0.05)
+        buffer.update({"content": "Calling a tool"})
+        assert saves == []
+
+        # No more deltas while the tool runs
+        await asyncio.sleep(0.1)
+        assert saves == [("chat-1", "message-1", {"content": "Calling a tool"})]
+
+        buffer.update({"content": "Calling a tool, done"})
+        buffer.flush()
+        await asyncio.sleep(0.1)
+        assert len(saves) == 2
+
+    asyncio.run(stream())
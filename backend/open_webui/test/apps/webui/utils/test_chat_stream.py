@@ -0,0 +1,151 @@
+import asyncio
+import json
+from functools import partial
+from types import SimpleNamespace
+from typing import Optional
+
+from starlette.responses import StreamingResponse
+
+from open_webui.utils import middleware
+from open_webui.utils.chat_buffer import ChatMessageBuffer
+from open_webui.utils.content_delta import apply_content_delta
+
+
+def make_response(deltas: list[dict], cancelled: bool = False) -> StreamingResponse:
+    async def body():
+        for delta in deltas:
+            yield f"data: {json.dumps({'choices': [{'delta': delta}]})}\n\n"
+        if cancelled:
+            raise asyncio.CancelledError()
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+def stream(
+    monkeypatch,
+    deltas: list[dict],
+    realtime_save: bool = False,
+    cancelled: bool = False,
+    saves: Optional[list] = None,
+) -> list[dict]:
+    events = []
+
+    async def event_emitter(event):
+        events.append(event)
+
+    async def event_caller(event):
+        return None
+
+    async def get_active_status_by_user_id(user_id):
+        return True
+
+    async def create_task(request, coroutine, id=None):
+        await coroutine
+        return "task-1", None
+
+    monkeypatch.setattr(middleware, "get_event_emitter", lambda metadata: event_emitter)
+    monkeypatch.setattr(middleware, "get_event_call", lambda metadata: event_caller)
+    monkeypatch.setattr(
+        middleware, "get_active_status_by_user_id", get_active_status_by_user_id
+    )
+    monkeypatch.setattr(middleware, "create_task", create_task)
+    monkeypatch.setattr(middleware, "get_sorted_filter_ids", lambda *args: [])
+    monkeypatch.setattr(middleware, "ENABLE_REALTIME_CHAT_SAVE", realtime_save)
+    for name, value in {
+        "get_message_by_id_and_message_id": None,
+        "get_messages_by_chat_id": None,
+        "get_chat_title_by_id": "Chat",
+    }.items():
+        monkeypatch.setattr(
+            middleware.Chats, name, lambda *args, value=value, **kwargs: value
+        )
+
+    def upsert_message(chat_id, message_id, message):
+        if saves is not None:
+            saves.append(message)
+
+    monkeypatch.setattr(
+        middleware.Chats, "upsert_message_to_chat_by_id_and_message_id", upsert_message
+    )
+
+    asyncio.run(
+        middleware.process_chat_response(
+            SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace())),
+            make_response(deltas, cancelled),
+            {"model": "model-1", "messages": [{"role": "user", "content": "Hi"}]},
+            SimpleNamespace(id="user-1"),
+            {
+                "session_id": "session-1",
+                "chat_id": "chat-1",
+                "message_id": "message-1",
+                "stream_delta": True,
+            },
+            {"id": "model-1"},
+            [],
+            None,
+        )
+    )
+    return [
+        event["data"]
+        for event in events
+        if event["type"] == "chat:completion" and "seq" in event["data"]
+    ]
+
+
+def test_mixed_reasoning_and_content_chunk_has_no_gap(monkeypatch):
+    data = stream(
+        monkeypatch,
+        [
+            {"reasoning_content": "Let me"},
+            {"reasoning_content": " think.", "content": "Hello"},
+            {"content": " world"},
+        ],
+    )
+
+    assert [item["seq"] for item in data] == list(range(1, len(data) + 1))
+
+    content = ""
+    for item in data:
+        content = (
+            item["content"]
+            if "content" in item
+            else apply_content_delta(content, item["delta"])
+        )
+    assert data[-1]["done"]
+    assert "Let me think." in content
+    assert content.endswith("Hello world")
+
+
+def test_realtime_save_is_buffered_until_completion(monkeypatch):
+    monkeypatch.setattr(
+        middleware,
+        "ChatMessageBuffer",
+        partial(ChatMessageBuffer, interval=60, max_bytes=1024),
+    )
+    saves = []
+    stream(
+        monkeypatch,
+        [{"content": "Hello"}, {"content": " world"}, {"content": "!"}],
+        realtime_save=True,
+        saves=saves,
+    )
+
+    # Below both thresholds, the only content write is the final flush
+    assert [save for save in saves if "content" in save] == [
+        {"content": "Hello world!"}
+    ]
+
+
+def test_realtime_save_is_flushed_on_cancel(monkeypatch):
+    saves = []
+    events = stream(
+        monkeypatch,
+        [{"content": "Hello"}, {"content": " world"}],
+        realtime_save=True,
+        cancelled=True,
+        saves=saves,
+    )
+
+    assert [save for save in saves if "content" in save] == [{"content": "Hello world"}]
+    assert not any(item.get("done") for item in events)
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+from fakeredis import FakeRedis, FakeServer
+from open_webui.config import AppConfig
+
+
+def create_replica(server: FakeServer, cache_ttl: float) -> AppConfig:
+    config = AppConfig(cache_ttl=cache_ttl)
+    # Bypass the DB-backed PersistentConfig, only the Redis sync is under test
+    config._state["WEBUI_NAME"] = SimpleNamespace(value="Open WebUI", save=lambda: None)
+    object.__setattr__(
+        config, "_redis", FakeRedis(server=server, decode_responses=True)
+    )
+    return config
+
+
+def test_reads_are_served_from_memory_until_the_version_changes(monkeypatch):
+    server = FakeServer()
+    writer = create_replica(server, cache_ttl=60)
+    reader = create_replica(server, cache_ttl=60)
+
+    assert reader.WEBUI_NAME == "Open WebUI"
+
+    calls = []
+    get = reader._redis.get
+    monkeypatch.setattr(reader._redis, "get", lambda key: calls.append(key) or get(key))
+    for _ in range(100):
+        assert reader.WEBUI_NAME == "Open WebUI"
+    assert calls == []
+
+    writer.WEBUI_NAME = "Team WebUI"
+    assert writer.WEBUI_NAME == "Team WebUI"
+    # Within the TTL the reader may still serve the old value
+    assert reader.WEBUI_NAME == "Open WebUI"
+
+    reader._cache["checked_at"] -= 60
+    assert reader.WEBUI_NAME == "Team WebUI"
+    assert calls == ["open-webui:config:version", "open-webui:config:WEBUI_NAME"]
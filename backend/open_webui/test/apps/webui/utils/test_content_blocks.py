@@ -0,0 +1,148 @@
+import random
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    serialize_content_blocks,
+)
+
+
+def record_stream(num_deltas: int, seed: int = 0) -> list[tuple]:
+    """
+    Builds a deterministic stream of `num_deltas` events shaped like a
+    reasoning model response that calls a tool and the code interpreter.
+    """
+    rng = random.Random(seed)
+    words = ["lorem", "ipsum", "<b>", "&amp;", '"quoted"', "```", "\n", "> note"]
+
+    def delta():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+
+    phases = [
+        ("reasoning", 0.2),
+        ("text", 0.3),
+        ("tool_calls", None),
+        ("text", 0.2),
+        ("code_interpreter", 0.2),
+        ("code_output", None),
+        ("text", 0.1),
+    ]
+
+    events = []
+    for phase, share in phases:
+        if share is None:
+            events.append((phase, None))
+        else:
+            events.extend((phase, delta()) for _ in range(int(num_deltas * share)))
+    return events
+
+
+def replay(events: list[tuple], serialize) -> list[str]:
+    """Applies the events to `content_blocks` the way the middleware does."""
+    content_blocks = [{"type": "text", "content": ""}]
+    outputs = []
+
+    for event_type, value in events:
+        last = content_blocks[-1]
+
+        if event_type == "reasoning":
+            if last["type"] != "reasoning":
+                content_blocks.append(
+                    {
+                        "type": "reasoning",
+                        "start_tag": "think",
+                        "end_tag": "/think",
+                        "attributes": {"type": "reasoning_content"},
+                        "content": "",
+                        "started_at": 0,
+                    }
+                )
+            content_blocks[-1]["content"] += value
+        elif event_type == "text":
+            if last["type"] == "reasoning":
+                last["ended_at"] = 2
+                last["duration"] = 2
+                content_blocks.append({"type": "text", "content": ""})
+            elif last["type"] == "code_interpreter":
+                content_blocks.append({"type": "text", "content": ""})
+            content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+        elif event_type == "tool_calls":
+            tool_call = {
+                "id": "call_1",
+                "function": {"name": "search", "arguments": '{"query": "<x>"}'},
+            }
+            content_blocks.append({"type": "tool_calls", "content": [tool_call]})
+            outputs.append(serialize(content_blocks))
+            content_blocks[-1]["results"] = [
+                {"tool_call_id": "call_1", "content": '{"result": "a & b"}'}
+            ]
+            content_blocks.append({"type": "text", "content": ""})
+        elif event_type == "code_interpreter":
+            if last["type"] != "code_interpreter":
+                content_blocks.append(
+                    {
+                        "type": "code_interpreter",
+                        "start_tag": "code_interpreter",
+                        "end_tag": "/code_interpreter",
+                        "attributes": {"type": "code", "lang": "python"},
+                        "content": "",
+                    }
+                )
+            content_blocks[-1]["content"] += value
+        elif event_type == "code_output":
+            content_blocks[-1]["output"] = {"stdout": "42\n<done>"}
+
+        outputs.append(serialize(content_blocks))
+
+    return outputs
+
+
+def test_incremental_serializer_matches_full_serialization():
+    events = record_stream(2000)
+
+    expected = replay(events, serialize_content_blocks)
+    serializer = ContentBlockSerializer()
+    assert replay(events, serializer.serialize) == expected
+
+    serializer = ContentBlockSerializer()
+    assert replay(events, lambda blocks: serializer.serialize(blocks, raw=True)) == (
+        replay(events, lambda blocks: serialize_content_blocks(blocks, raw=True))
+    )
+
+
+def test_incremental_serializer_invalidates_changed_blocks():
+    serializer = ContentBlockSerializer()
+    content_blocks = [
+        {"type": "text", "content": "Let me run this ```"},
+        {"type": "code_interpreter", "attributes": {}, "content": "print(1)"},
+        {"type": "text", "content": ""},
+    ]
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+    # The middleware pops trailing empty blocks and later mutates the new tail
+    content_blocks.pop()
+    content_blocks[-1]["output"] = {"stdout": "1"}
+    content_blocks.append({"type": "text", "content": "Done"})
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: python test_content_blocks.py
+    events = record_stream(10_000)
+
+    start = time.perf_counter()
+    replay(events, serialize_content_blocks)
+    full = time.perf_counter() - start
+
+    serializer = ContentBlockSerializer()
+    start = time.perf_counter()
+    replay(events, serializer.serialize)
+    incremental = time.perf_counter() - start
+
+    print(f"{len(events)} deltas")
+    print(f"full serialization:        {full:.3f}s")
+    print(f"incremental serialization: {incremental:.3f}s ({full / incremental:.1f}x)")
@@ -0,0 +1,65 @@
+from open_webui.utils.content_delta import ContentDeltaEncoder, merge_content_deltas
+
+
+def apply(content: str, data: dict) -> str:
+    # Mirrors the client: offsets are in UTF-16 code units
+    if "content" in data:
+        return data["content"]
+
+    encoded = content.encode("utf-16-le")[: data["delta"]["offset"] * 2]
+    return encoded.decode("utf-16-le") + data["delta"]["text"]
+
+
+def test_deltas_reconstruct_content():
+    snapshots = [
+        "Hello",
+        "Hello 👋",
+        "Hello 👋 wörld",
+        "Hello 👋 wö",  # truncated
+        "Hello 👋 wö<details>",
+        "Hello 👋 wö<details>\n```py\n",
+        "Hello 👋 wö<details>\n```py\nprint(1)\n```",
+    ]
+
+    encoder = ContentDeltaEncoder(checkpoint_interval=4)
+    content = ""
+    for seq, snapshot in enumerate(snapshots, start=1):
+        data = encoder.encode(snapshot)
+        assert data["seq"] == seq
+        content = apply(content, data)
+        assert content == snapshot
+
+    final = encoder.checkpoint(snapshots[-1])
+    assert final == {"seq": len(snapshots) + 1, "content": snapshots[-1]}
+
+
+def test_checkpoints_are_periodic():
+    encoder = ContentDeltaEncoder(checkpoint_interval=3)
+    events = [encoder.encode("a" * i) for i in range(1, 8)]
+
+    assert ["content" in event for event in events] == [
+        True,
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_merged_deltas_apply_like_consecutive_deltas():
+    base = "Hello 👋"
+
+    for snapshots in [
+        ["Hello 👋 wörld", "Hello 👋 wörld!"],
+        ["Hello 👋 wörld", "Hello 👋 w"],
+        ["Hello 👋 wörld", "Hi"],
+        ["Hello", "Hello 👋👋"],
+    ]:
+        encoder = ContentDeltaEncoder(checkpoint_interval=100)
+        encoder.encode(base)
+        first, second = [encoder.encode(snapshot) for snapshot in snapshots]
+
+        merged = merge_content_deltas(first["delta"], second["delta"])
+        assert apply(base, {"delta": merged}) == snapshots[-1]
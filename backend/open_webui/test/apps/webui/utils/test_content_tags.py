@@ -0,0 +1,300 @@
+import random
+import re
+import time
+
+import pytest
+
+from open_webui.utils.content_tags import StreamingTagScanner, tag_content_handler
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+FAMILIES = [
+    ("reasoning", REASONING_TAGS),
+    ("code_interpreter", CODE_INTERPRETER_TAGS),
+    ("solution", SOLUTION_TAGS),
+]
+
+
+# Regex implementation previously inlined in `process_chat_response`, kept
+# verbatim as the reference for the differential tests below
+def legacy_tag_content_handler(content_type, tags, content, content_blocks):
+    end_flag = False
+
+    def extract_attributes(tag_content):
+        """Extract attributes from a tag if they exist."""
+        attributes = {}
+        if not tag_content:  # Ensure tag_content is not None
+            return attributes
+        # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+        matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+        for key, value in matches:
+            attributes[key] = value
+        return attributes
+
+    if content_blocks[-1]["type"] == "text":
+        for start_tag, end_tag in tags:
+            # Match start tag e.g., <tag> or <tag attr="value">
+            start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+            match = re.search(start_tag_pattern, content)
+            if match:
+                attr_content = (
+                    match.group(1) if match.group(1) else ""
+                )  # Ensure it's not None
+                attributes = extract_attributes(
+                    attr_content
+                )  # Extract attributes safely
+
+                # Capture everything before and after the matched tag
+                before_tag = content[: match.start()]  # Content before opening tag
+                after_tag = content[match.end() :]  # Content after opening tag
+
+                # Remove the start tag and after from the currently handling text block
+                content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+                    match.group(0) + after_tag, ""
+                )
+
+                if before_tag:
+                    content_blocks[-1]["content"] = before_tag
+
+                if not content_blocks[-1]["content"]:
+                    content_blocks.pop()
+
+                # Append the new block
+                content_blocks.append(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+
+                if after_tag:
+                    content_blocks[-1]["content"] = after_tag
+                    legacy_tag_content_handler(
+                        content_type, tags, after_tag, content_blocks
+                    )
+
+                break
+    elif content_blocks[-1]["type"] == content_type:
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        # Match end tag e.g., </tag>
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        # Check if the content has the end tag
+        if re.search(end_tag_pattern, content):
+            end_flag = True
+
+            block_content = content_blocks[-1]["content"]
+            # Strip start and end tags from the content
+            start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+            block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+            end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+            split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+            # Content inside the tag
+            block_content = split_content[0].strip() if split_content else ""
+
+            # Leftover content (everything after `</tag>`)
+            leftover_content = (
+                split_content[1].strip() if len(split_content) > 1 else ""
+            )
+
+            if block_content:
+                content_blocks[-1]["content"] = block_content
+                content_blocks[-1]["ended_at"] = time.time()
+                content_blocks[-1]["duration"] = int(
+                    content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+                )
+
+                # Reset the content_blocks by appending a new text block
+                if content_type != "code_interpreter":
+                    if leftover_content:
+
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+            else:
+                # Remove the block if content is empty
+                content_blocks.pop()
+
+                if leftover_content:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": leftover_content,
+                        }
+                    )
+                else:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": "",
+                        }
+                    )
+
+            # Clean processed content
+            content = re.sub(
+                rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                "",
+                content,
+                flags=re.DOTALL,
+            )
+
+    return content, content_blocks, end_flag
+
+
+def generate_stream(rng: random.Random) -> str:
+    pieces = [
+        "lorem ",
+        "ipsum",
+        "\n",
+        "\n\n",
+        " < 3 ",
+        "<",
+        ">",
+        "a <b> c",
+        "<thin",
+        '<think duration="3">',
+        "<think\n>",
+        "<think \n>",
+        '<code_interpreter type="code" lang="python">',
+        "</code_interpreter>",
+        "<|begin_of_solution|>",
+        "<|end_of_solution|>",
+    ]
+    for start_tag, end_tag in REASONING_TAGS:
+        pieces.extend([f"<{start_tag}>", f"<{end_tag}>", f"<{start_tag} x>"])
+
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(1, 40)))
+
+
+def split_stream(rng: random.Random, text: str) -> list[str]:
+    chunks = []
+    while text:
+        size = rng.randint(1, 12)
+        chunks.append(text[:size])
+        text = text[size:]
+    return chunks
+
+
+def strip_timings(content_blocks: list[dict]) -> list[dict]:
+    return [
+        {
+            key: value
+            for key, value in block.items()
+            if key not in ("started_at", "ended_at", "duration")
+        }
+        for block in content_blocks
+    ]
+
+
+def run(chunks: list[str], handler, scanner=None) -> list[tuple]:
+    # Mirrors the `value` handling of the streaming loop in the middleware
+    content = ""
+    content_blocks = [{"type": "text", "content": content}]
+    if scanner is not None:
+        scanner.reset(content)
+
+    snapshots = []
+    for value in chunks:
+        content = scanner.feed(value) if scanner else f"{content}{value}"
+        if not content_blocks:
+            content_blocks.append({"type": "text", "content": ""})
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+        end = False
+        for content_type, tags in FAMILIES:
+            content, content_blocks, end = handler(
+                content_type, tags, content, content_blocks
+            )
+            if end and content_type == "code_interpreter":
+                break
+
+        snapshots.append((content, strip_timings(content_blocks)))
+        if end and content_type == "code_interpreter":
+            break
+
+    return snapshots
+
+
+@pytest.mark.parametrize("seed", range(500))
+def test_matches_legacy_implementation(seed):
+    rng = random.Random(seed)
+    chunks = split_stream(rng, generate_stream(rng))
+
+    scanner = StreamingTagScanner([tag for _, tags in FAMILIES for tag in tags])
+
+    def handler(content_type, tags, content, content_blocks):
+        return tag_content_handler(content_type, tags, content, content_blocks, scanner)
+
+    assert run(chunks, handler, scanner) == run(chunks, legacy_tag_content_handler)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_scanner_matches_regex_search(seed):
+    rng = random.Random(seed)
+    tags = [tag for _, tags in FAMILIES for tag in tags]
+    scanner = StreamingTagScanner(tags)
+
+    content = ""
+    for value in split_stream(rng, generate_stream(rng)):
+        content = scanner.feed(value)
+
+        for start_tag, end_tag in tags:
+            expected = re.search(rf"<{re.escape(start_tag)}(\s.*?)?>", content)
+            match = scanner.search_start(start_tag)
+            assert (match and match.span()) == (expected and expected.span())
+            assert scanner.has_end_tag(end_tag) == bool(
+                re.search(rf"<{re.escape(end_tag)}>", content)
+            )
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: python test_content_tags.py
+    rng = random.Random(0)
+    words = ["lorem ", "ipsum ", "a < b ", "\n"]
+    text = "".join(rng.choice(words) for _ in range(20_000))
+    chunks = ["<think>", *split_stream(rng, text), "</think>", *split_stream(rng, text)]
+
+    start = time.perf_counter()
+    run(chunks, legacy_tag_content_handler)
+    legacy = time.perf_counter() - start
+
+    scanner = StreamingTagScanner([tag for _, tags in FAMILIES for tag in tags])
+
+    def handler(content_type, tags, content, content_blocks):
+        return tag_content_handler(content_type, tags, content, content_blocks, scanner)
+
+    start = time.perf_counter()
+    run(chunks, handler, scanner)
+    streaming = time.perf_counter() - start
+
+    print(f"{len(chunks)} deltas")
+    print(f"regex rescans:     {legacy:.3f}s")
+    print(f"streaming scanner: {streaming:.3f}s ({legacy / streaming:.1f}x)")
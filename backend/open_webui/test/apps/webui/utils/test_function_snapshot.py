@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sqlalchemy import event
+
+from open_webui.models import functions as function_models
+from open_webui.models.functions import Function, FunctionForm, FunctionMeta, Functions
+from open_webui.utils import plugin
+from open_webui.utils.function_snapshot import FunctionSnapshots
+
+FILTER = """
+from pydantic import BaseModel
+
+class Filter:
+    class Valves(BaseModel):
+        priority: int = 0
+
+    def __init__(self):
+        self.valves = self.Valves()
+        self.toggle = True
+"""
+
+ACTION = """
+class Action:
+    pass
+"""
+
+
+@pytest.fixture(autouse=True)
+def db(sqlite_db):
+    return sqlite_db([Function.__table__], [function_models])
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loads = []
+    load_function_module_by_id = plugin.load_function_module_by_id
+
+    def load(function_id, content=None):
+        loads.append(function_id)
+        return load_function_module_by_id(function_id, content)
+
+    monkeypatch.setattr(plugin, "load_function_module_by_id", load)
+    return loads
+
+
+def make_request():
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+
+
+def add_function(id: str, type: str, content: str, is_global: bool = False):
+    Functions.insert_new_function(
+        "admin",
+        type,
+        FunctionForm(id=id, name=id, content=content, meta=FunctionMeta()),
+    )
+    Functions.update_function_by_id(id, {"is_active": True, "is_global": is_global})
+
+
+def test_snapshot_holds_active_functions(loads):
+    add_function("my_filter", "filter", FILTER, is_global=True)
+    add_function("my_action", "action", ACTION)
+    add_function("inactive", "action", ACTION)
+    Functions.update_function_by_id("inactive", {"is_active": False})
+    Functions.update_function_valves_by_id("my_filter", {"priority": 3})
+
+    snapshot = FunctionSnapshots(ttl=60).get(make_request())
+
+    assert set(snapshot.functions) == {"my_filter", "my_action"}
+    assert [f.id for f in snapshot.get_functions_by_type("filter", True)] == [
+        "my_filter"
+    ]
+    assert snapshot.get_functions_by_type("action", global_only=True) == []
+    assert snapshot.valves["my_filter"] == {"priority": 3}
+    assert snapshot.modules["my_filter"].valves.priority == 3
+    assert sorted(loads) == ["my_action", "my_filter"]
+
+
+def test_snapshot_is_rebuilt_only_after_writes(db, loads):
+    add_function("my_filter", "filter", FILTER)
+    request = make_request()
+    snapshots = FunctionSnapshots(ttl=60)
+    snapshot = snapshots.get(request)
+
+    statements = []
+    event.listen(
+        db,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    assert snapshots.get(request) is snapshot
+    assert statements == []
+
+    Functions.update_function_by_id("my_filter", {"is_global": True})
+    rebuilt = snapshots.get(request)
+
+    assert rebuilt is not snapshot
+    assert rebuilt.functions["my_filter"].is_global
+    # The content didn't change, neither does the module
+    assert rebuilt.modules["my_filter"] is snapshot.modules["my_filter"]
+    assert loads == ["my_filter"]
+
+
+def test_broken_function_is_left_out(loads):
+    add_function("broken", "filter", "raise ValueError('boom')")
+
+    snapshot = FunctionSnapshots(ttl=60).get(make_request())
+
+    assert snapshot.functions == {}
+    assert not Functions.get_function_by_id("broken").is_active
@@ -0,0 +1,70 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.http_sessions import ClientSessionRegistry, release_response
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def test_requests_reuse_pooled_connections():
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"ok": True})
+
+    async def main():
+        server = await serve(handler)
+        registry = ClientSessionRegistry(limit_per_host=4)
+        try:
+            base_url = str(server.make_url(""))
+            session = registry.get_session(f"{base_url}/api/tags")
+            assert registry.get_session(f"{base_url}/v1/models") is session
+
+            for path in ("api/tags", "v1/models", "api/chat"):
+                r = await session.get(f"{base_url}/{path}")
+                assert await r.json() == {"ok": True}
+                await release_response(r)
+
+            stats = registry.get_stats()
+            assert list(stats) == [base_url.rstrip("/")]
+            assert stats[base_url.rstrip("/")]["in_use"] == 0
+            assert stats[base_url.rstrip("/")]["idle"] == 1
+        finally:
+            await registry.close()
+            await server.close()
+
+        assert session.closed
+        assert registry.get_stats() == {}
+
+    asyncio.run(main())
+
+    # Every request went over the same keep-alive connection
+    assert len(peers) == 3
+    assert len(set(peers)) == 1
+
+
+def test_sessions_are_per_base_url_and_loop():
+    registry = ClientSessionRegistry()
+
+    async def get_sessions():
+        return (
+            registry.get_session("http://ollama:11434/api/chat"),
+            registry.get_session("https://api.openai.com/v1/chat/completions"),
+        )
+
+    first = asyncio.run(get_sessions())
+    assert first[0] is not first[1]
+
+    # A session can't be used from another event loop, it is replaced
+    second = asyncio.run(get_sessions())
+    assert second[0] is not first[0]
+    assert len(registry.sessions) == 2
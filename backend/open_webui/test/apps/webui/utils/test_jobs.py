@@ -0,0 +1,248 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.models import jobs as job_models
+from open_webui.models.jobs import Job, Jobs
+from open_webui.utils import jobs
+from open_webui.utils.jobs import (
+    JobManager,
+    LocalJobQueue,
+    RedisJobQueue,
+    register_job_handler,
+    register_maintenance_task,
+    update_job_progress,
+)
+
+
+@pytest.fixture(autouse=True)
+def db(sqlite_db, monkeypatch):
+    sqlite_db([Job.__table__], [job_models])
+    monkeypatch.setattr(jobs.Users, "get_user_by_id", lambda id: None)
+    monkeypatch.setattr(jobs, "JOB_PROGRESS_INTERVAL", 0)
+
+
+def test_local_queue_orders_by_priority():
+    queue = LocalJobQueue()
+    queue.push("low", 0)
+    queue.push("high", 1)
+    queue.push("low-2", 0)
+
+    assert [queue.pop(0), queue.pop(0), queue.pop(0)] == ["high", "low", "low-2"]
+    assert queue.pop(0) is None
+
+
+def test_redis_queue_orders_by_priority():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    queue = RedisJobQueue(fakeredis.FakeRedis(decode_responses=True))
+    queue.push("low", 0)
+    queue.push("high", 1)
+    queue.push("high", 1)
+
+    assert [queue.pop(), queue.pop()] == ["high", "low"]
+    assert queue.pop() is None
+
+
+def test_job_runs_to_completion():
+    @register_job_handler("test_add")
+    def handler(request, user, payload):
+        return {"sum": payload["a"] + payload["b"]}
+
+    manager = JobManager(LocalJobQueue())
+    job = manager.enqueue("user-1", "test_add", {"a": 1, "b": 2})
+
+    manager.run(Jobs.claim_job_by_id(job.id))
+
+    job = Jobs.get_job_by_id(job.id)
+    assert job.status == "completed"
+    assert job.result == {"sum": 3}
+    assert job.attempts == 1
+
+
+def test_failed_job_can_be_retried():
+    calls = []
+
+    @register_job_handler("test_flaky")
+    def handler(request, user, payload):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("boom")
+
+    manager = JobManager(LocalJobQueue())
+    job = manager.enqueue("user-1", "test_flaky", {})
+    manager.run(Jobs.claim_job_by_id(manager.queue.pop(0)))
+
+    job = Jobs.get_job_by_id(job.id)
+    assert job.status == "failed"
+    assert job.error == "boom"
+    assert manager.retry(job.id).status == "pending"
+    assert manager.retry(job.id) is None
+
+    manager.run(Jobs.claim_job_by_id(manager.queue.pop(0)))
+    job = Jobs.get_job_by_id(job.id)
+    assert job.status == "completed"
+    assert job.attempts == 2
+
+
+def test_cancel_stops_running_job():
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    @register_job_handler("test_long")
+    def handler(request, user, payload):
+        started.set()
+        cancelled.wait(5)
+        update_job_progress({"step": 1})
+        return {"finished": True}
+
+    manager = JobManager(LocalJobQueue())
+    job = manager.enqueue("user-1", "test_long", {})
+    thread = threading.Thread(target=manager.run, args=(Jobs.claim_job_by_id(job.id),))
+    thread.start()
+
+    started.wait(5)
+    assert manager.cancel(job.id).status == "cancelled"
+    cancelled.set()
+    thread.join(5)
+
+    job = Jobs.get_job_by_id(job.id)
+    assert job.status == "cancelled"
+    assert job.result is None
+
+
+def test_cancelled_pending_job_is_not_claimed():
+    manager = JobManager(LocalJobQueue())
+    job = manager.enqueue("user-1", "test_add", {"a": 1, "b": 2})
+
+    manager.cancel(job.id)
+
+    assert Jobs.claim_job_by_id(job.id) is None
+
+
+def test_cancelled_run_cannot_finish_its_retry():
+    manager = JobManager(LocalJobQueue())
+    job = manager.enqueue("user-1", "test_add", {"a": 1, "b": 2})
+    first = Jobs.claim_job_by_id(job.id)
+
+    manager.cancel(job.id)
+    manager.retry(job.id)
+    second = Jobs.claim_job_by_id(job.id)
+    assert second.attempts == first.attempts + 1
+
+    # The cancelled run doesn't notice, it must not touch the new attempt
+    assert not Jobs.update_job_progress_by_id(
+        job.id, {"step": 1}, attempt=first.attempts
+    )
+    assert (
+        Jobs.finish_job_by_id(
+            job.id, "completed", result={"sum": 0}, attempt=first.attempts
+        )
+        is None
+    )
+
+    manager.run(second)
+    job = Jobs.get_job_by_id(job.id)
+    assert job.status == "completed"
+    assert job.result == {"sum": 3}
+
+
+def test_events_are_emitted_from_worker_threads(monkeypatch):
+    emitted = []
+
+    async def emit(event, data, to=None):
+        emitted.append((event, data, to))
+
+    monkeypatch.setattr(jobs, "sio", SimpleNamespace(emit=emit))
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    manager = JobManager(LocalJobQueue())
+    manager.loop = loop
+
+    @register_job_handler("test_events")
+    def handler(request, user, payload):
+        manager.emit_to_user("user-1", "file-events", {"stage": "embedding"})
+
+    job = manager.enqueue("user-1", "test_events", {})
+    thread = threading.Thread(target=manager.run, args=(Jobs.claim_job_by_id(job.id),))
+    thread.start()
+    thread.join(5)
+
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+
+    assert ("file-events", {"stage": "embedding"}, "user:user-1") in emitted
+    assert [event for event, _, _ in emitted].count("job-events") >= 2
+
+
+def test_jobs_of_a_dead_worker_are_requeued():
+    manager = JobManager(LocalJobQueue(), lease_timeout=60)
+    job = manager.enqueue("user-1", "test_add", {"a": 1, "b": 2})
+    manager.queue.pop(0)
+    claimed = Jobs.claim_job_by_id(job.id)
+    Jobs.update_job_progress_by_id(job.id, {"step": 1}, attempt=claimed.attempts)
+
+    # Still within its lease
+    assert manager.requeue_stale_jobs() == []
+
+    # Its process died, nothing renews the lease any more
+    manager.lease_timeout = -1
+    requeued = manager.requeue_stale_jobs()
+    assert [job.id for job in requeued] == [job.id]
+    assert requeued[0].status == "pending"
+    assert requeued[0].progress == {"step": 1}
+    assert manager.queue.pop(0) == job.id
+
+
+def test_running_jobs_renew_their_lease():
+    started = threading.Event()
+    finish = threading.Event()
+
+    @register_job_handler("test_lease")
+    def handler(request, user, payload):
+        started.set()
+        finish.wait(5)
+
+    manager = JobManager(LocalJobQueue(), lease_timeout=60)
+    job = manager.enqueue("user-1", "test_lease", {})
+    thread = threading.Thread(target=manager.run, args=(Jobs.claim_job_by_id(job.id),))
+    thread.start()
+    started.wait(5)
+
+    with job_models.get_db() as db:
+        db.query(Job).filter_by(id=job.id).update({"heartbeat_at": 0})
+        db.commit()
+    manager.heartbeat()
+
+    assert Jobs.requeue_stale_jobs(int(time.time()) - 60) == []
+    finish.set()
+    thread.join(5)
+    assert Jobs.get_job_by_id(job.id).status == "completed"
+
+
+def test_get_jobs_by_type():
+    reindex = Jobs.insert_new_job("user-1", "knowledge_reindex")
+    Jobs.insert_new_job("user-1", "file_process")
+    done = Jobs.insert_new_job("user-1", "knowledge_reindex")
+    Jobs.cancel_job_by_id(done.id)
+
+    jobs = Jobs.get_jobs_by_type("knowledge_reindex", ["pending", "running"])
+    assert [job.id for job in jobs] == [reindex.id]
+
+
+def test_maintenance_tasks_run_despite_failures(monkeypatch):
+    monkeypatch.setattr(jobs, "MAINTENANCE_TASKS", [])
+    calls = []
+
+    @register_maintenance_task
+    def failing():
+        raise ValueError("boom")
+
+    register_maintenance_task(lambda: calls.append(1))
+
+    JobManager(LocalJobQueue()).run_maintenance_tasks()
+    assert calls == [1]
@@ -0,0 +1,104 @@
+import pytest
+
+from sqlalchemy import event
+
+from open_webui.models import groups as group_models
+from open_webui.models import models as model_models
+from open_webui.models.groups import (
+    Group,
+    GroupForm,
+    GroupMember,
+    Groups,
+    GroupUpdateForm,
+)
+from open_webui.models.models import Model, ModelForm, ModelMeta, ModelParams, Models
+from open_webui.utils.model_access import ModelAccessIndex
+
+
+@pytest.fixture(autouse=True)
+def db(sqlite_db):
+    return sqlite_db(
+        [Model.__table__, Group.__table__, GroupMember.__table__],
+        [model_models, group_models],
+    )
+
+
+def add_model(id: str, user_id: str, access_control=None):
+    return Models.insert_new_model(
+        ModelForm(
+            id=id,
+            name=id,
+            meta=ModelMeta(),
+            params=ModelParams(),
+            access_control=access_control,
+        ),
+        user_id,
+    )
+
+
+def read_access(group_ids=(), user_ids=()):
+    return {"read": {"group_ids": list(group_ids), "user_ids": list(user_ids)}}
+
+
+def test_visible_model_ids():
+    group = Groups.insert_new_group("admin", GroupForm(name="team", description=""))
+    Groups.update_group_by_id(
+        group.id, GroupUpdateForm(name="team", description="", user_ids=["user-1"])
+    )
+
+    add_model("public", "admin")
+    add_model("private", "admin", read_access())
+    add_model("own", "user-1", read_access())
+    add_model("shared", "admin", read_access(user_ids=["user-1"]))
+    add_model("team", "admin", read_access(group_ids=[group.id]))
+
+    index = ModelAccessIndex(ttl=60)
+
+    assert index.get_visible_model_ids("user-1") == {
+        "public",
+        "own",
+        "shared",
+        "team",
+    }
+    assert index.get_visible_model_ids("user-2") == {"public"}
+    assert index.has_read_access("user-1", "team")
+    assert not index.has_read_access("user-2", "team")
+    assert not index.has_read_access("user-1", "missing")
+
+
+def test_writes_invalidate_index():
+    group = Groups.insert_new_group("admin", GroupForm(name="team", description=""))
+    add_model("team", "admin", read_access(group_ids=[group.id]))
+
+    index = ModelAccessIndex(ttl=60)
+    assert not index.has_read_access("user-1", "team")
+
+    Groups.update_group_by_id(
+        group.id, GroupUpdateForm(name="team", description="", user_ids=["user-1"])
+    )
+    assert index.has_read_access("user-1", "team")
+
+    Models.delete_model_by_id("team")
+    assert not index.has_read_access("user-1", "team")
+
+
+def test_models_loaded_once_per_version(db):
+    for i in range(10):
+        add_model(f"model-{i}", "admin", read_access(user_ids=["user-1"]))
+
+    statements = []
+    event.listen(
+        db,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    index = ModelAccessIndex(ttl=60)
+    assert len(index.get_visible_model_ids("user-1")) == 10
+    assert len(index.get_visible_model_ids("user-2")) == 0
+    index.get_visible_model_ids("user-1")
+
+    model_queries = [s for s in statements if "FROM model" in s]
+    assert len(model_queries) == 1
+    # One group lookup per user
+    assert len(statements) == 3
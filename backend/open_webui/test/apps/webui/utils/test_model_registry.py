@@ -0,0 +1,149 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi import Request
+
+from open_webui.utils import model_registry
+from open_webui.utils.model_registry import ModelRegistry
+
+
+def make_request(redis=None) -> Request:
+    app = SimpleNamespace(state=SimpleNamespace(redis=redis))
+    return Request({"type": "http", "app": app, "headers": []})
+
+
+def make_registry(calls: list) -> ModelRegistry:
+    registry = ModelRegistry(refresh_interval=10)
+
+    async def fetch(request):
+        calls.append(1)
+        await asyncio.sleep(0)
+        return {"models": [{"model": f"llama-{len(calls)}"}]}
+
+    registry.register("ollama", fetch)
+    return registry
+
+
+def test_serves_stale_models_while_refreshing(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_registry.time, "time", lambda: now[0])
+    calls = []
+    registry = make_registry(calls)
+    request = make_request()
+
+    async def main():
+        # Concurrent first requests share one fetch
+        first = await asyncio.gather(
+            registry.get(request, "ollama"), registry.get(request, "ollama")
+        )
+        assert first[0] == first[1] == {"models": [{"model": "llama-1"}]}
+        assert len(calls) == 1
+
+        # Copies, callers may decorate them
+        first[0]["models"].clear()
+        assert await registry.get(request, "ollama") == first[1]
+
+        now[0] += 11
+        assert await registry.get(request, "ollama") == first[1]
+        await registry.tasks["ollama"]
+        assert await registry.get(request, "ollama") == {
+            "models": [{"model": "llama-2"}]
+        }
+
+        await registry.invalidate(request.app, "ollama")
+        assert await registry.get(request, "ollama") == {
+            "models": [{"model": "llama-3"}]
+        }
+
+    asyncio.run(main())
+
+
+def test_failed_refresh_keeps_previous_models(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_registry.time, "time", lambda: now[0])
+    registry = ModelRegistry(refresh_interval=10)
+    results = [{"data": [{"id": "gpt-4o"}]}]
+
+    async def fetch(request):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    registry.register("openai", fetch)
+    request = make_request()
+
+    async def main():
+        assert await registry.get(request, "openai") == {"data": [{"id": "gpt-4o"}]}
+
+        results.append(ConnectionError("down"))
+        now[0] += 11
+        await registry.refresh(request.app, "openai")
+        assert await registry.get(request, "openai") == {"data": [{"id": "gpt-4o"}]}
+
+    asyncio.run(main())
+
+
+def test_last_known_good_per_connection():
+    registry = ModelRegistry()
+
+    async def respond(value):
+        return value
+
+    async def main():
+        models = {"models": [{"model": "llama3:latest"}]}
+        assert await registry.last_known_good("ollama:a", respond(models)) == models
+
+        # Failed connections keep their last models, unknown ones stay empty
+        assert await registry.last_known_good("ollama:a", respond(None)) == models
+        assert await registry.last_known_good("ollama:b", respond(None)) is None
+        assert (
+            await registry.last_known_good("ollama:a", respond({"error": "down"}))
+            == models
+        )
+
+    asyncio.run(main())
+
+
+def test_last_known_good_is_not_shared_across_users(monkeypatch):
+    registry = ModelRegistry()
+
+    async def respond(value):
+        return value
+
+    async def main():
+        # Connections with the same URL are told apart by index
+        assert registry.get_connection_key(
+            "openai", 0, "http://a"
+        ) != registry.get_connection_key("openai", 1, "http://a")
+
+        monkeypatch.setattr(model_registry, "ENABLE_FORWARD_USER_INFO_HEADERS", True)
+        key = registry.get_connection_key("openai", 0, "http://a", user=object())
+        assert key is None
+
+        models = {"data": [{"id": "gpt"}]}
+        assert await registry.last_known_good(key, respond(models)) == models
+        assert await registry.last_known_good(key, respond(None)) is None
+        assert registry.responses == {}
+
+    asyncio.run(main())
+
+
+def test_models_are_shared_through_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    first_calls, second_calls = [], []
+    first, second = make_registry(first_calls), make_registry(second_calls)
+
+    async def main():
+        request = make_request(redis)
+        models = await first.get(request, "ollama")
+
+        # Another worker picks up the models without asking the upstreams
+        assert await second.get(request, "ollama") == models
+        assert second_calls == []
+
+    asyncio.run(main())
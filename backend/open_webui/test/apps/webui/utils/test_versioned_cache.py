@@ -0,0 +1,62 @@
+import threading
+
+from open_webui.utils.versioned_cache import VersionCounter, VersionedCache
+
+
+def test_counter_bumps_from_many_threads():
+    counter = VersionCounter()
+
+    def bump():
+        for _ in range(1000):
+            counter.bump()
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value == 8000
+
+
+def test_entries_reload_after_a_write():
+    counter = VersionCounter()
+    cache = VersionedCache(lambda: counter.value, ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get("a", load) == 1
+    assert cache.get("a", load) == 1
+    assert cache.get("b", load) == 2
+
+    counter.bump()
+    assert cache.get("a", load) == 3
+
+
+def test_write_racing_a_load_leaves_the_entry_stale():
+    counter = VersionCounter()
+    cache = VersionedCache(lambda: counter.value, ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        if len(loads) == 1:
+            # Committed while the rows were being read
+            counter.bump()
+        return len(loads)
+
+    assert cache.get("a", load) == 1
+    assert cache.get("a", load) == 2
+    assert cache.get("a", load) == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = VersionedCache(lambda: 0, ttl=0)
+    loads = []
+
+    cache.get("a", lambda: loads.append(1))
+    cache.get("a", lambda: loads.append(1))
+    assert len(loads) == 2
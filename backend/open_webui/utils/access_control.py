@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from typing import Optional, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
 from open_webui.models.groups import Groups
@@ -6,6 +7,22 @@ from open_webui.models.groups import Groups
 from open_webui.config import DEFAULT_USER_PERMISSIONS
 import json
 
+# Set to a dict by the request middleware so that repeated `has_access`
+# checks within one request share a single group membership lookup
+user_group_ids_cache: ContextVar[Optional[Dict[str, List[str]]]] = ContextVar(
+    "user_group_ids_cache", default=None
+)
+
+
+def get_user_group_ids(user_id: str) -> List[str]:
+    cache = user_group_ids_cache.get()
+    if cache is None:
+        return Groups.get_group_ids_by_member_id(user_id)
+
+    if user_id not in cache:
+        cache[user_id] = Groups.get_group_ids_by_member_id(user_id)
+    return cache[user_id]
+
 
 def fill_missing_permissions(
     permissions: Dict[str, Any], default_permissions: Dict[str, Any]
@@ -111,12 +128,13 @@ def has_access(
     user_id: str,
     type: str = "write",
     access_control: Optional[dict] = None,
+    user_group_ids: Optional[List[str]] = None,
 ) -> bool:
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    if user_group_ids is None:
+        user_group_ids = get_user_group_ids(user_id)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
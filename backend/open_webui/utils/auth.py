@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import threading
+import time
 import uuid
 import jwt
 import base64
@@ -24,6 +27,7 @@ from open_webui.env import (
     STATIC_DIR,
     SRC_LOG_LEVELS,
     WEBUI_AUTH_TRUSTED_EMAIL_HEADER,
+    USER_LAST_ACTIVE_UPDATE_INTERVAL,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -39,6 +43,59 @@ log.setLevel(SRC_LOG_LEVELS["OAUTH"])
 SESSION_SECRET = WEBUI_SECRET_KEY
 ALGORITHM = "HS256"
 
+
+class LastActiveUpdater:
+    """
+    Throttles `last_active_at` writes to at most one per user per `interval`
+    seconds and writes the pending users in a single bulk `UPDATE`.
+    """
+
+    def __init__(self, interval: float = USER_LAST_ACTIVE_UPDATE_INTERVAL):
+        self.interval = interval
+        # touch() runs on threadpool threads, flush() on the event loop
+        self._lock = threading.Lock()
+        self._pending: set[str] = set()
+        self._touched_at: dict[str, float] = {}
+
+    def touch(self, user_id: str):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._touched_at.get(user_id, -self.interval) < self.interval:
+                return
+
+            self._touched_at[user_id] = now
+            self._pending.add(user_id)
+
+    def flush(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            self._touched_at = {
+                user_id: touched_at
+                for user_id, touched_at in self._touched_at.items()
+                if now - touched_at < self.interval
+            }
+
+            if not self._pending:
+                return 0
+            user_ids, self._pending = self._pending, set()
+
+        try:
+            return Users.update_users_last_active_by_ids(list(user_ids))
+        except Exception as e:
+            log.exception(f"Failed to update last active users: {e}")
+            return 0
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await asyncio.to_thread(self.flush)
+        finally:
+            self.flush()
+
+
+last_active_updater = LastActiveUpdater()
+
 ##############
 # Auth Utils
 ##############
@@ -220,7 +277,7 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_cached_user_by_id(data["id"])
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -250,10 +307,8 @@ def get_current_user(
                 current_span.set_attribute("client.user.role", user.role)
                 current_span.set_attribute("client.auth.type", "jwt")
 
-            # Refresh the user's last active timestamp asynchronously
-            # to prevent blocking the request
-            if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            # Refresh the user's last active timestamp in the next batch
+            last_active_updater.touch(user.id)
         return user
     else:
         raise HTTPException(
@@ -263,7 +318,7 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = Users.get_cached_user_by_api_key(api_key)
 
     if user is None:
         raise HTTPException(
@@ -279,7 +334,7 @@ def get_current_user_by_api_key(api_key: str):
             current_span.set_attribute("client.user.role", user.role)
             current_span.set_attribute("client.auth.type", "api_key")
 
-        Users.update_user_last_active_by_id(user.id)
+        last_active_updater.touch(user.id)
 
     return user
 
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from open_webui.env import (
+    OLLAMA_AFFINITY_MAX_IN_FLIGHT,
+    OLLAMA_BALANCER_STRATEGY,
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    OLLAMA_HEALTH_CHECK_INTERVAL,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
+
+
+# Weight of the latest sample in the latency moving average
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class Candidate:
+    idx: int
+    url: str
+    weight: float = 1.0
+
+
+@dataclass
+class NodeStats:
+    url: str
+
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    # Time to response headers, in seconds
+    ewma_latency: Optional[float] = None
+
+    ejected_until: float = 0.0
+    last_error: Optional[str] = None
+    last_probe: Optional[float] = None
+    loaded_models: set[str] = field(default_factory=set)
+
+    # Smooth weighted round-robin state
+    current_weight: float = 0.0
+
+    def is_available(self, now: float) -> bool:
+        # Past the cooldown the breaker is half open and lets requests through
+        return self.ejected_until <= now
+
+    def model_dump(self) -> dict:
+        now = time.monotonic()
+        return {
+            "url": self.url,
+            "healthy": self.is_available(now),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "ewma_latency": self.ewma_latency,
+            "ejected_for": max(self.ejected_until - now, 0),
+            "last_error": self.last_error,
+            "last_probe_age": (
+                now - self.last_probe if self.last_probe is not None else None
+            ),
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+####################
+# Strategies
+####################
+
+
+def least_in_flight(candidates: list[Candidate], nodes: list[NodeStats], model):
+    return min(
+        range(len(candidates)),
+        key=lambda i: (nodes[i].in_flight / candidates[i].weight, nodes[i].requests),
+    )
+
+
+def ewma_latency(candidates: list[Candidate], nodes: list[NodeStats], model):
+    # Nodes without samples yet are tried first; queued requests add latency
+    def cost(i):
+        latency = nodes[i].ewma_latency
+        if latency is None:
+            return (0, nodes[i].in_flight)
+        return (1, latency * (nodes[i].in_flight + 1) / candidates[i].weight)
+
+    return min(range(len(candidates)), key=cost)
+
+
+def weighted_round_robin(candidates: list[Candidate], nodes: list[NodeStats], model):
+    total = sum(candidate.weight for candidate in candidates)
+    for candidate, node in zip(candidates, nodes):
+        node.current_weight += candidate.weight
+
+    i = max(range(len(candidates)), key=lambda i: nodes[i].current_weight)
+    nodes[i].current_weight -= total
+    return i
+
+
+def model_affinity(candidates: list[Candidate], nodes: list[NodeStats], model):
+    """
+    Prefers nodes that already have `model` loaded, so it isn't loaded on
+    another GPU, unless they are all busy with OLLAMA_AFFINITY_MAX_IN_FLIGHT
+    requests or more. Otherwise the least loaded node wins.
+    """
+    loaded = [
+        i
+        for i, node in enumerate(nodes)
+        if model in node.loaded_models
+        and node.in_flight < OLLAMA_AFFINITY_MAX_IN_FLIGHT * candidates[i].weight
+    ]
+    if loaded:
+        i = least_in_flight(
+            [candidates[i] for i in loaded], [nodes[i] for i in loaded], model
+        )
+        return loaded[i]
+    return least_in_flight(candidates, nodes, model)
+
+
+STRATEGIES: dict[str, Callable[[list[Candidate], list[NodeStats], str], int]] = {
+    "least_in_flight": least_in_flight,
+    "ewma_latency": ewma_latency,
+    "weighted_round_robin": weighted_round_robin,
+    "model_affinity": model_affinity,
+}
+
+
+####################
+# Balancer
+####################
+
+
+class RequestTracker:
+    """Counts a request against its node, a no-op for unknown nodes."""
+
+    def __init__(self, balancer: "Balancer", node: Optional[NodeStats]):
+        self.balancer = balancer
+        self.node = node
+        self.started_at = time.monotonic()
+        self.finished = node is None
+
+        if node is not None:
+            node.in_flight += 1
+            node.requests += 1
+
+    def response(self, status: Optional[int] = None):
+        """Records the latency to the response headers and the outcome."""
+        node = self.node
+        if node is None:
+            return
+
+        latency = time.monotonic() - self.started_at
+        node.ewma_latency = (
+            latency
+            if node.ewma_latency is None
+            else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * node.ewma_latency
+        )
+
+        # Client errors are the request's fault, not the node's
+        if status is not None and status >= 500:
+            self.balancer.record_failure(node, f"HTTP {status}")
+        else:
+            self.balancer.record_success(node)
+
+    def error(self, e: Exception):
+        if self.node is not None:
+            self.balancer.record_failure(self.node, str(e) or type(e).__name__)
+
+    def done(self):
+        if not self.finished:
+            self.finished = True
+            self.node.in_flight -= 1
+
+
+class Balancer:
+    """
+    Picks which upstream serves a request, among the nodes that have the
+    model, with one of `STRATEGIES`. Nodes failing
+    `circuit_breaker_threshold` times in a row are left out for
+    `circuit_breaker_cooldown` seconds, then given another try. `run` probes
+    every node in the background, which also learns the models they have
+    loaded for `model_affinity`.
+
+    All state lives on the event loop and is per instance.
+    """
+
+    def __init__(
+        self,
+        strategy: str = OLLAMA_BALANCER_STRATEGY,
+        circuit_breaker_threshold: int = OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+        circuit_breaker_cooldown: float = OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+    ):
+        if strategy not in STRATEGIES:
+            log.warning(f"Unknown balancer strategy {strategy}, using least_in_flight")
+            strategy = "least_in_flight"
+
+        self.strategy = strategy
+        self.circuit_breaker_threshold = max(circuit_breaker_threshold, 1)
+        self.circuit_breaker_cooldown = circuit_breaker_cooldown
+        self.nodes: dict[str, NodeStats] = {}
+
+    def get_node(self, url: str) -> NodeStats:
+        url = url.rstrip("/")
+        if url not in self.nodes:
+            self.nodes[url] = NodeStats(url=url)
+        return self.nodes[url]
+
+    def find_node(self, request_url: str) -> Optional[NodeStats]:
+        """The node `request_url` is sent to, by longest base URL prefix."""
+        matches = [
+            url
+            for url in self.nodes
+            if request_url == url or request_url.startswith(f"{url}/")
+        ]
+        return self.nodes[max(matches, key=len)] if matches else None
+
+    def select(self, candidates: list[Candidate], model: Optional[str] = None) -> int:
+        """Returns the `idx` of the chosen candidate."""
+        if len(candidates) == 1:
+            self.get_node(candidates[0].url)
+            return candidates[0].idx
+
+        now = time.monotonic()
+        nodes = [self.get_node(candidate.url) for candidate in candidates]
+
+        available = [i for i, node in enumerate(nodes) if node.is_available(now)]
+        if available:
+            candidates = [candidates[i] for i in available]
+            nodes = [nodes[i] for i in available]
+        # else every node is ejected, better to try one than fail outright
+
+        i = STRATEGIES[self.strategy](candidates, nodes, model)
+        if model:
+            # It is about to be loaded there
+            nodes[i].loaded_models.add(model)
+        return candidates[i].idx
+
+    def track(self, request_url: str) -> RequestTracker:
+        return RequestTracker(self, self.find_node(request_url))
+
+    def record_success(self, node: NodeStats):
+        if node.consecutive_failures >= self.circuit_breaker_threshold:
+            log.info(f"Ollama node {node.url} recovered")
+        node.consecutive_failures = 0
+        node.ejected_until = 0.0
+
+    def record_failure(self, node: NodeStats, error: str):
+        node.failures += 1
+        node.consecutive_failures += 1
+        node.last_error = error
+
+        if node.consecutive_failures >= self.circuit_breaker_threshold:
+            if node.is_available(time.monotonic()):
+                log.warning(
+                    f"Ejecting Ollama node {node.url} for {self.circuit_breaker_cooldown}s: {error}"
+                )
+            node.ejected_until = time.monotonic() + self.circuit_breaker_cooldown
+
+    async def probe(
+        self,
+        url: str,
+        get_loaded_models: Callable[[], Awaitable[Optional[dict]]],
+        prefix_id: Optional[str] = None,
+    ):
+        """Checks a node with `get_loaded_models`, a call to its /api/ps."""
+        node = self.get_node(url)
+        node.last_probe = time.monotonic()
+        try:
+            response = await get_loaded_models()
+            if response is None:
+                raise Exception("No response")
+            # Error replies come back as bodies too, whatever their status
+            if not isinstance(response, dict) or "error" in response:
+                raise Exception(
+                    response.get("error") if isinstance(response, dict) else response
+                )
+            if "models" not in response:
+                raise Exception("No models in response")
+        except Exception as e:
+            self.record_failure(node, f"Health check failed: {e}")
+            return
+
+        node.loaded_models = {
+            f"{prefix_id}.{model['model']}" if prefix_id else model["model"]
+            for model in response["models"]
+        }
+        self.record_success(node)
+
+    async def run(
+        self,
+        get_targets: Callable[[], list[tuple[str, Callable, Optional[str]]]],
+        interval: float = OLLAMA_HEALTH_CHECK_INTERVAL,
+    ):
+        """
+        Probes the `(url, get_loaded_models, prefix_id)` targets returned by
+        `get_targets` every `interval` seconds until cancelled.
+        """
+        while True:
+            try:
+                targets = get_targets()
+                urls = {url.rstrip("/") for url, _, _ in targets}
+                # Forget nodes removed from the config
+                for url in list(self.nodes):
+                    if url not in urls:
+                        self.nodes.pop(url, None)
+
+                await asyncio.gather(
+                    *[self.probe(*target) for target in targets],
+                    return_exceptions=True,
+                )
+            except Exception as e:
+                log.exception(f"Error probing Ollama nodes: {e}")
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "nodes": [node.model_dump() for node in self.nodes.values()],
+        }
+
+
+OLLAMA_BALANCER = Balancer()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Optional
+
+from opentelemetry import metrics
+
+from open_webui.models.chats import Chats
+from open_webui.env import REALTIME_CHAT_SAVE_INTERVAL, REALTIME_CHAT_SAVE_BYTES
+
+meter = metrics.get_meter(__name__)
+
+flush_duration_histogram = meter.create_histogram(
+    name="chat.message.flush.duration",
+    description="Time spent writing a buffered chat message to the database",
+    unit="ms",
+)
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind buffer for a single streamed chat message.
+
+    Updates are merged in memory and written through `Chats` once
+    `interval` seconds have passed or `max_bytes` of new content have
+    accumulated since the last write. When updates stall (tool calls,
+    code execution, a slow upstream), a timer on the running loop writes
+    what is pending once `interval` has passed. Callers must `flush()` when
+    the response completes or is cancelled.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        message_id: str,
+        interval: float = REALTIME_CHAT_SAVE_INTERVAL,
+        max_bytes: int = REALTIME_CHAT_SAVE_BYTES,
+    ):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self._pending: dict = {}
+        self._flushed_size = 0
+        self._last_flush_at = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _pending_size(self) -> int:
+        content = self._pending.get("content")
+        if not isinstance(content, str):
+            return 0
+        return abs(len(content) - self._flushed_size)
+
+    def update(self, message: dict) -> None:
+        self._pending = {**self._pending, **message}
+
+        if (
+            time.monotonic() - self._last_flush_at >= self.interval
+            or self._pending_size() >= self.max_bytes
+        ):
+            self.flush(reason="threshold")
+        elif self._timer is None:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        delay = max(self.interval - (time.monotonic() - self._last_flush_at), 0)
+        self._timer = loop.call_later(delay, self.flush, "timer")
+
+    def flush(self, reason: str = "final") -> Optional[dict]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._last_flush_at = time.monotonic()
+        if not self._pending:
+            return None
+
+        message, self._pending = self._pending, {}
+        if isinstance(message.get("content"), str):
+            self._flushed_size = len(message["content"])
+
+        start_time = time.perf_counter()
+        try:
+            return Chats.upsert_message_to_chat_by_id_and_message_id(
+                self.chat_id, self.message_id, message
+            )
+        finally:
+            flush_duration_histogram.record(
+                (time.perf_counter() - start_time) * 1000.0, {"reason": reason}
+            )
@@ -0,0 +1,224 @@
+import html
+import json
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def strip_open_code_block(content: str) -> str:
+    content_stripped, original_whitespace = split_content_and_whitespace(content)
+    if is_opening_code_block(content_stripped):
+        # Remove trailing backticks that would open a new block
+        return content_stripped.rstrip("`").rstrip() + original_whitespace
+    else:
+        # Keep content as is - either closing backticks or no backticks
+        return content_stripped + original_whitespace
+
+
+def render_content_block(block: dict, raw: bool = False) -> str:
+    """
+    Renders a single content block. Code interpreter blocks additionally
+    require the preceding content to be passed through `strip_open_code_block`.
+    """
+    rendered = ""
+
+    if block["type"] == "text":
+        rendered = f"{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                rendered = f"\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                rendered = f"\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        reasoning_display_content = "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in block["content"].splitlines()
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                rendered = (
+                    f'\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                )
+            else:
+                rendered = f'\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                rendered = (
+                    f'\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                )
+            else:
+                rendered = f'\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                rendered = f'\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                rendered = f'\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                rendered = f'\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                rendered = f'\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        rendered = f"{block['type']}: {block_content}\n"
+
+    return rendered
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+
+    for block in content_blocks:
+        if block["type"] == "code_interpreter":
+            content = strip_open_code_block(content)
+        content = f"{content}{render_content_block(block, raw)}"
+
+    return content.strip()
+
+
+def get_content_block_signature(block: dict) -> tuple:
+    """
+    Returns the block attributes a rendering depends on. Signatures are
+    compared by identity, so any reassignment invalidates a cached rendering.
+    """
+    content = block.get("content")
+    results = block.get("results")
+    return (
+        block.get("type"),
+        content,
+        len(content) if isinstance(content, list) else None,
+        results,
+        len(results) if isinstance(results, list) else None,
+        block.get("output"),
+        block.get("duration"),
+        block.get("attributes"),
+    )
+
+
+class ContentBlockSerializer:
+    """
+    Incremental `serialize_content_blocks` for a growing list of blocks.
+
+    All blocks but the last are rendered once and kept as a cached prefix,
+    so each call only renders the tail block. The cache is validated against
+    the block signatures on every call and rebuilt if an earlier block changed.
+    """
+
+    def __init__(self):
+        self._states = {}
+
+    def _get_state(self, raw: bool) -> dict:
+        if raw not in self._states:
+            self._states[raw] = {
+                "blocks": [],
+                "signatures": [],
+                "prefix": "",
+                "code_prefix": None,
+            }
+        return self._states[raw]
+
+    def _is_valid(self, state: dict, content_blocks: list[dict]) -> bool:
+        if len(state["blocks"]) >= len(content_blocks):
+            return False
+
+        for block, cached_block, cached_signature in zip(
+            content_blocks, state["blocks"], state["signatures"]
+        ):
+            if block is not cached_block:
+                return False
+
+            signature = get_content_block_signature(block)
+            if any(a is not b for a, b in zip(signature, cached_signature)):
+                return False
+        return True
+
+    def serialize(self, content_blocks: list[dict], raw: bool = False) -> str:
+        if not content_blocks:
+            return ""
+
+        state = self._get_state(raw)
+        if not self._is_valid(state, content_blocks):
+            state["blocks"] = []
+            state["signatures"] = []
+            state["prefix"] = ""
+            state["code_prefix"] = None
+
+        # Extend the cached prefix with every finished block
+        for block in content_blocks[len(state["blocks"]) : -1]:
+            if block["type"] == "code_interpreter":
+                state["prefix"] = strip_open_code_block(state["prefix"])
+
+            state["prefix"] = f"{state['prefix']}{render_content_block(block, raw)}"
+            state["blocks"].append(block)
+            state["signatures"].append(get_content_block_signature(block))
+            state["code_prefix"] = None
+
+        prefix = state["prefix"]
+        block = content_blocks[-1]
+        if block["type"] == "code_interpreter":
+            if state["code_prefix"] is None:
+                state["code_prefix"] = strip_open_code_block(prefix)
+            prefix = state["code_prefix"]
+
+        return f"{prefix}{render_content_block(block, raw)}".strip()
@@ -0,0 +1,87 @@
+from typing import Optional
+
+from open_webui.env import CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL
+
+
+def get_utf16_length(text: str) -> int:
+    # Offsets are consumed by JavaScript, which indexes strings in UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class ContentDeltaEncoder:
+    """
+    Encodes successive full-content snapshots of a streamed message as
+    delta `chat:completion` payloads.
+
+    Every payload carries a sequence number. Deltas are
+    `{"seq": n, "delta": {"offset": o, "text": t}}`: the client truncates its
+    content to `o` UTF-16 code units and appends `t`. Every
+    `checkpoint_interval` events a full `{"seq": n, "content": c}` checkpoint
+    is sent instead, which clients that missed an event use to resync.
+    """
+
+    def __init__(
+        self, checkpoint_interval: int = CHAT_STREAM_DELTA_CHECKPOINT_INTERVAL
+    ):
+        self.checkpoint_interval = max(checkpoint_interval, 1)
+
+        self.seq = 0
+        self._content: Optional[str] = None
+        self._content_utf16_length = 0
+
+    def checkpoint(self, content: str) -> dict:
+        self.seq += 1
+        self._content = content
+        self._content_utf16_length = get_utf16_length(content)
+        return {"seq": self.seq, "content": content}
+
+    def encode(self, content: str) -> dict:
+        if self._content is None or (self.seq + 1) % self.checkpoint_interval == 0:
+            return self.checkpoint(content)
+
+        self.seq += 1
+        if content.startswith(self._content):
+            # Plain append, the common case while streaming
+            offset = self._content_utf16_length
+            text = content[len(self._content) :]
+            self._content_utf16_length += get_utf16_length(text)
+        else:
+            prefix_length = get_common_prefix_length(self._content, content)
+            offset = get_utf16_length(content[:prefix_length])
+            text = content[prefix_length:]
+            self._content_utf16_length = offset + get_utf16_length(text)
+
+        self._content = content
+        return {"seq": self.seq, "delta": {"offset": offset, "text": text}}
+
+
+def apply_content_delta(content: str, delta: dict) -> str:
+    kept = delta["offset"] * 2
+    return f"{content.encode('utf-16-le')[:kept].decode('utf-16-le')}{delta['text']}"
+
+
+def merge_content_deltas(first: dict, second: dict) -> dict:
+    """
+    Merges two consecutive `{"offset", "text"}` deltas into one that yields
+    the same content when applied on its own.
+    """
+    if second["offset"] < first["offset"]:
+        return second
+
+    kept = (second["offset"] - first["offset"]) * 2
+    text = first["text"].encode("utf-16-le")[:kept].decode("utf-16-le")
+    return {"offset": first["offset"], "text": f"{text}{second['text']}"}
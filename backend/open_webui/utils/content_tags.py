@@ -0,0 +1,283 @@
+import re
+import time
+from typing import Optional
+
+
+class StreamingTagScanner:
+    """
+    Incrementally locates start and end tags in a growing content buffer.
+
+    `search_start(tag)` returns the same match as
+    `re.search(rf"<{re.escape(tag)}(\\s.*?)?>", content)` and
+    `has_end_tag(end_tag)` the same answer as
+    `re.search(rf"<{re.escape(end_tag)}>", content)`, but `feed()` only
+    classifies the `<` characters it has not seen yet (plus start tags still
+    waiting for their closing `>`) for all configured tags in one pass,
+    instead of rescanning the whole buffer per tag on every delta.
+    """
+
+    def __init__(self, tags: list[tuple[str, str]], content: str = ""):
+        self.start_tags = list(dict.fromkeys(start_tag for start_tag, _ in tags))
+        self.end_tags = list(dict.fromkeys(end_tag for _, end_tag in tags))
+        self.patterns = {
+            start_tag: re.compile(rf"<{re.escape(start_tag)}(\s.*?)?>")
+            for start_tag in self.start_tags
+        }
+
+        self.reset(content)
+
+    def reset(self, content: str = "") -> str:
+        self.content = ""
+
+        # Position of the leftmost match per start tag
+        self._starts: dict[str, int] = {}
+        self._end_tags: set[str] = set()
+        # `<tag` + whitespace candidates waiting for `>`, mapped to the index
+        # to resume looking from
+        self._pending: dict[tuple[int, str], int] = {}
+        # First `<` position that has not been classified yet
+        self._cursor = 0
+
+        return self.feed(content)
+
+    def feed(self, text: str) -> str:
+        self.content = f"{self.content}{text}"
+        content = self.content
+
+        position = content.find("<", self._cursor)
+        self._cursor = len(content)
+        while position != -1:
+            if not self._classify(position):
+                # Too close to the end of the buffer to tell yet
+                self._cursor = min(self._cursor, position)
+            position = content.find("<", position + 1)
+
+        self._resolve_pending()
+        return content
+
+    def _record_start(self, start_tag: str, position: int):
+        self._starts[start_tag] = min(self._starts.get(start_tag, position), position)
+
+    def _classify(self, position: int) -> bool:
+        content = self.content
+        length = len(content)
+        decided = True
+
+        for start_tag in self.start_tags:
+            if self._starts.get(start_tag, length) < position:
+                continue
+
+            index = position + 1 + len(start_tag)
+            if content.startswith(start_tag, position + 1):
+                if index == length:
+                    decided = False
+                elif content[index] == ">":
+                    self._record_start(start_tag, position)
+                elif content[index].isspace():
+                    self._pending.setdefault((position, start_tag), index + 1)
+            elif index > length and start_tag.startswith(content[position + 1 :]):
+                decided = False
+
+        for end_tag in self.end_tags:
+            if end_tag in self._end_tags:
+                continue
+
+            literal = f"{end_tag}>"
+            if content.startswith(literal, position + 1):
+                self._end_tags.add(end_tag)
+            elif position + 1 + len(literal) > length and literal.startswith(
+                content[position + 1 :]
+            ):
+                decided = False
+
+        return decided
+
+    def _resolve_pending(self):
+        content = self.content
+        length = len(content)
+
+        for key, index in list(self._pending.items()):
+            position, start_tag = key
+            if self._starts.get(start_tag, length) < position:
+                del self._pending[key]
+                continue
+
+            # Attributes may not span a newline
+            close = content.find(">", index)
+            newline = content.find("\n", index, close if close != -1 else length)
+            if newline != -1:
+                del self._pending[key]
+            elif close != -1:
+                self._record_start(start_tag, position)
+                del self._pending[key]
+            else:
+                self._pending[key] = length
+
+    def search_start(self, start_tag: str) -> Optional[re.Match]:
+        position = self._starts.get(start_tag)
+        if position is None:
+            return None
+        return self.patterns[start_tag].match(self.content, position)
+
+    def has_end_tag(self, end_tag: str) -> bool:
+        return end_tag in self._end_tags
+
+
+def extract_attributes(tag_content):
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:  # Ensure tag_content is not None
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+    for key, value in matches:
+        attributes[key] = value
+    return attributes
+
+
+def tag_content_handler(
+    content_type,
+    tags,
+    content,
+    content_blocks,
+    scanner: Optional[StreamingTagScanner] = None,
+):
+    """
+    Splits tagged sections (e.g. `<think>...</think>`) of the streamed
+    `content` into `content_type` blocks.
+
+    `scanner` must be fed every delta appended to `content`; it is reset
+    whenever it does not track `content` itself.
+    """
+    end_flag = False
+
+    if scanner is None:
+        scanner = StreamingTagScanner(tags, content)
+    elif scanner.content is not content:
+        scanner.reset(content)
+
+    if content_blocks[-1]["type"] == "text":
+        for start_tag, end_tag in tags:
+            # Match start tag e.g., <tag> or <tag attr="value">
+            match = scanner.search_start(start_tag)
+            if match:
+                attr_content = (
+                    match.group(1) if match.group(1) else ""
+                )  # Ensure it's not None
+                attributes = extract_attributes(
+                    attr_content
+                )  # Extract attributes safely
+
+                # Capture everything before and after the matched tag
+                before_tag = content[: match.start()]  # Content before opening tag
+                after_tag = content[match.end() :]  # Content after opening tag
+
+                # Remove the start tag and after from the currently handling text block
+                content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+                    match.group(0) + after_tag, ""
+                )
+
+                if before_tag:
+                    content_blocks[-1]["content"] = before_tag
+
+                if not content_blocks[-1]["content"]:
+                    content_blocks.pop()
+
+                # Append the new block
+                content_blocks.append(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+
+                if after_tag:
+                    content_blocks[-1]["content"] = after_tag
+                    tag_content_handler(content_type, tags, after_tag, content_blocks)
+
+                break
+    elif content_blocks[-1]["type"] == content_type:
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        # Match end tag e.g., </tag>
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        # Check if the content has the end tag
+        if scanner.has_end_tag(end_tag):
+            end_flag = True
+
+            block_content = content_blocks[-1]["content"]
+            # Strip start and end tags from the content
+            start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+            block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+            end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+            split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+            # Content inside the tag
+            block_content = split_content[0].strip() if split_content else ""
+
+            # Leftover content (everything after `</tag>`)
+            leftover_content = (
+                split_content[1].strip() if len(split_content) > 1 else ""
+            )
+
+            if block_content:
+                content_blocks[-1]["content"] = block_content
+                content_blocks[-1]["ended_at"] = time.time()
+                content_blocks[-1]["duration"] = int(
+                    content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+                )
+
+                # Reset the content_blocks by appending a new text block
+                if content_type != "code_interpreter":
+                    if leftover_content:
+
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+            else:
+                # Remove the block if content is empty
+                content_blocks.pop()
+
+                if leftover_content:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": leftover_content,
+                        }
+                    )
+                else:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": "",
+                        }
+                    )
+
+            # Clean processed content
+            content = scanner.reset(
+                re.sub(
+                    rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                    "",
+                    content,
+                    flags=re.DOTALL,
+                )
+            )
+
+    return content, content_blocks, end_flag
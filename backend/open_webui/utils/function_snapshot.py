@@ -0,0 +1,83 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from open_webui.env import FUNCTION_SNAPSHOT_TTL, SRC_LOG_LEVELS
+from open_webui.models.functions import FunctionModel, Functions
+from open_webui.utils.plugin import get_function_module_from_content
+from open_webui.utils.versioned_cache import VersionedCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+@dataclass
+class FunctionSnapshot:
+    """The active functions, their valves and loaded modules."""
+
+    functions: dict[str, FunctionModel] = field(default_factory=dict)
+    valves: dict[str, dict] = field(default_factory=dict)
+    modules: dict[str, Any] = field(default_factory=dict)
+
+    def get_functions_by_type(
+        self, type: str, global_only: bool = False
+    ) -> list[FunctionModel]:
+        return [
+            function
+            for function in self.functions.values()
+            if function.type == type and (function.is_global or not global_only)
+        ]
+
+
+class FunctionSnapshots:
+    """
+    Keeps a `FunctionSnapshot` so listing models doesn't query and load each
+    pipe, filter and action it references. The snapshot is rebuilt after a
+    function is written on this instance (the functions router goes through
+    `Functions`), or after `ttl` seconds so writes on other instances are
+    picked up too. Modules are only loaded again when their content changed.
+    """
+
+    def __init__(self, ttl: float = FUNCTION_SNAPSHOT_TTL):
+        self.cache = VersionedCache(lambda: Functions.version.value, ttl)
+
+    def get(self, request) -> FunctionSnapshot:
+        return self.cache.get(None, lambda: self.load(request))
+
+    def load(self, request) -> FunctionSnapshot:
+        functions = {
+            function.id: function
+            for function in Functions.get_functions(active_only=True)
+        }
+        valves = Functions.get_active_function_valves()
+
+        modules = {}
+        for id, function in list(functions.items()):
+            try:
+                module, _, _ = get_function_module_from_content(
+                    request, id, function.content
+                )
+            except Exception as e:
+                # It was deactivated, leave it out
+                log.exception(f"Error loading function {id}: {e}")
+                functions.pop(id)
+                continue
+
+            if hasattr(module, "valves") and hasattr(module, "Valves"):
+                try:
+                    module.valves = module.Valves(**valves.get(id, {}))
+                except Exception as e:
+                    log.exception(f"Error setting the valves of function {id}: {e}")
+            modules[id] = module
+
+        return FunctionSnapshot(
+            functions=functions,
+            valves=valves,
+            modules=modules,
+        )
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+
+FUNCTION_SNAPSHOTS = FunctionSnapshots()
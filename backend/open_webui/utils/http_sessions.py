@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class ClientSessionRegistry:
+    """
+    One long-lived `aiohttp.ClientSession` per upstream base URL, so requests
+    to the same Ollama or OpenAI server reuse pooled keep-alive connections
+    instead of paying a TCP and TLS handshake each time. Sessions are created
+    on first use and closed by `close` when the app shuts down.
+
+    Responses must be released, not closed, to return their connection to
+    the pool. Requests without a timeout of their own get aiohttp's default.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    ):
+        self.limit_per_host = max(limit_per_host, 0)
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        # base URL -> (the loop it was opened on, session)
+        self.sessions: dict[
+            str, tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]
+        ] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Returns the session for the base URL of `url`, on the running loop."""
+        base_url = get_base_url(url)
+        loop = asyncio.get_running_loop()
+        session_loop, session = self.sessions.get(base_url, (None, None))
+        if session is None or session.closed or session_loop is not loop:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit_per_host,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    use_dns_cache=True,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                ),
+                trust_env=True,
+            )
+            self.sessions[base_url] = (loop, session)
+            log.debug(f"Opened client session for {base_url}")
+        return session
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        for _, session in sessions.values():
+            try:
+                await session.close()
+            except Exception as e:
+                log.warning(f"Error closing client session: {e}")
+
+    def get_stats(self) -> dict[str, dict]:
+        """Connections in use, idle and waited for, per base URL."""
+        stats = {}
+        for base_url, (_, session) in self.sessions.items():
+            if session.closed:
+                continue
+
+            connector = session.connector
+            stats[base_url] = {
+                "limit": self.limit_per_host,
+                "in_use": len(getattr(connector, "_acquired", ())),
+                "idle": sum(
+                    len(conns) for conns in getattr(connector, "_conns", {}).values()
+                ),
+                "waiting": sum(
+                    len(waiters)
+                    for waiters in getattr(connector, "_waiters", {}).values()
+                ),
+            }
+        return stats
+
+
+HTTP_SESSIONS = ClientSessionRegistry()
+
+
+def get_session(url: str) -> aiohttp.ClientSession:
+    return HTTP_SESSIONS.get_session(url)
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    # Returns the connection to the pool, or closes it if the body wasn't read
+    if response:
+        response.release()
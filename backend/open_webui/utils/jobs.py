@@ -0,0 +1,333 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request
+
+from open_webui.env import (
+    JOB_LEASE_TIMEOUT,
+    JOB_QUEUE_MANAGER,
+    JOB_WORKERS,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.jobs import JobModel, JobResponse, Jobs
+from open_webui.models.users import Users
+from open_webui.socket.main import sio
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+# Minimum seconds between progress writes (and cancellation checks) of a job
+JOB_PROGRESS_INTERVAL = 1.0
+
+JOB_HANDLERS: dict[str, Callable] = {}
+
+MAINTENANCE_TASKS: list[Callable] = []
+
+
+def register_job_handler(type: str):
+    """
+    Registers `handler(request, user, payload)` to run jobs of `type`. Its
+    return value, a dict or None, is stored as the job's result.
+    """
+
+    def decorator(handler):
+        JOB_HANDLERS[type] = handler
+        return handler
+
+    return decorator
+
+
+def register_maintenance_task(task: Callable):
+    """
+    Registers `task()` to run on every instance each time job leases are
+    renewed, for cleanups that must survive restarts.
+    """
+    MAINTENANCE_TASKS.append(task)
+    return task
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class LocalJobQueue:
+    """Priority queue of job ids for a single instance."""
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+
+    def push(self, job_id: str, priority: int = 0):
+        with self.condition:
+            # Higher priority first, then first in first out
+            heapq.heappush(self.heap, (-priority, next(self.counter), job_id))
+            self.condition.notify()
+
+    def pop(self, timeout: float = 1.0) -> Optional[str]:
+        with self.condition:
+            if not self.heap:
+                self.condition.wait(timeout)
+            if not self.heap:
+                return None
+            return heapq.heappop(self.heap)[2]
+
+
+class RedisJobQueue:
+    """Priority queue of job ids shared by every instance, as a sorted set."""
+
+    def __init__(self, redis, key: str = "open-webui:jobs:queue"):
+        self.redis = redis
+        self.key = key
+
+    def push(self, job_id: str, priority: int = 0):
+        # Higher priority first, then first in first out
+        score = -priority * 1e13 + time.time() * 1000
+        self.redis.zadd(self.key, {job_id: score}, nx=True)
+
+    def pop(self, timeout: float = 1.0) -> Optional[str]:
+        result = self.redis.bzpopmin(self.key, timeout=max(int(timeout), 1))
+        if not result:
+            return None
+
+        job_id = result[1]
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+
+class JobContext:
+    def __init__(self, manager: "JobManager", job: JobModel):
+        self.manager = manager
+        self.job = job
+        self.last_update = 0.0
+
+    def update(self, progress: dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_update < JOB_PROGRESS_INTERVAL:
+            return
+        self.last_update = now
+
+        # Fails once this run is no longer the job's current one, i.e. it was
+        # cancelled (and possibly retried)
+        if not Jobs.update_job_progress_by_id(
+            self.job.id, progress, attempt=self.job.attempts
+        ):
+            raise JobCancelledError()
+        self.job = self.job.model_copy(update={"progress": progress})
+        self.manager.emit(self.job)
+
+
+current_job: ContextVar[Optional[JobContext]] = ContextVar("current_job", default=None)
+
+
+def update_job_progress(progress: dict, force: bool = False):
+    """
+    Records the progress of the job running on this thread, if any, at most
+    every `JOB_PROGRESS_INTERVAL` seconds unless `force`d (for checkpoints).
+    Raises `JobCancelledError` once the job has been cancelled, from any
+    instance.
+    """
+    context = current_job.get()
+    if context is not None:
+        context.update(progress, force=force)
+
+
+def get_current_job() -> Optional[JobModel]:
+    """The job running on this thread, with the progress it last recorded."""
+    context = current_job.get()
+    return context.job if context is not None else None
+
+
+class JobManager:
+    """
+    Runs jobs from `queue` on a pool of worker threads. Job state lives in
+    the `job` table, so status, cancellation and retries work across
+    instances; the queue only hands out ids. Status changes are emitted to
+    the job owner as `job-events`.
+
+    Running jobs hold a lease: their `heartbeat_at` is refreshed every third
+    of `lease_timeout`, and every instance hands jobs whose lease expired,
+    because their process died, back to the queue. Maintenance tasks run on
+    the same schedule.
+    """
+
+    def __init__(
+        self, queue, workers: int = JOB_WORKERS, lease_timeout: int = JOB_LEASE_TIMEOUT
+    ):
+        self.queue = queue
+        self.workers = max(workers, 1)
+        self.lease_timeout = lease_timeout
+
+        self.app = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.threads: list[threading.Thread] = []
+        self.stopped = threading.Event()
+
+        # id -> attempt of the jobs running in this process
+        self.running: dict[str, int] = {}
+        self.running_lock = threading.Lock()
+
+    def start(self, app):
+        self.app = app
+        self.loop = asyncio.get_running_loop()
+        self.stopped.clear()
+
+        for job in Jobs.get_jobs_by_status("pending"):
+            self.queue.push(job.id, job.priority)
+
+        self.threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{idx}", daemon=True)
+            for idx in range(self.workers)
+        ]
+        self.threads.append(
+            threading.Thread(target=self._maintain, name="job-lease", daemon=True)
+        )
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def emit_to_user(self, user_id: str, event: str, data: dict):
+        """Emits `event` to a user from any thread, through the app's loop."""
+        if self.loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(
+            sio.emit(event, data, to=f"user:{user_id}"), self.loop
+        )
+
+    def emit(self, job: JobModel):
+        self.emit_to_user(
+            job.user_id, "job-events", JobResponse(**job.model_dump()).model_dump()
+        )
+
+    def enqueue(
+        self, user_id: str, type: str, payload: dict, priority: int = 0
+    ) -> JobModel:
+        job = Jobs.insert_new_job(user_id, type, payload=payload, priority=priority)
+        self.queue.push(job.id, priority)
+        self.emit(job)
+        return job
+
+    def cancel(self, id: str) -> Optional[JobModel]:
+        # Running jobs stop at their next progress update
+        job = Jobs.cancel_job_by_id(id)
+        if job:
+            self.emit(job)
+        return job
+
+    def retry(self, id: str) -> Optional[JobModel]:
+        job = Jobs.retry_job_by_id(id)
+        if job:
+            self.queue.push(job.id, job.priority)
+            self.emit(job)
+        return job
+
+    def heartbeat(self):
+        with self.running_lock:
+            running = list(self.running.items())
+        for id, attempt in running:
+            Jobs.heartbeat_job_by_id(id, attempt=attempt)
+
+    def requeue_stale_jobs(self) -> list[JobModel]:
+        jobs = Jobs.requeue_stale_jobs(int(time.time()) - self.lease_timeout)
+        for job in jobs:
+            log.warning(f"job {job.id} lost its worker, requeueing it")
+            self.queue.push(job.id, job.priority)
+            self.emit(job)
+        return jobs
+
+    def _maintain(self):
+        while not self.stopped.wait(max(self.lease_timeout / 3, 1)):
+            try:
+                self.heartbeat()
+                self.requeue_stale_jobs()
+            except Exception as e:
+                log.exception(f"Error renewing job leases: {e}")
+            self.run_maintenance_tasks()
+
+    def run_maintenance_tasks(self):
+        for task in MAINTENANCE_TASKS:
+            try:
+                task()
+            except Exception as e:
+                log.exception(f"Error running maintenance task {task}: {e}")
+
+    def _work(self):
+        while not self.stopped.is_set():
+            try:
+                job_id = self.queue.pop()
+            except Exception as e:
+                log.exception(f"Error reading the job queue: {e}")
+                time.sleep(1)
+                continue
+
+            if job_id is None:
+                continue
+
+            # None when cancelled, or already claimed by another worker
+            job = Jobs.claim_job_by_id(job_id)
+            if job:
+                self.run(job)
+
+    def run(self, job: JobModel):
+        self.emit(job)
+
+        result, error = None, None
+        token = current_job.set(JobContext(self, job))
+        with self.running_lock:
+            self.running[job.id] = job.attempts
+        try:
+            handler = JOB_HANDLERS.get(job.type)
+            if handler is None:
+                raise ValueError(f"Unknown job type {job.type}")
+
+            result = handler(
+                Request({"type": "http", "app": self.app, "headers": []}),
+                Users.get_user_by_id(job.user_id),
+                job.payload or {},
+            )
+            status = "completed"
+        except JobCancelledError:
+            log.info(f"job {job.id} cancelled")
+            return
+        except Exception as e:
+            log.exception(f"job {job.id} failed: {e}")
+            status, error = "failed", str(getattr(e, "detail", None) or e)
+        finally:
+            current_job.reset(token)
+            with self.running_lock:
+                self.running.pop(job.id, None)
+
+        job = Jobs.finish_job_by_id(
+            job.id, status, result=result, error=error, attempt=job.attempts
+        )
+        if job:
+            self.emit(job)
+
+
+def get_job_queue():
+    if JOB_QUEUE_MANAGER == "redis":
+        return RedisJobQueue(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+            )
+        )
+    return LocalJobQueue()
+
+
+JOB_MANAGER = JobManager(get_job_queue())
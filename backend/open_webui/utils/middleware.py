@@ -9,7 +9,6 @@ from aiocache import cached
 from typing import Any, Optional
 import random
 import json
-import html
 import inspect
 import re
 import ast
@@ -82,6 +81,13 @@ from open_webui.utils.filter import (
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.chat_buffer import ChatMessageBuffer
+from open_webui.utils.content_delta import ContentDeltaEncoder
+from open_webui.utils.content_tags import StreamingTagScanner, tag_content_handler
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    serialize_content_blocks,
+)
 
 from open_webui.tasks import create_task
 
@@ -1273,7 +1279,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if not get_active_status_by_user_id(user.id):
+                    if not await get_active_status_by_user_id(user.id):
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1355,134 +1361,23 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            content_blocks_serializer = ContentBlockSerializer()
 
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
+            # Clients that opt in receive content as deltas against the
+            # previous event, legacy clients keep the full content
+            content_delta_encoder = (
+                ContentDeltaEncoder() if metadata.get("stream_delta") else None
+            )
 
-                return content.strip()
+            def get_content_event_data(content_blocks, checkpoint=False):
+                content = content_blocks_serializer.serialize(content_blocks)
+                if content_delta_encoder is None:
+                    return {"content": content}
+                if checkpoint:
+                    return content_delta_encoder.checkpoint(content)
+                return content_delta_encoder.encode(content)
 
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
@@ -1524,156 +1419,6 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
-                end_flag = False
-
-                def extract_attributes(tag_content):
-                    """Extract attributes from a tag if they exist."""
-                    attributes = {}
-                    if not tag_content:  # Ensure tag_content is not None
-                        return attributes
-                    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
-                    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
-                    for key, value in matches:
-                        attributes[key] = value
-                    return attributes
-
-                if content_blocks[-1]["type"] == "text":
-                    for start_tag, end_tag in tags:
-                        # Match start tag e.g., <tag> or <tag attr="value">
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
-                        if match:
-                            attr_content = (
-                                match.group(1) if match.group(1) else ""
-                            )  # Ensure it's not None
-                            attributes = extract_attributes(
-                                attr_content
-                            )  # Extract attributes safely
-
-                            # Capture everything before and after the matched tag
-                            before_tag = content[
-                                : match.start()
-                            ]  # Content before opening tag
-                            after_tag = content[
-                                match.end() :
-                            ]  # Content after opening tag
-
-                            # Remove the start tag and after from the currently handling text block
-                            content_blocks[-1]["content"] = content_blocks[-1][
-                                "content"
-                            ].replace(match.group(0) + after_tag, "")
-
-                            if before_tag:
-                                content_blocks[-1]["content"] = before_tag
-
-                            if not content_blocks[-1]["content"]:
-                                content_blocks.pop()
-
-                            # Append the new block
-                            content_blocks.append(
-                                {
-                                    "type": content_type,
-                                    "start_tag": start_tag,
-                                    "end_tag": end_tag,
-                                    "attributes": attributes,
-                                    "content": "",
-                                    "started_at": time.time(),
-                                }
-                            )
-
-                            if after_tag:
-                                content_blocks[-1]["content"] = after_tag
-                                tag_content_handler(
-                                    content_type, tags, after_tag, content_blocks
-                                )
-
-                            break
-                elif content_blocks[-1]["type"] == content_type:
-                    start_tag = content_blocks[-1]["start_tag"]
-                    end_tag = content_blocks[-1]["end_tag"]
-                    # Match end tag e.g., </tag>
-                    end_tag_pattern = rf"<{re.escape(end_tag)}>"
-
-                    # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
-                        end_flag = True
-
-                        block_content = content_blocks[-1]["content"]
-                        # Strip start and end tags from the content
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
-                        block_content = re.sub(
-                            start_tag_pattern, "", block_content
-                        ).strip()
-
-                        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
-                        split_content = end_tag_regex.split(block_content, maxsplit=1)
-
-                        # Content inside the tag
-                        block_content = (
-                            split_content[0].strip() if split_content else ""
-                        )
-
-                        # Leftover content (everything after `</tag>`)
-                        leftover_content = (
-                            split_content[1].strip() if len(split_content) > 1 else ""
-                        )
-
-                        if block_content:
-                            content_blocks[-1]["content"] = block_content
-                            content_blocks[-1]["ended_at"] = time.time()
-                            content_blocks[-1]["duration"] = int(
-                                content_blocks[-1]["ended_at"]
-                                - content_blocks[-1]["started_at"]
-                            )
-
-                            # Reset the content_blocks by appending a new text block
-                            if content_type != "code_interpreter":
-                                if leftover_content:
-
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": leftover_content,
-                                        }
-                                    )
-                                else:
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": "",
-                                        }
-                                    )
-
-                        else:
-                            # Remove the block if content is empty
-                            content_blocks.pop()
-
-                            if leftover_content:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": leftover_content,
-                                    }
-                                )
-                            else:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": "",
-                                    }
-                                )
-
-                        # Clean processed content
-                        content = re.sub(
-                            rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
-                            "",
-                            content,
-                            flags=re.DOTALL,
-                        )
-
-                return content, content_blocks, end_flag
-
             message = Chats.get_message_by_id_and_message_id(
                 metadata["chat_id"], metadata["message_id"]
             )
@@ -1723,6 +1468,17 @@ async def process_chat_response(
 
             solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
 
+            # Tracks the tags of every family in `content` as it streams in
+            tag_scanner = StreamingTagScanner(
+                [*reasoning_tags, *code_interpreter_tags, *solution_tags], content
+            )
+
+            chat_message_buffer = (
+                ChatMessageBuffer(metadata["chat_id"], metadata["message_id"])
+                if ENABLE_REALTIME_CHAT_SAVE
+                else None
+            )
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1873,6 +1629,7 @@ async def process_chat_response(
                                                         ] += delta_arguments
 
                                     value = delta.get("content")
+                                    content_updated = False
 
                                     reasoning_content = (
                                         delta.get("reasoning_content")
@@ -1899,12 +1656,7 @@ async def process_chat_response(
                                             reasoning_block = content_blocks[-1]
 
                                         reasoning_block["content"] += reasoning_content
-
-                                        data = {
-                                            "content": serialize_content_blocks(
-                                                content_blocks
-                                            )
-                                        }
+                                        content_updated = True
 
                                     if value:
                                         if (
@@ -1930,7 +1682,7 @@ async def process_chat_response(
                                                 }
                                             )
 
-                                        content = f"{content}{value}"
+                                        content = tag_scanner.feed(value)
                                         if not content_blocks:
                                             content_blocks.append(
                                                 {
@@ -1950,6 +1702,7 @@ async def process_chat_response(
                                                     reasoning_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scanner,
                                                 )
                                             )
 
@@ -1960,6 +1713,7 @@ async def process_chat_response(
                                                     code_interpreter_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scanner,
                                                 )
                                             )
 
@@ -1973,26 +1727,27 @@ async def process_chat_response(
                                                     solution_tags,
                                                     content,
                                                     content_blocks,
+                                                    tag_scanner,
                                                 )
                                             )
 
-                                        if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
-                                                metadata["chat_id"],
-                                                metadata["message_id"],
+                                        if chat_message_buffer:
+                                            # Save message in the database (write-behind)
+                                            chat_message_buffer.update(
                                                 {
-                                                    "content": serialize_content_blocks(
+                                                    "content": content_blocks_serializer.serialize(
                                                         content_blocks
                                                     ),
-                                                },
+                                                }
                                             )
                                         else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
-                                            }
+                                            content_updated = True
+
+                                    # Once per event, a chunk may carry both
+                                    # reasoning and content, and every call
+                                    # takes a delta sequence number
+                                    if content_updated:
+                                        data = get_content_event_data(content_blocks)
 
                                 await event_emitter(
                                     {
@@ -2052,12 +1807,21 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": get_content_event_data(content_blocks),
                         }
                     )
 
+                    if chat_message_buffer:
+                        # Tools may take a while, keep the saved message current
+                        chat_message_buffer.update(
+                            {
+                                "content": content_blocks_serializer.serialize(
+                                    content_blocks
+                                ),
+                            }
+                        )
+                        chat_message_buffer.flush(reason="tool_calls")
+
                     tools = metadata.get("tools", {})
 
                     results = []
@@ -2174,9 +1938,7 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": get_content_event_data(content_blocks),
                         }
                     )
 
@@ -2214,12 +1976,21 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": get_content_event_data(content_blocks),
                             }
                         )
 
+                        if chat_message_buffer:
+                            # Execution may take a while, keep the saved message current
+                            chat_message_buffer.update(
+                                {
+                                    "content": content_blocks_serializer.serialize(
+                                        content_blocks
+                                    ),
+                                }
+                            )
+                            chat_message_buffer.flush(reason="code_interpreter")
+
                         retries += 1
                         log.debug(f"Attempt count: {retries}")
 
@@ -2336,9 +2107,7 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": get_content_event_data(content_blocks),
                             }
                         )
 
@@ -2352,7 +2121,7 @@ async def process_chat_response(
                                         *form_data["messages"],
                                         {
                                             "role": "assistant",
-                                            "content": serialize_content_blocks(
+                                            "content": content_blocks_serializer.serialize(
                                                 content_blocks, raw=True
                                             ),
                                         },
@@ -2372,22 +2141,33 @@ async def process_chat_response(
                 title = Chats.get_chat_title_by_id(metadata["chat_id"])
                 data = {
                     "done": True,
-                    "content": serialize_content_blocks(content_blocks),
+                    **get_content_event_data(content_blocks, checkpoint=True),
                     "title": title,
                 }
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
+                if chat_message_buffer:
+                    chat_message_buffer.update(
+                        {
+                            "content": content_blocks_serializer.serialize(
+                                content_blocks
+                            ),
+                        }
+                    )
+                    chat_message_buffer.flush()
+                else:
                     # Save message in the database
                     Chats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_content_blocks(content_blocks),
+                            "content": content_blocks_serializer.serialize(
+                                content_blocks
+                            ),
                         },
                     )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         post_webhook(
@@ -2414,13 +2194,24 @@ async def process_chat_response(
                 log.warning("Task was cancelled!")
                 await event_emitter({"type": "task-cancelled"})
 
-                if not ENABLE_REALTIME_CHAT_SAVE:
+                if chat_message_buffer:
+                    chat_message_buffer.update(
+                        {
+                            "content": content_blocks_serializer.serialize(
+                                content_blocks
+                            ),
+                        }
+                    )
+                    chat_message_buffer.flush(reason="cancelled")
+                else:
                     # Save message in the database
                     Chats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_content_blocks(content_blocks),
+                            "content": content_blocks_serializer.serialize(
+                                content_blocks
+                            ),
                         },
                     )
 
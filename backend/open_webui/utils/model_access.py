@@ -0,0 +1,65 @@
+import logging
+from typing import Optional
+
+from open_webui.env import MODEL_ACCESS_CACHE_TTL, SRC_LOG_LEVELS
+from open_webui.models.groups import Groups
+from open_webui.models.models import Models
+from open_webui.utils.access_control import get_user_group_ids, has_access
+from open_webui.utils.versioned_cache import VersionedCache
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ModelAccessIndex:
+    """
+    Answers which models a user may read without a query per model. The
+    owner and access control of every model are loaded in one query, and
+    the ids each user may read are kept until a model or group is written
+    on this instance, or for `ttl` seconds so writes on other instances are
+    picked up too.
+
+    Role checks (admins see everything) are left to the callers.
+    """
+
+    def __init__(self, ttl: float = MODEL_ACCESS_CACHE_TTL):
+        # model id -> (user_id, access_control)
+        self.models = VersionedCache(self.get_version, ttl)
+        # user id -> visible model ids
+        self.visible = VersionedCache(self.get_version, ttl)
+
+    def get_version(self) -> tuple[int, int]:
+        return Models.version.value, Groups.version.value
+
+    def get_model_access(self) -> dict[str, tuple[str, Optional[dict]]]:
+        return self.models.get(None, Models.get_model_access_controls)
+
+    def get_visible_model_ids(self, user_id: str) -> frozenset[str]:
+        """The ids of the models `user_id` owns or may read."""
+        return self.visible.get(user_id, lambda: self.load_visible_model_ids(user_id))
+
+    def load_visible_model_ids(self, user_id: str) -> frozenset[str]:
+        models = self.get_model_access()
+        user_group_ids = get_user_group_ids(user_id)
+
+        return frozenset(
+            id
+            for id, (owner_id, access_control) in models.items()
+            if owner_id == user_id
+            or has_access(
+                user_id,
+                type="read",
+                access_control=access_control,
+                user_group_ids=user_group_ids,
+            )
+        )
+
+    def has_read_access(self, user_id: str, model_id: str) -> bool:
+        return model_id in self.get_visible_model_ids(user_id)
+
+    def invalidate(self):
+        self.models.invalidate()
+        self.visible.invalidate()
+
+
+MODEL_ACCESS = ModelAccessIndex()
@@ -0,0 +1,205 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request
+
+from open_webui.env import (
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    MODELS_REFRESH_INTERVAL,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+MODELS_REDIS_KEY_PREFIX = "open-webui:models"
+
+
+class ModelRegistry:
+    """
+    Serves the model lists of each registered source ("ollama", "openai")
+    from memory, refreshing them in the background once older than
+    `refresh_interval` seconds: only the very first request waits on the
+    upstreams. With Redis the lists are shared by every worker and refreshed
+    by one at a time.
+
+    Connections that fail to answer keep their last known models, see
+    `last_known_good`.
+    """
+
+    def __init__(self, refresh_interval: float = MODELS_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+
+        self.sources: dict[str, Callable[[Request], Awaitable[Any]]] = {}
+        # source -> (updated_at, models)
+        self.entries: dict[str, tuple[float, Any]] = {}
+        self.responses: dict[str, Any] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        # Bumped by `invalidate`, refreshes started before are discarded
+        self.generations: dict[str, int] = {}
+
+    def register(self, source: str, fetch: Callable[[Request], Awaitable[Any]]):
+        """Registers `fetch(request)`, returning the models of `source`."""
+        self.sources[source] = fetch
+
+    def is_stale(self, entry: tuple[float, Any]) -> bool:
+        return time.time() - entry[0] >= self.refresh_interval
+
+    async def get(self, request: Request, source: str) -> Any:
+        app = request.app
+        entry = self.entries.get(source)
+        if entry is None or self.is_stale(entry):
+            # Possibly refreshed by another worker
+            shared = await self.read_shared(app, source)
+            if shared and (entry is None or shared[0] > entry[0]):
+                entry = self.entries[source] = shared
+
+        if entry is None:
+            entry = await self.refresh(app, source)
+        elif self.is_stale(entry):
+            self.refresh_in_background(app, source)
+
+        # Callers decorate the models they get
+        return copy.deepcopy(entry[1])
+
+    async def refresh(self, app, source: str) -> tuple[float, Any]:
+        """Fetches `source` again, sharing a refresh already under way."""
+        task = self.tasks.get(source)
+        if task is None or task.done():
+            task = self.tasks[source] = asyncio.create_task(self._refresh(app, source))
+        return await asyncio.shield(task)
+
+    def refresh_in_background(self, app, source: str):
+        task = self.tasks.get(source)
+        if task is None or task.done():
+            self.tasks[source] = asyncio.create_task(self._refresh(app, source))
+
+    async def _refresh(self, app, source: str) -> tuple[float, Any]:
+        generation = self.generations.get(source, 0)
+        redis = getattr(app.state, "redis", None)
+        lock_key = f"{MODELS_REDIS_KEY_PREFIX}:{source}:lock"
+
+        locked = False
+        if redis is not None and source in self.entries:
+            try:
+                locked = await redis.set(
+                    lock_key, "1", nx=True, ex=max(int(self.refresh_interval), 1)
+                )
+                if not locked:
+                    # Another worker is refreshing, keep serving what we have
+                    return self.entries[source]
+            except Exception as e:
+                log.warning(f"Error locking the {source} models refresh: {e}")
+
+        try:
+            models = await self.sources[source](
+                Request({"type": "http", "app": app, "headers": []})
+            )
+            entry = (time.time(), models)
+            if generation == self.generations.get(source, 0):
+                self.entries[source] = entry
+                await self.write_shared(app, source, entry)
+            return entry
+        except Exception as e:
+            if source not in self.entries:
+                raise
+            log.exception(f"Error refreshing {source} models: {e}")
+            return self.entries[source]
+        finally:
+            if locked:
+                try:
+                    await redis.delete(lock_key)
+                except Exception:
+                    pass
+
+    async def read_shared(self, app, source: str) -> Optional[tuple[float, Any]]:
+        redis = getattr(app.state, "redis", None)
+        if redis is None:
+            return None
+
+        try:
+            value = await redis.get(f"{MODELS_REDIS_KEY_PREFIX}:{source}")
+            if value:
+                value = json.loads(value)
+                return value["updated_at"], value["models"]
+        except Exception as e:
+            log.warning(f"Error reading shared {source} models: {e}")
+        return None
+
+    async def write_shared(self, app, source: str, entry: tuple[float, Any]):
+        redis = getattr(app.state, "redis", None)
+        if redis is None:
+            return
+
+        try:
+            await redis.set(
+                f"{MODELS_REDIS_KEY_PREFIX}:{source}",
+                json.dumps({"updated_at": entry[0], "models": entry[1]}),
+            )
+        except Exception as e:
+            log.warning(f"Error sharing {source} models: {e}")
+
+    async def invalidate(self, app, source: str):
+        """Makes the next `get` wait for fresh models, e.g. after a config change."""
+        self.generations[source] = self.generations.get(source, 0) + 1
+        self.entries.pop(source, None)
+        self.tasks.pop(source, None)
+
+        redis = getattr(app.state, "redis", None)
+        if redis is not None:
+            try:
+                await redis.delete(f"{MODELS_REDIS_KEY_PREFIX}:{source}")
+            except Exception as e:
+                log.warning(f"Error invalidating shared {source} models: {e}")
+
+    def get_connection_key(
+        self, source: str, idx: int, url: str, user=None
+    ) -> Optional[str]:
+        """
+        The `last_known_good` key of the connection `idx` of `source`, None
+        when its models are fetched with the user's info forwarded and may
+        differ per user.
+        """
+        if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+            return None
+        return f"{source}:{idx}:{url}"
+
+    async def last_known_good(
+        self, key: Optional[str], response: Awaitable[Any]
+    ) -> Any:
+        """
+        Awaits the model list `response` of the connection `key`, or returns
+        the last one it gave when it fails. Without a key nothing is kept.
+        """
+        response = await response
+        if key is None:
+            return response
+
+        if response is not None and not (
+            isinstance(response, dict) and "error" in response
+        ):
+            self.responses[key] = copy.deepcopy(response)
+            return response
+
+        if key in self.responses:
+            log.warning(f"Serving the last known models of {key}")
+            return copy.deepcopy(self.responses[key])
+        return response
+
+    async def run(self, app):
+        """Keeps every source fresh until cancelled."""
+        while True:
+            for source in list(self.sources):
+                try:
+                    await self.refresh(app, source)
+                except Exception as e:
+                    log.exception(f"Error refreshing {source} models: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+MODEL_REGISTRY = ModelRegistry()
@@ -10,15 +10,15 @@ from open_webui.routers import openai, ollama
 from open_webui.functions import get_function_models
 
 
-from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 
 from open_webui.utils.plugin import (
     load_function_module_by_id,
-    get_function_module_from_cache,
 )
 from open_webui.utils.access_control import has_access
+from open_webui.utils.function_snapshot import FUNCTION_SNAPSHOTS
+from open_webui.utils.model_access import MODEL_ACCESS
 
 
 from open_webui.config import (
@@ -118,20 +118,22 @@ async def get_all_models(request, user: UserModel = None):
             ]
         models = models + arena_models
 
+    functions = FUNCTION_SNAPSHOTS.get(request)
+
     global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
+        function.id
+        for function in functions.get_functions_by_type("action", global_only=True)
     ]
     enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
+        function.id for function in functions.get_functions_by_type("action")
     ]
 
     global_filter_ids = [
-        function.id for function in Functions.get_global_filter_functions()
+        function.id
+        for function in functions.get_functions_by_type("filter", global_only=True)
     ]
     enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
+        function.id for function in functions.get_functions_by_type("filter")
     ]
 
     custom_models = Models.get_all_models()
@@ -253,10 +255,6 @@ async def get_all_models(request, user: UserModel = None):
             }
         ]
 
-    def get_function_module_by_id(function_id):
-        function_module, _, _ = get_function_module_from_cache(request, function_id)
-        return function_module
-
     for model in models:
         action_ids = [
             action_id
@@ -271,22 +269,16 @@ async def get_all_models(request, user: UserModel = None):
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
-
-            function_module = get_function_module_by_id(action_id)
+            action_function = functions.functions[action_id]
+            function_module = functions.modules[action_id]
             model["actions"].extend(
                 get_action_items_from_module(action_function, function_module)
             )
 
         model["filters"] = []
         for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
-            if filter_function is None:
-                raise Exception(f"Filter not found: {filter_id}")
-
-            function_module = get_function_module_by_id(filter_id)
+            filter_function = functions.functions[filter_id]
+            function_module = functions.modules[filter_id]
 
             if getattr(function_module, "toggle", None):
                 model["filters"].extend(
@@ -310,13 +302,5 @@ def check_model_access(user, model):
         ):
             raise Exception("Model not found")
     else:
-        model_info = Models.get_model_by_id(model.get("id"))
-        if not model_info:
-            raise Exception("Model not found")
-        elif not (
-            user.id == model_info.user_id
-            or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            )
-        ):
+        if not MODEL_ACCESS.has_read_access(user.id, model.get("id")):
             raise Exception("Model not found")
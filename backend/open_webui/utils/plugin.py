@@ -166,6 +166,43 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
+def get_function_module_from_content(request, function_id, content):
+    """
+    Returns the module of `function_id` loaded from `content`, reusing the
+    one already loaded while its content is unchanged.
+    """
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        # Update the function content in the database
+        Functions.update_function_by_id(function_id, {"content": content})
+
+    if (
+        hasattr(request.app.state, "FUNCTION_CONTENTS")
+        and function_id in request.app.state.FUNCTION_CONTENTS
+    ) and (
+        hasattr(request.app.state, "FUNCTIONS")
+        and function_id in request.app.state.FUNCTIONS
+    ):
+        if request.app.state.FUNCTION_CONTENTS[function_id] == content:
+            return request.app.state.FUNCTIONS[function_id], None, None
+
+    function_module, function_type, frontmatter = load_function_module_by_id(
+        function_id, content
+    )
+
+    if not hasattr(request.app.state, "FUNCTIONS"):
+        request.app.state.FUNCTIONS = {}
+
+    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
+        request.app.state.FUNCTION_CONTENTS = {}
+
+    request.app.state.FUNCTIONS[function_id] = function_module
+    request.app.state.FUNCTION_CONTENTS[function_id] = content
+
+    return function_module, function_type, frontmatter
+
+
 def get_function_module_from_cache(request, function_id, load_from_db=True):
     if load_from_db:
         # Always load from the database by default
@@ -175,27 +212,8 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
-
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
 
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
-
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id, content
-        )
+        return get_function_module_from_content(request, function_id, function.content)
     else:
         # Load from cache (e.g. "stream" hook)
         # This is useful for performance reasons
@@ -8,8 +8,10 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* http.client.pool.connections (gauge), shared upstream client sessions
 
-Attributes used: http.method, http.route, http.status_code
+Attributes used: http.method, http.route, http.status_code, and
+server.address, state (in_use, idle, waiting) for the pool gauge
 
 If you wish to add more attributes (e.g. user-agent) you can, but beware of
 high-cardinality label sets.
@@ -18,10 +20,11 @@ high-cardinality label sets.
 from __future__ import annotations
 
 import time
-from typing import Dict, List, Sequence, Any
+from typing import Dict, Iterable, List, Sequence, Any
 
 from fastapi import FastAPI, Request
 from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
     OTLPMetricExporter,
 )
@@ -33,6 +36,7 @@ from opentelemetry.sdk.metrics.export import (
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 
 from open_webui.env import OTEL_SERVICE_NAME, OTEL_EXPORTER_OTLP_ENDPOINT
+from open_webui.utils.http_sessions import HTTP_SESSIONS
 
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
@@ -69,6 +73,16 @@ def _build_meter_provider() -> MeterProvider:
     return provider
 
 
+def _observe_client_pools(options: CallbackOptions) -> Iterable[Observation]:
+    """Connections of the shared upstream client sessions, by state."""
+
+    for base_url, stats in HTTP_SESSIONS.get_stats().items():
+        for state in ("in_use", "idle", "waiting"):
+            yield Observation(
+                stats[state], {"server.address": base_url, "state": state}
+            )
+
+
 def setup_metrics(app: FastAPI) -> None:
     """Attach OTel metrics middleware to *app* and initialise provider."""
 
@@ -86,6 +100,12 @@ def setup_metrics(app: FastAPI) -> None:
         description="HTTP request duration",
         unit="ms",
     )
+    meter.create_observable_gauge(
+        name="http.client.pool.connections",
+        callbacks=[_observe_client_pools],
+        description="Upstream client connections (waiting: requests queued for one)",
+        unit="1",
+    )
 
     # FastAPI middleware
     @app.middleware("http")
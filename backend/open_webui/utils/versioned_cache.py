@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class VersionCounter:
+    """
+    Counts the writes a table makes on this instance, so in-memory views of
+    it can tell they are stale. Bumped after each write commits.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def bump(self):
+        with self.lock:
+            self.value += 1
+
+
+class VersionedCache:
+    """
+    Values loaded per key, kept until `get_version()` changes or for `ttl`
+    seconds, so writes on other instances are picked up too.
+
+    The version is read before loading: a write racing the load leaves the
+    entry stale and the next read loads it again.
+    """
+
+    def __init__(self, get_version: Callable[[], Hashable], ttl: float):
+        self.get_version = get_version
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # key -> (version, loaded_at, value)
+        self.entries: dict[Hashable, tuple[Hashable, float, object]] = {}
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                version, loaded_at, value = entry
+                if (
+                    version == self.get_version()
+                    and time.monotonic() - loaded_at < self.ttl
+                ):
+                    return value
+
+            version = self.get_version()
+            value = load()
+            self.entries[key] = (version, time.monotonic(), value)
+            return value
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()